@@ -3,7 +3,6 @@
 """
 import argparse
 import sys
-import asyncio
 from pathlib import Path
 
 from .config import Config
@@ -18,15 +17,22 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 示例:
-  # 构建知识库
+  # 构建知识库（已有索引时只处理变化的网页；中断后可用 --resume 从检查点继续）
   python -m legal_rights build-kb
+  python -m legal_rights build-kb --resume
 
   # 单次问答
   python -m legal_rights ask "公司恶意辞退不给补偿怎么办？"
 
+  # 批量问答（并发，结果逐行写入JSONL）
+  python -m legal_rights ask --file questions.txt --concurrency 4 --out results.jsonl
+
   # 交互式对话
   python -m legal_rights chat
 
+  # 启动HTTP服务（常驻预热的Agent）
+  python -m legal_rights serve --port 8000
+
   # 测试API连接
   python -m legal_rights test
 
@@ -45,13 +51,18 @@ def main():
     parser_build.add_argument(
         "--force",
         action="store_true",
-        help="强制重新构建（忽略缓存）"
+        help="强制全量重新构建（忽略网页缓存和构建清单）"
     )
     parser_build.add_argument(
         "--skip-scrape",
         action="store_true",
         help="跳过网页抓取（使用现有缓存）"
     )
+    parser_build.add_argument(
+        "--resume",
+        action="store_true",
+        help="从上次中断处继续（复用已完成的解析、分块和Embedding检查点）"
+    )
 
     # ask 命令
     parser_ask = subparsers.add_parser(
@@ -61,8 +72,25 @@ def main():
     parser_ask.add_argument(
         "question",
         type=str,
+        nargs="?",
         help="要提问的问题"
     )
+    parser_ask.add_argument(
+        "--file",
+        type=str,
+        help="批量模式：问题文件（每行一个问题，# 开头为注释）"
+    )
+    parser_ask.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="批量模式：最大并发LLM调用数（默认4）"
+    )
+    parser_ask.add_argument(
+        "--out",
+        type=str,
+        help="批量模式：结果输出文件（JSONL，默认输出到标准输出）"
+    )
     parser_ask.add_argument(
         "--verbose",
         action="store_true",
@@ -86,6 +114,36 @@ def main():
         help="清空对话历史重新开始"
     )
 
+    # serve 命令
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="启动本地HTTP服务（/ask, /ask/stream, /retrieve）"
+    )
+    parser_serve.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="监听地址（默认127.0.0.1）"
+    )
+    parser_serve.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="监听端口（默认8000）"
+    )
+    parser_serve.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="最大并发处理请求数（默认8）"
+    )
+    parser_serve.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="LLM客户端池大小（默认4）"
+    )
+
     # test 命令
     parser_test = subparsers.add_parser(
         "test",
@@ -120,11 +178,28 @@ def main():
     # 执行命令
     try:
         if args.command == "build-kb":
-            build_knowledge_base(force=args.force, skip_scrape=args.skip_scrape)
+            build_knowledge_base(force=args.force, skip_scrape=args.skip_scrape, resume=args.resume)
         elif args.command == "ask":
-            ask_question(args.question, verbose=args.verbose, top_k=args.top_k)
+            if args.file:
+                ask_batch(
+                    args.file,
+                    concurrency=args.concurrency,
+                    out=args.out,
+                    top_k=args.top_k
+                )
+            elif args.question:
+                ask_question(args.question, verbose=args.verbose, top_k=args.top_k)
+            else:
+                parser_ask.error("请提供问题或使用 --file 指定问题文件")
         elif args.command == "chat":
             start_chat(reset=args.reset)
+        elif args.command == "serve":
+            start_server(
+                host=args.host,
+                port=args.port,
+                concurrency=args.concurrency,
+                pool_size=args.pool_size
+            )
         elif args.command == "test":
             test_api_connection()
         elif args.command == "stats":
@@ -139,10 +214,9 @@ def main():
         sys.exit(1)
 
 
-def build_knowledge_base(force: bool = False, skip_scrape: bool = False):
+def build_knowledge_base(force: bool = False, skip_scrape: bool = False, resume: bool = False):
     """构建知识库"""
-    from .scraper import WebScraper, HTMLCleaner, ContentParser
-    from .knowledge import TextGenerator, VectorIndexer
+    from .knowledge.build_pipeline import BuildPipeline
 
     print("\n🏗️  开始构建知识库")
     print("=" * 80)
@@ -167,102 +241,36 @@ def build_knowledge_base(force: bool = False, skip_scrape: bool = False):
 
     print(f"✅ Embedding API: {selected_embedding}")
 
-    structured_contents = []
-
-    # 步骤1: 网页抓取
-    if not skip_scrape:
-        print("\n[步骤 1/4] 抓取网页内容")
-        print("-" * 80)
-
-        scraper = WebScraper()
-        use_cache = not force
-
-        try:
-            results = asyncio.run(scraper.fetch_target_urls(use_cache=use_cache))
-
-            if not any(results.values()):
-                print("\n⚠️  所有网页抓取失败")
-                print("提示: 可能是网站反爬虫，请查看 scripts/manual_scrape_guide.md")
-                print("或使用 --skip-scrape 跳过抓取步骤（使用现有缓存）")
-                return
-
-        except Exception as e:
-            print(f"❌ 抓取失败: {e}")
-            return
-    else:
-        print("\n[步骤 1/4] 跳过网页抓取（使用缓存）")
-        print("-" * 80)
-        print("✅ 已跳过")
-
-    # 步骤2: 内容解析
-    print("\n[步骤 2/4] 解析和清洗内容")
+    # 抓取、解析、分块、Embedding 各阶段并行，每个阶段写入检查点
+    print("\n[构建] 抓取 → 解析 → 分块 → Embedding → 索引")
     print("-" * 80)
+    if resume:
+        print(f"从检查点继续: {Config.BUILD_DIR}")
+    if skip_scrape:
+        print("跳过网页抓取（使用缓存）")
 
-    cleaner = HTMLCleaner()
-    parser = ContentParser()
-
-    # 读取缓存的HTML
-    cache_files = list(Config.CACHE_DIR.glob("*.html"))
-    if not cache_files:
-        print("❌ 没有找到缓存的HTML文件")
-        print("请先运行不带 --skip-scrape 的命令，或手动添加HTML到 data/cache/")
-        return
-
-    print(f"找到 {len(cache_files)} 个缓存文件")
-
-    for i, cache_file in enumerate(cache_files, 1):
-        print(f"\n  [{i}/{len(cache_files)}] {cache_file.name}")
-
-        try:
-            html = cache_file.read_text(encoding='utf-8')
-            cleaned_html, text = cleaner.clean_and_extract(html)
-
-            # 尝试从文件名或内容提取标题
-            title = f"法律文档 {i}"
-
-            structured = parser.parse(
-                html=cleaned_html,
-                url=f"file://{cache_file}",
-                title=title
-            )
-
-            structured_contents.append(structured)
-            print(f"      ✅ 解析完成 ({len(structured.sections)} 个章节)")
-
-        except Exception as e:
-            print(f"      ❌ 解析失败: {e}")
-
-    if not structured_contents:
-        print("\n❌ 没有成功解析任何内容")
-        return
-
-    print(f"\n✅ 成功解析 {len(structured_contents)} 个文档")
-
-    # 步骤3: 生成文档
-    print("\n[步骤 3/4] 生成Markdown文档")
-    print("-" * 80)
-
-    generator = TextGenerator()
     try:
-        generator.generate_batch(structured_contents, format='md')
-    except Exception as e:
-        print(f"❌ 文档生成失败: {e}")
+        indexer = BuildPipeline().run(
+            scrape=not skip_scrape,
+            use_cache=not force,
+            resume=resume,
+            incremental=not force
+        )
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        print("提示: 可能是网站反爬虫，请查看 scripts/manual_scrape_guide.md")
         return
-
-    # 步骤4: 构建向量索引
-    print("\n[步骤 4/4] 构建向量索引")
-    print("-" * 80)
-
-    try:
-        indexer = VectorIndexer()
-        indexer.build_index(structured_contents, show_progress=True)
-        indexer.save_index()
     except Exception as e:
         print(f"❌ 索引构建失败: {e}")
+        print("已完成的解析、分块和Embedding已保存，可使用 --resume 继续")
         import traceback
         traceback.print_exc()
         return
 
+    if indexer is None:
+        print("\n❌ 没有成功解析任何内容")
+        return
+
     # 完成
     print("\n" + "=" * 80)
     print("🎉 知识库构建完成！")
@@ -318,9 +326,105 @@ def ask_question(question: str, verbose: bool = False, top_k: int = 5):
         traceback.print_exc()
 
 
+def ask_batch(
+    file_path: str,
+    concurrency: int = 4,
+    out: str = None,
+    top_k: int = 5
+):
+    """批量问答（并发执行，结果以JSONL逐行输出）"""
+    import json
+    import time
+    from .agent import LegalAgent
+    from .agent.http_pool import pool_stats
+
+    # 结果写到标准输出时，进度信息改写到标准错误，保持JSONL干净
+    log_file = sys.stdout if out else sys.stderr
+
+    def log(*args, **kwargs):
+        print(*args, file=log_file, **kwargs)
+
+    log("\n💬 法律维权智能助手 - 批量问答")
+    log("=" * 80)
+
+    questions_path = Path(file_path)
+    if not questions_path.exists():
+        log(f"❌ 问题文件不存在: {questions_path}")
+        return
+
+    questions = [
+        line.strip()
+        for line in questions_path.read_text(encoding='utf-8').splitlines()
+        if line.strip() and not line.strip().startswith('#')
+    ]
+    if not questions:
+        log("❌ 问题文件为空")
+        return
+
+    # 检查索引
+    index_path = Config.VECTORS_DIR / "index.faiss"
+    if not index_path.exists():
+        log("\n⚠️  向量索引不存在")
+        log("请先运行: python -m legal_rights build-kb")
+        return
+
+    # 初始化Agent
+    try:
+        agent = LegalAgent(verbose=False)
+    except Exception as e:
+        log(f"❌ Agent初始化失败: {e}")
+        return
+
+    log(f"问题数: {len(questions)}，并发数: {concurrency}")
+
+    output = open(out, 'w', encoding='utf-8') if out else sys.stdout
+    succeeded = 0
+    start = time.time()
+
+    try:
+        for done, (index, result) in enumerate(
+            agent.ask_many(questions, concurrency=concurrency, top_k=top_k), 1
+        ):
+            record = {"index": index, "question": questions[index]}
+
+            if isinstance(result, Exception):
+                record.update({"ok": False, "error": str(result)})
+                log(f"  [{done}/{len(questions)}] ❌ #{index}: {result}")
+            else:
+                succeeded += 1
+                record.update({
+                    "ok": True,
+                    "question_type": result.question_type.value,
+                    "answer": result.answer_text,
+                    "confidence": result.confidence,
+                    "sources": result.sources,
+                    "metadata": result.metadata,
+                })
+                log(f"  [{done}/{len(questions)}] ✅ #{index}")
+
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+    finally:
+        if out:
+            output.close()
+
+    elapsed = time.time() - start
+
+    log("\n" + "=" * 80)
+    log(f"✅ 完成: 成功 {succeeded}/{len(questions)}，失败 {len(questions) - succeeded}")
+    log(f"⏱️  总耗时: {elapsed:.1f}秒，吞吐量: {len(questions) / max(elapsed, 1e-9):.2f} 问题/秒")
+    stats = pool_stats()
+    if stats["requests"]:
+        log(f"🔌 HTTP连接复用率: {stats['reuse_rate']:.1%} "
+            f"（{stats['requests']} 次请求，新建 {stats['new_connections']} 个连接）")
+    if out:
+        log(f"📄 结果已保存: {out}")
+
+
 def start_chat(reset: bool = False):
     """交互式对话"""
     from .agent import LegalAgent
+    from .models import Answer
 
     print("\n💬 法律维权智能助手 - 交互式对话")
     print("=" * 80)
@@ -379,14 +483,22 @@ def start_chat(reset: bool = False):
                 print(summary)
                 continue
 
-            # 问答
+            # 问答（流式显示）
             turn += 1
-            print(f"\n[{turn}] 助手: ", end="", flush=True)
+            answer = None
+            started = False
+
+            for piece in agent.chat_stream(user_input):
+                if isinstance(piece, Answer):
+                    answer = piece
+                    continue
 
-            answer = agent.chat(user_input)
+                if not started:
+                    print(f"\n[{turn}] 助手: ", end="", flush=True)
+                    started = True
+                print(piece, end="", flush=True)
 
-            # 流式显示（模拟）
-            print(answer.answer_text)
+            print()
 
             # 显示置信度
             if answer.confidence < 0.7:
@@ -400,6 +512,28 @@ def start_chat(reset: bool = False):
             continue
 
 
+def start_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    concurrency: int = 8,
+    pool_size: int = 4
+):
+    """启动HTTP服务"""
+    from .server import run_server
+
+    print("\n🌐 法律维权智能助手 - HTTP服务")
+    print("=" * 80)
+
+    # 检查索引
+    index_path = Config.VECTORS_DIR / "index.faiss"
+    if not index_path.exists():
+        print("\n⚠️  向量索引不存在")
+        print("请先运行: python -m legal_rights build-kb")
+        return
+
+    run_server(host=host, port=port, concurrency=concurrency, pool_size=pool_size)
+
+
 def test_api_connection():
     """测试API连接"""
     from .agent.llm_factory import create_llm_client
@@ -461,6 +595,8 @@ def show_stats():
     """显示知识库统计"""
     import json
 
+    from .scraper.cache_store import open_cache_store
+
     print("\n📊 知识库统计信息")
     print("=" * 80)
 
@@ -469,13 +605,13 @@ def show_stats():
     knowledge_dir = Config.KNOWLEDGE_DIR
     vectors_dir = Config.VECTORS_DIR
 
-    cache_files = list(cache_dir.glob("*.html")) if cache_dir.exists() else []
+    cache_files = open_cache_store().keys() if cache_dir.exists() else []
     doc_files = list(knowledge_dir.glob("*")) if knowledge_dir.exists() else []
     vector_files = list(vectors_dir.glob("*")) if vectors_dir.exists() else []
 
     print(f"\n📁 数据目录:")
     print(f"  - 缓存目录: {cache_dir}")
-    print(f"    HTML文件: {len(cache_files)}")
+    print(f"    缓存网页: {len(cache_files)}（存储方式: {Config.CACHE_STORE}）")
 
     print(f"  - 文档目录: {knowledge_dir}")
     print(f"    Markdown: {len(list(knowledge_dir.glob('*.md')))}")
@@ -2,11 +2,12 @@
 Claude API 客户端
 使用 Anthropic SDK 调用 Claude API
 """
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
 from anthropic import Anthropic
 import time
 
 from ..config import Config
+from .http_pool import get_http_client
 
 
 class ClaudeClient:
@@ -23,7 +24,7 @@ class ClaudeClient:
         if not self.api_key:
             raise ValueError("Claude API key is required")
 
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = Anthropic(api_key=self.api_key, http_client=get_http_client())
         self.model = Config.CLAUDE_MODEL
         self.max_tokens = Config.MAX_TOKENS
         self.rate_limit = Config.RATE_LIMIT_PER_SECOND
@@ -118,13 +119,13 @@ class ClaudeClient:
             print(f"❌ Claude API 调用失败: {e}")
             raise
 
-    def stream_complete(
+    def complete_stream(
         self,
         prompt: str,
         system: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None
-    ):
+    ) -> Iterator[str]:
         """
         流式生成回复
 
@@ -158,6 +159,16 @@ class ClaudeClient:
             print(f"❌ Claude API 调用失败: {e}")
             raise
 
+    def stream_complete(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """流式生成回复（旧名称，等同于 complete_stream）"""
+        return self.complete_stream(prompt, system, temperature, max_tokens)
+
 
 def main():
     """测试函数"""
@@ -233,7 +244,7 @@ def main():
     print(f"\n回答: ", end="", flush=True)
 
     try:
-        for chunk in client.stream_complete(
+        for chunk in client.complete_stream(
             prompt=prompt,
             system="你是一位专业的劳动法律师。",
             temperature=0.5
@@ -0,0 +1,341 @@
+"""
+经济补偿金计算器
+按《劳动合同法》第四十七条、第四十条、第八十七条在本地计算 N / N+1 / 2N，
+计算类问题无需经过检索和LLM即可得到可复现的结果
+"""
+from typing import Optional, Dict
+
+from ..models import CompensationResult
+from ..config import Config
+
+
+class CompensationCalculator:
+    """经济补偿金计算器"""
+
+    SCHEME_N = "N"
+    SCHEME_N_PLUS_1 = "N+1"
+    SCHEME_2N = "2N"
+    SCHEME_NONE = "无"
+
+    # 离职情形关键词（按顺序匹配，先匹配到的优先；用人单位过错优先于劳动者过错）
+    SCHEME_KEYWORDS = [
+        (SCHEME_2N, ["违法解除", "违法辞退", "非法辞退", "恶意辞退", "无故辞退", "违法裁员", "2n"]),
+        (SCHEME_N_PLUS_1, ["未提前", "没有提前", "没提前", "代通知金", "当天通知", "n+1"]),
+        (SCHEME_N, ["被迫", "协商", "裁员", "合同到期", "不续签", "倒闭", "提前30天", "提前一个月"]),
+        (SCHEME_NONE, ["严重违纪", "严重违反", "主动辞职", "自己辞职", "个人原因辞职", "不符合录用条件"]),
+    ]
+
+    # 劳动者对解除理由有异议（"公司说我严重违纪，我不服"）
+    DISPUTE_KEYWORDS = ["不服", "说我", "称我", "认为我", "冤枉", "不认可", "不承认", "争议"]
+
+    SCHEME_DESCRIPTIONS = {
+        SCHEME_N: "协商解除、经济性裁员、合同到期不续签、被迫解除等",
+        SCHEME_N_PLUS_1: "第四十条情形解除且未提前30日书面通知",
+        SCHEME_2N: "用人单位违法解除或终止劳动合同",
+        SCHEME_NONE: "劳动者严重违纪被解除或主动辞职",
+    }
+
+    LEGAL_BASIS = {
+        "47": (
+            "《劳动合同法》第四十七条：经济补偿按劳动者在本单位工作的年限，每满一年支付一个月工资的标准"
+            "向劳动者支付。六个月以上不满一年的，按一年计算；不满六个月的，向劳动者支付半个月工资的经济补偿。"
+            "劳动者月工资高于用人单位所在直辖市、设区的市级人民政府公布的本地区上年度职工月平均工资三倍的，"
+            "向其支付经济补偿的标准按职工月平均工资三倍的数额支付，向其支付经济补偿的年限最高不超过十二年。"
+        ),
+        "40": (
+            "《劳动合同法》第四十条：有下列情形之一的，用人单位提前三十日以书面形式通知劳动者本人"
+            "或者额外支付劳动者一个月工资后，可以解除劳动合同。"
+        ),
+        "87": (
+            "《劳动合同法》第八十七条：用人单位违反本法规定解除或者终止劳动合同的，"
+            "应当依照本法第四十七条规定的经济补偿标准的二倍向劳动者支付赔偿金。"
+        ),
+        "39": "《劳动合同法》第三十九条：劳动者严重违反用人单位的规章制度等情形，用人单位可以解除劳动合同且无需支付经济补偿。",
+    }
+
+    def __init__(self, average_monthly_wage: Optional[float] = None):
+        """
+        初始化计算器
+
+        Args:
+            average_monthly_wage: 当地上年度职工月平均工资（如果为None则从Config读取，仍为None时不封顶）
+        """
+        self.average_monthly_wage = average_monthly_wage or Config.LOCAL_AVERAGE_MONTHLY_WAGE
+
+    @staticmethod
+    def compensation_months(work_years: float) -> float:
+        """
+        按第四十七条计算经济补偿月数（N）
+
+        每满一年计一个月；六个月以上不满一年的按一年计算；不满六个月的计半个月。
+
+        Args:
+            work_years: 工作年限
+
+        Returns:
+            补偿月数
+        """
+        full_years = int(work_years)
+        remaining_months = round((work_years - full_years) * 12, 6)
+
+        if remaining_months >= 6:
+            return float(full_years + 1)
+        if remaining_months > 0:
+            return full_years + 0.5
+        return float(full_years)
+
+    def detect_scheme(self, text: Optional[str]) -> Optional[str]:
+        """
+        根据离职情形描述判断补偿标准
+
+        Args:
+            text: 离职原因或问题文本
+
+        Returns:
+            补偿标准，无法判断时返回None
+        """
+        if not text:
+            return None
+
+        text_lower = text.lower()
+        for scheme, keywords in self.SCHEME_KEYWORDS:
+            if any(kw in text_lower for kw in keywords):
+                return scheme
+        return None
+
+    def is_disputed(self, text: Optional[str]) -> bool:
+        """
+        离职情形是否存在争议
+
+        提到劳动者过错（严重违纪、主动辞职等）的同时，又提到用人单位过错、被迫解除或对理由有异议时，
+        是否需要支付补偿取决于事实认定，不能直接按"无补偿"计算。
+
+        Args:
+            text: 离职原因或问题文本
+
+        Returns:
+            是否存在争议
+        """
+        if not text:
+            return False
+
+        text_lower = text.lower()
+        matched = {
+            scheme for scheme, keywords in self.SCHEME_KEYWORDS
+            if any(kw in text_lower for kw in keywords)
+        }
+        if self.SCHEME_NONE not in matched:
+            return "争议" in text_lower
+        return len(matched) > 1 or any(kw in text_lower for kw in self.DISPUTE_KEYWORDS)
+
+    def calculate(
+        self,
+        work_years: float,
+        monthly_salary: float,
+        scheme: str = SCHEME_N
+    ) -> CompensationResult:
+        """
+        计算补偿金
+
+        Args:
+            work_years: 工作年限
+            monthly_salary: 月平均工资（解除前12个月）
+            scheme: 补偿标准（N / N+1 / 2N / 无）
+
+        Returns:
+            计算结果
+        """
+        if work_years < 0 or monthly_salary < 0:
+            raise ValueError("工作年限和月工资不能为负数")
+
+        months = self.compensation_months(work_years)
+        wage_base = float(monthly_salary)
+        capped = False
+
+        steps = [
+            f"工作年限 {_fmt(work_years)} 年 → 经济补偿月数 N = {_fmt(months)}"
+            f"（每满一年计1个月，六个月以上不满一年按一年，不满六个月计半个月）"
+        ]
+
+        # 3倍社平工资封顶，且封顶时年限最多12年
+        if self.average_monthly_wage and monthly_salary > 3 * self.average_monthly_wage:
+            capped = True
+            wage_base = 3 * self.average_monthly_wage
+            steps.append(
+                f"月工资 {_fmt(monthly_salary)} 元高于当地社平工资 {_fmt(self.average_monthly_wage)} 元的3倍，"
+                f"计算基数封顶为 {_fmt(wage_base)} 元"
+            )
+            if months > 12:
+                months = 12.0
+                steps.append("适用封顶时补偿年限最高不超过12年，N 按 12 计算")
+        else:
+            steps.append(f"计算基数 = 月平均工资 {_fmt(wage_base)} 元")
+            if not self.average_monthly_wage:
+                steps.append(
+                    "未配置当地社平工资，未检查3倍封顶（月工资高于当地上年度职工月平均工资3倍的，"
+                    "基数按3倍计算，年限最多12年）"
+                )
+
+        base_amount = months * wage_base
+        # 代通知金按上一个月工资标准，不适用封顶
+        notice_pay = float(monthly_salary)
+
+        alternatives = {
+            self.SCHEME_N: round(base_amount, 2),
+            self.SCHEME_N_PLUS_1: round(base_amount + notice_pay, 2),
+            self.SCHEME_2N: round(2 * base_amount, 2),
+        }
+
+        legal_basis = [self.LEGAL_BASIS["47"]]
+
+        if scheme == self.SCHEME_NONE:
+            amount = 0.0
+            steps.append("严重违纪被解除或主动辞职的，用人单位无需支付经济补偿")
+            legal_basis = [self.LEGAL_BASIS["39"]]
+        elif scheme == self.SCHEME_2N:
+            amount = alternatives[self.SCHEME_2N]
+            steps.append(f"违法解除赔偿金 2N = 2 × {_fmt(months)} × {_fmt(wage_base)} = {_fmt(amount)} 元")
+            legal_basis.append(self.LEGAL_BASIS["87"])
+        elif scheme == self.SCHEME_N_PLUS_1:
+            amount = alternatives[self.SCHEME_N_PLUS_1]
+            steps.append(
+                f"N+1 = {_fmt(months)} × {_fmt(wage_base)} + 代通知金 {_fmt(notice_pay)} = {_fmt(amount)} 元"
+            )
+            legal_basis.append(self.LEGAL_BASIS["40"])
+        else:
+            scheme = self.SCHEME_N
+            amount = alternatives[self.SCHEME_N]
+            steps.append(f"经济补偿 N = {_fmt(months)} × {_fmt(wage_base)} = {_fmt(amount)} 元")
+
+        return CompensationResult(
+            scheme=scheme,
+            work_years=work_years,
+            compensation_months=months,
+            monthly_salary=monthly_salary,
+            wage_base=wage_base,
+            capped=capped,
+            amount=amount,
+            steps=steps,
+            legal_basis=legal_basis,
+            alternatives=alternatives
+        )
+
+    def from_situation(
+        self,
+        situation: Dict,
+        question: Optional[str] = None
+    ) -> Optional[CompensationResult]:
+        """
+        根据 ConversationManager.extract_user_situation 的结果计算
+
+        Args:
+            situation: 用户情况字典（work_years, monthly_salary, termination_reason...）
+            question: 当前问题（用于判断离职情形）
+
+        Returns:
+            计算结果，缺少工作年限或月工资、或离职情形存在争议时返回None
+        """
+        work_years = situation.get("work_years")
+        monthly_salary = situation.get("monthly_salary")
+        if work_years is None or not monthly_salary:
+            return None
+
+        # 有争议的情形交给检索和LLM分析，避免直接答复"无补偿"
+        if self.is_disputed(question) or self.is_disputed(situation.get("termination_reason")):
+            return None
+
+        scheme = (
+            self.detect_scheme(question)
+            or self.detect_scheme(situation.get("termination_reason"))
+        )
+        # 对话中提到过单位没有提前通知
+        if scheme is None and situation.get("notice_period") == 0:
+            scheme = self.SCHEME_N_PLUS_1
+
+        result = self.calculate(float(work_years), float(monthly_salary), scheme or self.SCHEME_N)
+
+        # 未能判断情形时不确定适用哪种标准，标记出来由回答列出各情形金额
+        if scheme is None:
+            result.scheme = ""
+        return result
+
+    def format_answer(self, result: CompensationResult) -> str:
+        """
+        将计算结果格式化为回答文本
+
+        Args:
+            result: 计算结果
+
+        Returns:
+            Markdown格式的回答
+        """
+        lines = []
+
+        if result.scheme:
+            lines.append(f"## 计算结果：{result.scheme} = {_fmt(result.amount)} 元")
+            lines.append(f"\n适用情形：{self.SCHEME_DESCRIPTIONS[result.scheme]}")
+        else:
+            lines.append(f"## 计算结果：经济补偿 N = {_fmt(result.amount)} 元")
+            lines.append("\n您没有说明离职的具体情形，下面按不同情形分别列出金额。")
+
+        lines.append("\n**基本信息**")
+        lines.append(f"- 工作年限：{_fmt(result.work_years)} 年")
+        lines.append(f"- 月平均工资：{_fmt(result.monthly_salary)} 元")
+
+        lines.append("\n**计算步骤**")
+        for i, step in enumerate(result.steps, 1):
+            lines.append(f"{i}. {step}")
+
+        if result.scheme != self.SCHEME_NONE:
+            lines.append("\n**不同情形下的金额**")
+            for scheme, amount in result.alternatives.items():
+                lines.append(f"- {scheme}（{self.SCHEME_DESCRIPTIONS[scheme]}）：{_fmt(amount)} 元")
+
+        lines.append("\n**法律依据**")
+        basis = list(result.legal_basis)
+        if not result.scheme:
+            basis += [self.LEGAL_BASIS["40"], self.LEGAL_BASIS["87"]]
+        for item in basis:
+            lines.append(f"- {item}")
+
+        lines.append("\n**注意事项**")
+        lines.append("- 月工资按解除前12个月的平均应发工资计算，包括奖金、津贴和补贴")
+        lines.append("- 2N 赔偿金与 N 经济补偿不能同时主张")
+
+        lines.append("\n**免责声明：本回答仅供参考，具体情况请咨询专业律师。**")
+
+        return "\n".join(lines)
+
+
+def _fmt(value: float) -> str:
+    """格式化金额/数字：去掉多余的小数位"""
+    text = f"{value:,.2f}".rstrip("0").rstrip(".")
+    return text
+
+
+def main():
+    """测试补偿金计算器"""
+    print("🧪 测试补偿金计算器")
+    print("=" * 70)
+
+    calculator = CompensationCalculator(average_monthly_wage=12000)
+
+    cases = [
+        (3, 8000, "N"),
+        (3.4, 8000, "N+1"),
+        (0.3, 8000, "N"),
+        (15, 50000, "2N"),
+    ]
+
+    for work_years, salary, scheme in cases:
+        result = calculator.calculate(work_years, salary, scheme)
+        print(f"\n工作 {work_years} 年，月薪 {salary}，{scheme}: {_fmt(result.amount)} 元")
+        for step in result.steps:
+            print(f"  - {step}")
+
+    print("\n" + "=" * 70)
+    print("✅ 测试完成")
+
+
+if __name__ == "__main__":
+    main()
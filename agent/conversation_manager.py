@@ -2,34 +2,60 @@
 对话管理器
 管理多轮对话的上下文和历史
 """
-from typing import List, Optional
+from typing import List, Optional, Dict
 from datetime import datetime
 
-from ..models import ConversationContext, ConversationTurn, Answer
+from ..models import ConversationContext, ConversationTurn, Answer, SituationFact
+from .history_compressor import HistoryCompressor
+from .situation_extractor import SituationExtractor
 
 
 class ConversationManager:
     """对话管理器"""
 
-    def __init__(self, max_history: int = 10):
+    def __init__(
+        self,
+        max_history: int = 10,
+        compact: bool = False,
+        compressor: Optional[HistoryCompressor] = None
+    ):
         """
         初始化对话管理器
 
         Args:
             max_history: 最大保留的对话轮数
+            compact: 紧凑模式，历史中只保留文档ID，不保留完整的文档内容
+                （服务端同时保存大量会话时使用）
+            compressor: 历史压缩器（为None则使用抽取式摘要）
         """
         self.context = ConversationContext()
         self.max_history = max_history
+        self.compact = compact
+        self.compressor = compressor or HistoryCompressor()
+        self.extractor = SituationExtractor()
 
-    def add_turn(self, question: str, answer: Answer):
+    def add_turn(self, question: str, answer: Answer, doc_scores: Optional[List[float]] = None):
         """
         添加一轮对话
 
         Args:
             question: 用户问题
             answer: AI回答
+            doc_scores: 回答所用文档的检索相关度（与 answer.relevant_docs 一一对应）
         """
-        self.context.add_turn(question, answer)
+        # 上一轮不再是最新一轮，折叠进滚动摘要
+        if self.context.turns:
+            self.context.summary = self.compressor.fold(self.context.summary, self.context.turns[-1])
+
+        self.context.add_turn(question, answer, doc_scores)
+
+        # 增量更新用户情况（后面的说法覆盖前面的，便于用户更正）
+        self.context.facts.update(self.extractor.extract(question, turn=self.context.turn_count))
+
+        if self.compact:
+            # 文档ID已记录在 turn.doc_ids 中，需要时可通过检索器按ID取回
+            turn = self.context.turns[-1]
+            turn.answer = answer.model_copy(update={"relevant_docs": []})
 
         # 限制历史长度
         if len(self.context.turns) > self.max_history:
@@ -59,6 +85,15 @@ class ConversationManager:
             for turn in self.context.turns
         ]
 
+    def get_compressed_history(self) -> tuple[str, List[tuple[str, str]]]:
+        """
+        获取压缩后的对话历史（较早对话的摘要 + 最新一轮原文，不超过token预算）
+
+        Returns:
+            (summary, [(question, answer_text)])
+        """
+        return self.compressor.compress(self.context.summary, self.context.turns)
+
     def get_messages_for_claude(self, include_last: int = 5) -> List[dict]:
         """
         获取适合Claude API的消息格式
@@ -93,6 +128,40 @@ class ConversationManager:
         """
         return len(self.context.turns) > 0
 
+    def get_last_question(self) -> Optional[str]:
+        """
+        获取上一个问题
+
+        Returns:
+            问题文本
+        """
+        if not self.context.turns:
+            return None
+        return self.context.turns[-1].question
+
+    def get_last_doc_ids(self) -> List[str]:
+        """
+        获取上一轮回答使用的文档ID
+
+        Returns:
+            文档ID列表
+        """
+        if not self.context.turns:
+            return []
+        return list(self.context.turns[-1].doc_ids)
+
+    def get_last_doc_scores(self) -> Dict[str, float]:
+        """
+        获取上一轮回答所用文档的检索相关度
+
+        Returns:
+            {文档ID: 相关度}（未记录时为空字典）
+        """
+        if not self.context.turns:
+            return {}
+        turn = self.context.turns[-1]
+        return dict(zip(turn.doc_ids, turn.doc_scores))
+
     def get_last_question_type(self) -> Optional[str]:
         """
         获取上一个问题的类型
@@ -131,40 +200,62 @@ class ConversationManager:
         """
         return self.context.user_info.get(key, default)
 
-    def extract_user_situation(self) -> dict:
+    def get_fact(self, field: str) -> Optional[SituationFact]:
         """
-        从对话中提取用户情况
+        获取从对话中抽取的某项用户情况（含出处）
+
+        Args:
+            field: 字段名（work_years, monthly_salary, termination_reason, notice_period, city）
 
         Returns:
-            用户情况字典
+            抽取结果，未提到时返回None
+        """
+        return self.context.facts.get(field)
+
+    def extract_user_situation(self, question: Optional[str] = None) -> dict:
         """
-        situation = {
-            "work_years": self.get_user_info("work_years"),
-            "monthly_salary": self.get_user_info("monthly_salary"),
-            "termination_reason": self.get_user_info("termination_reason"),
-            "notice_period": self.get_user_info("notice_period"),
-        }
-
-        # 从对话历史中提取信息
-        for turn in self.context.turns:
-            question = turn.question.lower()
-
-            # 尝试提取工作年限
-            if "年" in question and not situation["work_years"]:
-                import re
-                match = re.search(r'(\d+\.?\d*)\s*年', question)
-                if match:
-                    situation["work_years"] = float(match.group(1))
-
-            # 尝试提取工资
-            if "工资" in question or "薪资" in question:
-                import re
-                match = re.search(r'(\d+)', question)
-                if match and not situation["monthly_salary"]:
-                    situation["monthly_salary"] = int(match.group(1))
+        获取用户情况
+
+        优先级：set_user_info 设置的值 > 当前问题 > 对话历史中最近一次提到的值。
+
+        Args:
+            question: 当前问题（尚未加入对话历史，也参与提取）
 
+        Returns:
+            用户情况字典
+        """
+        facts = dict(self.context.facts)
+        if question:
+            facts.update(self.extractor.extract(question))
+
+        situation = {}
+        for field in SituationExtractor.FIELDS:
+            value = self.get_user_info(field)
+            if value is None and field in facts:
+                value = facts[field].value
+            situation[field] = value
         return situation
 
+    def describe_situation(self, question: Optional[str] = None) -> str:
+        """
+        用户情况的文字描述（用于提示词）
+
+        Args:
+            question: 当前问题（也参与提取）
+
+        Returns:
+            每项一行的描述，没有任何信息时为空字符串
+        """
+        lines = []
+        for field, value in self.extract_user_situation(question).items():
+            if value is None or value == "":
+                continue
+            label, unit = SituationExtractor.LABELS[field]
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            lines.append(f"- {label}：{value}{(' ' + unit) if unit else ''}")
+        return "\n".join(lines)
+
     def get_summary(self) -> str:
         """
         获取对话摘要
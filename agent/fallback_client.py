@@ -0,0 +1,440 @@
+"""
+LLM 降级链客户端
+按优先级依次尝试多个LLM提供方，支持单次调用超时、对冲请求和按提供方熔断
+"""
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional, List, Dict, Iterator, Callable
+
+from ..config import Config
+from .llm_factory import LLMClientBase, get_last_usage, set_last_usage
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后进入熔断状态（open），冷却时间内直接跳过该提供方；
+    冷却结束后放行一个试探请求（half-open），成功则恢复，失败则重新熔断。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 熔断冷却时间（秒）
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """当前是否允许请求该提供方"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                # 冷却结束，只放行一个试探请求
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """记录一次成功"""
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        """记录一次失败"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """试探请求未发出（已取消），让出试探名额，下次检查时重新放行"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class ProviderHealth:
+    """单个提供方的健康状态：熔断器 + 最近调用延迟"""
+
+    # 计算p95所需的最少样本数
+    MIN_SAMPLES = 10
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.LLM_BREAKER_FAILURES,
+            cooldown=Config.LLM_BREAKER_COOLDOWN
+        )
+        self.latencies = deque(maxlen=100)
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds: float):
+        """记录一次成功调用的耗时"""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """最近调用延迟的p95（样本不足时返回None）"""
+        with self._lock:
+            if len(self.latencies) < self.MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class _Attempt:
+    """
+    对一个提供方的一次调用
+
+    调用结果只向熔断器报告一次：被采用的、失败的、超时的和被放弃的对冲请求都会报告，
+    被放弃的请求在完成时由回调报告（否则半开状态的试探请求结果丢失，熔断器无法恢复）。
+    """
+
+    def __init__(self, name: str, health: ProviderHealth, probe: bool):
+        self.name = name
+        self.health = health
+        self.probe = probe  # 是否为半开状态下的试探请求
+        self.started = time.monotonic()
+        self._reported = False
+        self._lock = threading.Lock()
+
+    def report(self, error: Optional[BaseException] = None) -> bool:
+        """
+        报告调用结果（成功时同时记录延迟）
+
+        Returns:
+            是否为首次报告
+        """
+        with self._lock:
+            if self._reported:
+                return False
+            self._reported = True
+
+        if error is None:
+            self.health.breaker.record_success()
+            self.health.record_latency(time.monotonic() - self.started)
+        else:
+            self.health.breaker.record_failure()
+        return True
+
+    def on_done(self, future):
+        """调用完成（或被取消）时的回调"""
+        if future.cancelled():
+            # 还没开始执行就被取消，没有结果可报告，只让出试探名额
+            with self._lock:
+                if self._reported:
+                    return
+                self._reported = True
+            if self.probe:
+                self.health.breaker.release_probe()
+            return
+        self.report(future.exception())
+
+
+# 同一进程内共享各提供方的健康状态（服务端客户端池中的多个实例共用熔断器）
+_health: Dict[str, ProviderHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_provider_health(name: str) -> ProviderHealth:
+    """获取（或创建）提供方的健康状态"""
+    with _health_lock:
+        if name not in _health:
+            _health[name] = ProviderHealth(name)
+        return _health[name]
+
+
+class FallbackLLMClient(LLMClientBase):
+    """LLM 降级链客户端"""
+
+    def __init__(
+        self,
+        clients: List[tuple[str, LLMClientBase]],
+        attempt_timeout: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        hedge_delay: Optional[float] = None
+    ):
+        """
+        初始化降级链客户端
+
+        Args:
+            clients: 按优先级排列的 (提供方名称, 客户端) 列表
+            attempt_timeout: 单次调用超时（秒），为None则读取Config
+            hedge: 是否启用对冲请求，为None则读取Config
+            hedge_delay: 延迟样本不足时的对冲等待时间（秒），为None则读取Config
+        """
+        if not clients:
+            raise ValueError("降级链至少需要一个LLM客户端")
+
+        self.clients = clients
+        self.attempt_timeout = attempt_timeout or Config.LLM_ATTEMPT_TIMEOUT
+        self.hedge = Config.LLM_HEDGE if hedge is None else hedge
+        self.hedge_delay = hedge_delay or Config.LLM_HEDGE_DELAY
+
+        # 超时的调用无法中断，只能放弃等待，因此线程数留出余量
+        self._executor = ThreadPoolExecutor(
+            max_workers=4 * len(clients),
+            thread_name_prefix="llm-fallback"
+        )
+
+    @property
+    def provider_names(self) -> List[str]:
+        """降级链中的提供方名称"""
+        return [name for name, _ in self.clients]
+
+    @property
+    def caches_system_prompt(self) -> bool:
+        """按首选提供方决定（只在降级时才会把较长的系统提示发给其他提供方）"""
+        return getattr(self.clients[0][1], "caches_system_prompt", False)
+
+    def complete(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """生成单次回复"""
+        return self._call(lambda client: client.complete(
+            prompt=prompt,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ))
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """多轮对话"""
+        return self._call(lambda client: client.chat(
+            messages=messages,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ))
+
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        流式生成回复
+
+        在首个片段到达前失败或超时则切换到下一个提供方；已输出内容后不再切换，
+        避免拼接出两个模型的回答。流式模式不使用对冲请求。
+        每个片段都受单次调用超时限制，中途卡住或出错时报告给熔断器并抛出异常。
+        """
+        last_error = None
+
+        for name, client, health in self._available():
+            attempt = _Attempt(name, health, probe=health.breaker.state == CircuitBreaker.HALF_OPEN)
+            stream = iter(client.complete_stream(
+                prompt=prompt,
+                system=system,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
+
+            try:
+                first = self._next_chunk(stream)
+            except Exception as e:
+                attempt.report(e)
+                last_error = _describe_error(name, e, self.attempt_timeout)
+                print(f"⚠️  {last_error}，切换到下一个LLM")
+                continue
+
+            yield from self._follow_stream(stream, first, attempt)
+            return
+
+        raise RuntimeError(last_error or "所有LLM提供方均处于熔断状态")
+
+    def _next_chunk(self, stream: Iterator[str]):
+        """
+        在工作线程中读取下一个片段
+
+        超过单次调用超时视为失败；被放弃的流在当前片段返回后关闭（生成器执行中无法关闭）。
+
+        Returns:
+            片段，流结束时返回 _END
+        """
+        # 在工作线程中保留调用方的上下文（如请求优先级）
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, next, stream, _END)
+        try:
+            return future.result(timeout=self.attempt_timeout)
+        except (TimeoutError, FutureTimeoutError):
+            future.add_done_callback(lambda _: _close_stream(stream))
+            raise TimeoutError() from None
+
+    def _follow_stream(self, stream: Iterator[str], chunk, attempt: _Attempt) -> Iterator[str]:
+        """输出已开始的流，结束、中途失败或调用方停止读取时报告给熔断器"""
+        try:
+            while chunk is not _END:
+                yield chunk
+                chunk = self._next_chunk(stream)
+        except GeneratorExit:
+            # 调用方提前停止读取（如客户端断开），此前的输出正常
+            _close_stream(stream)
+            attempt.report()
+            raise
+        except Exception as e:
+            attempt.report(e)
+            _close_stream(stream)
+            raise RuntimeError(
+                f"{_describe_error(attempt.name, e, self.attempt_timeout)}（已输出部分内容）"
+            ) from e
+        attempt.report()
+
+    def _available(self) -> Iterator[tuple[str, LLMClientBase, ProviderHealth]]:
+        """按优先级逐个产出未熔断的提供方（惰性检查，避免占用未使用提供方的试探名额）"""
+        for name, client in self.clients:
+            health = get_provider_health(name)
+            if health.breaker.allow():
+                yield name, client, health
+
+    def _submit(self, fn: Callable[[LLMClientBase], str], name: str, client: LLMClientBase,
+                health: ProviderHealth) -> tuple:
+        """提交一次调用，完成时无论结果是否被采用都报告给熔断器"""
+        attempt = _Attempt(name, health, probe=health.breaker.state == CircuitBreaker.HALF_OPEN)
+        # 在工作线程中保留调用方的上下文（如请求优先级）
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, _with_usage, fn, client)
+        future.add_done_callback(attempt.on_done)
+        return future, attempt
+
+    def _call(self, fn: Callable[[LLMClientBase], str]) -> str:
+        """
+        按降级链执行一次调用
+
+        依次启动提供方：当前尝试失败或超时立即启动下一个；启用对冲时，
+        当前尝试超过该提供方的p95延迟仍未返回也启动下一个，取最先成功的结果。
+
+        Args:
+            fn: 接收客户端并执行调用的函数
+
+        Returns:
+            最先成功的回复
+
+        Raises:
+            RuntimeError: 所有提供方都失败、超时或处于熔断状态
+        """
+        candidates = self._available()
+        in_flight: Dict[object, _Attempt] = {}  # future -> 调用
+        last_error = None
+        hedge_at = None
+
+        def launch() -> bool:
+            nonlocal hedge_at
+            candidate = next(candidates, None)
+            if candidate is None:
+                return False
+            name, client, health = candidate
+            future, attempt = self._submit(fn, name, client, health)
+            in_flight[future] = attempt
+            hedge_at = attempt.started + (health.p95() or self.hedge_delay) if self.hedge else None
+            return True
+
+        if not launch():
+            raise RuntimeError("所有LLM提供方均处于熔断状态")
+
+        while in_flight:
+            now = time.monotonic()
+            deadlines = [attempt.started + self.attempt_timeout for attempt in in_flight.values()]
+            if hedge_at is not None:
+                deadlines.append(hedge_at)
+
+            done, _ = wait(
+                list(in_flight),
+                timeout=max(0.0, min(deadlines) - now),
+                return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                attempt = in_flight.pop(future)
+                try:
+                    result, usage = future.result()
+                except Exception as e:
+                    attempt.report(e)
+                    last_error = _describe_error(attempt.name, e)
+                    print(f"⚠️  {last_error}")
+                    continue
+
+                attempt.report()
+                # token用量记录在工作线程中，带回调用线程
+                set_last_usage(usage)
+                # 放弃其余仍在进行的对冲请求：未开始的取消，已开始的在完成时由回调报告结果
+                for other in in_flight:
+                    other.cancel()
+                return result
+
+            # 超过单次调用期限的尝试视为失败，不再等待
+            now = time.monotonic()
+            for future, attempt in list(in_flight.items()):
+                if now - attempt.started >= self.attempt_timeout:
+                    in_flight.pop(future)
+                    future.cancel()
+                    attempt.report(TimeoutError())
+                    last_error = _describe_error(attempt.name, TimeoutError(), self.attempt_timeout)
+                    print(f"⚠️  {last_error}")
+
+            # 没有在途请求，或到达对冲时间，则启动下一个提供方
+            if not in_flight or (hedge_at is not None and now >= hedge_at):
+                if not launch():
+                    hedge_at = None
+
+        raise RuntimeError(last_error or "所有LLM提供方均调用失败")
+
+
+# 流结束标记
+_END = object()
+
+
+def _close_stream(stream: Iterator[str]):
+    """关闭被放弃的流式生成器（释放连接）"""
+    close = getattr(stream, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception:
+        pass
+
+
+def _with_usage(fn: Callable[[LLMClientBase], str], client: LLMClientBase) -> tuple[str, dict]:
+    """在工作线程中执行调用，并一起返回该线程记录的token用量"""
+    result = fn(client)
+    return result, get_last_usage()
+
+
+def _describe_error(name: str, error: Exception, timeout: Optional[float] = None) -> str:
+    """生成提供方调用失败的说明"""
+    if isinstance(error, (TimeoutError, FutureTimeoutError)) and timeout is not None:
+        return f"{name} 调用超时（{timeout:g}秒）"
+    return f"{name} 调用失败: {error}"
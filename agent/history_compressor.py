@@ -0,0 +1,143 @@
+"""
+对话历史压缩
+较早的对话轮次逐轮折叠进滚动摘要，只保留最新一轮原文，
+追问提示中的历史部分始终不超过固定的token预算
+"""
+import re
+from typing import Optional, List
+
+from ..config import Config
+from ..models import ConversationTurn
+from .llm_factory import LLMClientBase
+from .prompt_templates import PromptTemplates
+from .rate_limiter import estimate_tokens
+
+
+# 句子切分：句末标点或换行
+_SENTENCE_SPLIT = re.compile(r'(?<=[。！？；!?;])|\n+')
+
+# 含有这些内容的句子优先保留（法条、金额、期限等结论性信息）
+_KEY_SENTENCE = re.compile(r'第[一二三四五六七八九十百零\d]+条|\d|[万元月年天]|应当|可以|不得|有权')
+
+# Markdown 标记（提取前去掉，节省预算）
+_MARKDOWN = re.compile(r'[#*>`|]+|-{3,}')
+
+
+class HistoryCompressor:
+    """滚动摘要压缩器（抽取式，或由LLM生成摘要）"""
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        llm_client: Optional[LLMClientBase] = None
+    ):
+        """
+        初始化压缩器
+
+        Args:
+            token_budget: 追问提示中对话历史的token预算（为None则读取Config）
+            llm_client: 用于生成摘要的LLM客户端（为None则使用抽取式摘要）
+        """
+        self.token_budget = token_budget or Config.HISTORY_TOKEN_BUDGET
+        self.llm_client = llm_client
+
+    @property
+    def summary_budget(self) -> int:
+        """滚动摘要最多占用一半预算，其余留给最新一轮原文"""
+        return self.token_budget // 2
+
+    def fold(self, summary: str, turn: ConversationTurn) -> str:
+        """
+        把一轮对话折叠进滚动摘要
+
+        Args:
+            summary: 当前摘要
+            turn: 要折叠的对话轮次
+
+        Returns:
+            新的摘要（不超过摘要预算）
+        """
+        if self.llm_client is not None:
+            try:
+                return self._fold_with_llm(summary, turn)
+            except Exception as e:
+                print(f"⚠️  LLM摘要失败，改用抽取式摘要: {e}")
+
+        line = f"- 问：{turn.question}；答：{self._extract(turn.answer.answer_text)}"
+        lines = [l for l in summary.split("\n") if l] + [line]
+
+        # 超出预算时丢弃最早的要点
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        return _truncate("\n".join(lines), self.summary_budget)
+
+    def _fold_with_llm(self, summary: str, turn: ConversationTurn) -> str:
+        max_chars = int(self.summary_budget * 1.5)
+        prompt = PromptTemplates.build_history_fold_prompt(
+            summary, turn.question, turn.answer.answer_text, max_chars
+        )
+        result = self.llm_client.complete(
+            prompt=prompt,
+            temperature=0.0,
+            max_tokens=self.summary_budget
+        )
+        return _truncate(result.strip(), self.summary_budget)
+
+    def _extract(self, answer_text: str) -> str:
+        """
+        抽取回答要点：首句加上含法条、金额、期限的句子
+
+        Args:
+            answer_text: 回答原文
+
+        Returns:
+            要点文本（不超过摘要预算的四分之一）
+        """
+        limit = max(1, self.summary_budget // 4)
+        sentences = [
+            s.strip() for s in _SENTENCE_SPLIT.split(_MARKDOWN.sub("", answer_text))
+            if s and s.strip()
+        ]
+        if not sentences:
+            return ""
+
+        picked = [sentences[0]]
+        for sentence in sentences[1:]:
+            if not _KEY_SENTENCE.search(sentence):
+                continue
+            if estimate_tokens("".join(picked) + sentence) > limit:
+                break
+            picked.append(sentence)
+
+        return _truncate("".join(picked), limit)
+
+    def compress(
+        self,
+        summary: str,
+        turns: List[ConversationTurn]
+    ) -> tuple[str, List[tuple[str, str]]]:
+        """
+        生成追问提示使用的历史：滚动摘要 + 最新一轮原文
+
+        Args:
+            summary: 滚动摘要（已包含最新一轮之前的所有对话）
+            turns: 对话轮次
+
+        Returns:
+            (摘要, [(最新问题, 最新回答)])，合计不超过token预算
+        """
+        if not turns:
+            return summary, []
+
+        last = turns[-1]
+        remaining = self.token_budget - estimate_tokens(summary) - estimate_tokens(last.question)
+        answer = _truncate(last.answer.answer_text, max(0, remaining))
+        return summary, [(last.question, answer)]
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """按token预算截断文本（超出时以省略号结尾）"""
+    if estimate_tokens(text) <= token_budget:
+        return text
+    max_chars = max(0, int(token_budget * 1.5) - 1)
+    return text[:max_chars] + "…"
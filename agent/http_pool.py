@@ -0,0 +1,151 @@
+"""
+共享HTTP连接池
+所有LLM提供方共用一组有上限的 keep-alive 连接，避免每次请求重新进行TLS握手
+"""
+import asyncio
+import threading
+from typing import Optional, Dict
+
+import httpx
+
+from ..config import Config
+
+
+class ConnectionStats:
+    """
+    连接复用统计
+
+    通过 httpcore 的 trace 扩展记录新建连接数，与请求数对比得出复用率。
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def trace(self, event_name: str, info: dict):
+        """同步 trace 回调：TCP连接建立完成即为一次新建连接"""
+        if event_name == "connection.connect_tcp.complete":
+            self.record_connection()
+
+    async def atrace(self, event_name: str, info: dict):
+        """异步 trace 回调"""
+        self.trace(event_name, info)
+
+    def snapshot(self) -> dict:
+        """
+        获取统计快照
+
+        Returns:
+            {requests, new_connections, reused, reuse_rate}
+        """
+        with self._lock:
+            requests = self.requests
+            new_connections = self.new_connections
+
+        reused = max(0, requests - new_connections)
+        return {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused": reused,
+            "reuse_rate": round(reused / requests, 4) if requests else 0.0,
+        }
+
+
+_stats = ConnectionStats()
+_client: Optional[httpx.Client] = None
+_async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def _pool_options() -> dict:
+    """连接池参数（大小、空闲回收时间、超时）"""
+    return {
+        "limits": httpx.Limits(
+            max_connections=Config.HTTP_POOL_SIZE,
+            max_keepalive_connections=Config.HTTP_POOL_SIZE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(Config.HTTP_TIMEOUT, connect=10.0),
+    }
+
+
+def _on_request(request: httpx.Request):
+    """请求钩子：计数并挂上 trace 回调"""
+    _stats.record_request()
+    request.extensions["trace"] = _stats.trace
+
+
+async def _on_async_request(request: httpx.Request):
+    """异步请求钩子"""
+    _stats.record_request()
+    request.extensions["trace"] = _stats.atrace
+
+
+def get_http_client() -> httpx.Client:
+    """
+    获取进程内共享的同步HTTP客户端（线程安全，首次调用时创建）
+
+    Returns:
+        httpx.Client
+    """
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(
+                event_hooks={"request": [_on_request]},
+                **_pool_options()
+            )
+        return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    获取当前事件循环共享的异步HTTP客户端
+
+    AsyncClient 的连接绑定在创建它的事件循环上，因此每个事件循环各有一个实例。
+
+    Returns:
+        httpx.AsyncClient
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        # 清理已关闭事件循环的客户端
+        for stale in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale]
+
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                event_hooks={"request": [_on_async_request]},
+                **_pool_options()
+            )
+            _async_clients[loop] = client
+        return client
+
+
+def pool_stats() -> dict:
+    """
+    获取连接池复用统计
+
+    Returns:
+        {requests, new_connections, reused, reuse_rate}
+    """
+    return _stats.snapshot()
+
+
+def close_http_clients():
+    """关闭同步客户端（异步客户端随各自的事件循环关闭）"""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
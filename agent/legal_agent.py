@@ -2,25 +2,46 @@
 法律维权智能Agent
 核心问答逻辑，整合RAG和LLM API
 """
-from typing import Optional
+import copy
+from typing import Optional, Iterator, Union, List
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from ..models import Answer, QuestionType
+from ..models import Answer, QuestionType, Document, CompensationResult
 from ..config import Config
-from .llm_factory import create_llm_client, LLMClientBase
+from .llm_factory import create_llm_client, LLMClientBase, get_last_usage, reset_usage
 from .prompt_templates import PromptTemplates
 from .conversation_manager import ConversationManager
+from .compensation_calculator import CompensationCalculator
+from .question_classifier import QuestionClassifier, get_question_classifier
+from .history_compressor import HistoryCompressor
+from .rate_limiter import request_priority, PRIORITY_BATCH
 from ..knowledge import KnowledgeRetriever
 
 
 class LegalAgent:
     """法律维权智能Agent"""
 
+    # LLM调用失败时的兜底回答
+    FALLBACK_ANSWER = "抱歉，我遇到了一些技术问题，无法生成回答。请稍后再试。"
+
+    # 本地计算器给出结果时的置信度（计算过程确定可复现）
+    CALCULATION_CONFIDENCE = 0.95
+
+    # 指代性追问的标志词，以及可以直接复用上一轮文档的追问最大长度
+    FOLLOW_UP_MARKERS = [
+        "这个", "那个", "这种", "上面", "刚才", "前面", "你说的", "具体", "为什么",
+        "什么意思", "怎么理解", "详细", "举例", "举个例子", "还有吗", "然后呢"
+    ]
+    FOLLOW_UP_MAX_LENGTH = 20
+
     def __init__(
         self,
         llm_client: Optional[LLMClientBase] = None,
         retriever: Optional[KnowledgeRetriever] = None,
-        conversation_manager: Optional[ConversationManager] = None
+        conversation_manager: Optional[ConversationManager] = None,
+        classifier: Optional[QuestionClassifier] = None,
+        verbose: bool = True
     ):
         """
         初始化Agent
@@ -29,11 +50,50 @@ class LegalAgent:
             llm_client: LLM客户端（自动选择或手动指定）
             retriever: 知识检索器
             conversation_manager: 对话管理器
+            classifier: 问题分类器（为None则使用按Config创建的共享分类器）
+            verbose: 是否打印处理进度
         """
         self.llm = llm_client or create_llm_client()
         self.retriever = retriever or KnowledgeRetriever(auto_load=True)
-        self.conversation = conversation_manager or ConversationManager()
+        self._attach_conversation(conversation_manager or ConversationManager())
         self.templates = PromptTemplates()
+        self.calculator = CompensationCalculator()
+        self.classifier = classifier or get_question_classifier()
+        self.verbose = verbose
+
+    def _attach_conversation(self, conversation_manager: ConversationManager):
+        """设置对话管理器（LLM摘要模式下为其配置使用当前LLM客户端的压缩器）"""
+        self.conversation = conversation_manager
+        if Config.HISTORY_SUMMARY_MODE == "llm" and self.conversation.compressor.llm_client is None:
+            self.conversation.compressor = HistoryCompressor(llm_client=self.llm)
+
+    def with_session(
+        self,
+        llm_client: LLMClientBase,
+        conversation_manager: ConversationManager
+    ) -> "LegalAgent":
+        """
+        创建共享本Agent组件的会话Agent
+
+        检索器、分类器、计算器和Prompt模板都是只读的，直接共用；
+        只替换LLM客户端和对话管理器（服务模式下每个请求调用，不重新加载任何组件）。
+
+        Args:
+            llm_client: 本次请求使用的LLM客户端
+            conversation_manager: 会话的对话管理器
+
+        Returns:
+            新的Agent
+        """
+        agent = copy.copy(self)
+        agent.llm = llm_client
+        agent._attach_conversation(conversation_manager)
+        return agent
+
+    def _log(self, *args, **kwargs):
+        """打印进度信息（verbose=False 时静默）"""
+        if self.verbose:
+            print(*args, **kwargs)
 
     def ask(
         self,
@@ -52,72 +112,436 @@ class LegalAgent:
         Returns:
             答案对象
         """
+        question_type, relevant_docs, scores, prompt, calculation = self._prepare(
+            question, use_context, top_k
+        )
+
+        if prompt is None:
+            # 本地计算器直接给出答案
+            answer_text = self.calculator.format_answer(calculation)
+        else:
+            # 4. 调用LLM生成答案
+            self._log("🤖 生成回答...", end=" ")
+            reset_usage()
+            try:
+                answer_text = self.llm.complete(
+                    prompt=prompt,
+                    system=self._system_prompt(question_type),
+                    temperature=0.7
+                )
+                self._log("✅")
+            except Exception as e:
+                self._log(f"❌ 失败: {e}")
+                answer_text = self.FALLBACK_ANSWER
+
+        answer = self._build_answer(
+            question, answer_text, question_type, relevant_docs, scores, calculation,
+            metadata=self._usage_metadata()
+        )
+
+        # 保存到对话历史
+        self.conversation.add_turn(question, answer, doc_scores=scores)
+
+        return answer
+
+    def ask_stream(
+        self,
+        question: str,
+        use_context: bool = True,
+        top_k: int = None
+    ) -> Iterator[Union[str, Answer]]:
+        """
+        流式问答：先逐段产出回答文本，最后产出完整的答案对象
+
+        Args:
+            question: 用户问题
+            use_context: 是否使用对话上下文
+            top_k: 检索文档数量
+
+        Yields:
+            文本片段（str），最后一项为答案对象（Answer）
+        """
+        question_type, relevant_docs, scores, prompt, calculation = self._prepare(
+            question, use_context, top_k
+        )
+
+        chunks = []
+        if prompt is None:
+            # 本地计算器直接给出答案
+            chunks.append(self.calculator.format_answer(calculation))
+            yield chunks[0]
+        else:
+            self._log("🤖 生成回答...")
+            reset_usage()
+            try:
+                for chunk in self.llm.complete_stream(
+                    prompt=prompt,
+                    system=self._system_prompt(question_type),
+                    temperature=0.7
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                self._log(f"\n❌ 失败: {e}")
+                # 已输出部分内容时保留已有文本，否则给出兜底回答
+                if not chunks:
+                    chunks.append(self.FALLBACK_ANSWER)
+                    yield self.FALLBACK_ANSWER
+
+        answer = self._build_answer(
+            question, "".join(chunks), question_type, relevant_docs, scores, calculation,
+            metadata=self._usage_metadata()
+        )
+        self.conversation.add_turn(question, answer, doc_scores=scores)
+
+        yield answer
+
+    def ask_many(
+        self,
+        questions: List[str],
+        concurrency: int = 4,
+        top_k: int = None,
+        batch_size: int = 32
+    ) -> Iterator[tuple[int, Union[Answer, Exception]]]:
+        """
+        并发批量问答（独立回答每个问题，不读写对话上下文）
+
+        按 batch_size 分批做批量检索，LLM调用在最多 concurrency 个线程中并发执行，
+        每完成一个问题就立即产出结果。
+
+        Args:
+            questions: 问题列表
+            concurrency: 最大并发LLM调用数
+            top_k: 检索文档数量
+            batch_size: 每批检索的问题数
+
+        Yields:
+            (问题序号, 答案对象或异常)，按完成顺序产出
+        """
         top_k = top_k or Config.TOP_K_RESULTS
+        concurrency = max(1, concurrency)
 
-        print(f"\n🤔 问题: {question}")
-        print("-" * 70)
+        pending = {}
 
-        # 1. 分类问题类型
-        print("📋 分析问题类型...", end=" ")
-        question_type = self._classify_question(question)
-        print(f"✅ {question_type.value}")
+        def collect(return_when):
+            done, _ = wait(list(pending), return_when=return_when)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    yield index, future.result()
+                except Exception as e:
+                    yield index, e
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for start in range(0, len(questions), batch_size):
+                batch = questions[start:start + batch_size]
+
+                # 在途任务执行LLM调用的同时检索下一批
+                retrieved = self._retrieve_batch(batch, top_k)
+
+                for offset, (question, results) in enumerate(zip(batch, retrieved)):
+                    future = executor.submit(self._answer_batch_item, question, results)
+                    pending[future] = start + offset
+
+                # 限制排队任务数量，避免一次性提交全部问题
+                while len(pending) > concurrency:
+                    yield from collect(FIRST_COMPLETED)
 
-        # 2. 检索相关文档
-        print(f"🔍 检索相关文档 (Top-{top_k})...", end=" ")
+            while pending:
+                yield from collect(FIRST_COMPLETED)
+
+    def _retrieve_batch(
+        self,
+        questions: List[str],
+        top_k: int
+    ) -> List[Union[List[tuple[Document, float]], Exception]]:
+        """批量检索，批量失败时逐个重试，单个失败记录为异常"""
         try:
-            relevant_docs_with_scores = self.retriever.retrieve(
-                query=question,
-                top_k=top_k
+            return self.retriever.retrieve_batch(questions, top_k=top_k)
+        except Exception:
+            pass
+
+        results = []
+        for question in questions:
+            try:
+                results.append(self.retriever.retrieve(query=question, top_k=top_k))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _answer_batch_item(
+        self,
+        question: str,
+        retrieved: Union[List[tuple[Document, float]], Exception]
+    ) -> Answer:
+        """批量任务中的单个问题：以批量优先级排队，让交互式对话先走"""
+        with request_priority(PRIORITY_BATCH):
+            return self._answer_retrieved(question, retrieved)
+
+    def _answer_retrieved(
+        self,
+        question: str,
+        retrieved: Union[List[tuple[Document, float]], Exception]
+    ) -> Answer:
+        """基于已检索的文档回答单个问题（LLM失败时抛出异常）"""
+        question_type = self._classify_question(question)
+
+        # 批量问答不读对话上下文，只从问题本身提取用户情况
+        system = self._system_prompt(question_type)
+        reset_usage()
+
+        calculation = self._calculate(question, question_type, use_context=False)
+        if calculation is not None:
+            if self._answers_directly():
+                answer_text = self.calculator.format_answer(calculation)
+            else:
+                answer_text = self.llm.complete(
+                    prompt=self.templates.build_calculation_result_prompt(question, calculation),
+                    system=system,
+                    temperature=0.7
+                )
+            return self._build_answer(
+                question, answer_text, question_type, [], [], calculation,
+                metadata=self._usage_metadata()
             )
-            relevant_docs = [doc for doc, score in relevant_docs_with_scores]
-            scores = [score for doc, score in relevant_docs_with_scores]
-            print(f"✅ 找到 {len(relevant_docs)} 个相关文档")
 
-            # 显示相关度
-            if relevant_docs:
-                avg_score = sum(scores) / len(scores)
-                print(f"   平均相关度: {avg_score:.4f}")
+        # 检索失败时与 ask 一致：不带参考文档继续回答
+        if isinstance(retrieved, Exception):
+            retrieved = []
 
-        except Exception as e:
-            print(f"⚠️  检索失败: {e}")
-            relevant_docs = []
-            scores = []
+        relevant_docs = [doc for doc, score in retrieved]
+        scores = [score for doc, score in retrieved]
+
+        prompt = self.templates.build_rag_prompt(
+            question=question,
+            context_documents=relevant_docs,
+            question_type=question_type,
+            include_instructions=False
+        )
+
+        answer_text = self.llm.complete(
+            prompt=prompt,
+            system=system,
+            temperature=0.7
+        )
+
+        return self._build_answer(
+            question, answer_text, question_type, relevant_docs, scores,
+            metadata=self._usage_metadata()
+        )
+
+    def _system_prompt(self, question_type: QuestionType) -> str:
+        """静态系统提示（LLM客户端使用显式提示词缓存时附带常用法律依据）"""
+        return self.templates.build_system_prompt(
+            question_type,
+            legal_reference=getattr(self.llm, "caches_system_prompt", False)
+        )
+
+    def _answers_directly(self) -> bool:
+        """
+        本地计算结果是否直接作为回答
+
+        未配置当地社平工资时无法检查3倍封顶，高收入者的金额可能偏高，改为交给LLM结合适用条件解释
+        """
+        return Config.CALCULATOR_MODE == "direct" and bool(self.calculator.average_monthly_wage)
+
+    def _calculate(
+        self,
+        question: str,
+        question_type: QuestionType,
+        use_context: bool = True
+    ) -> Optional[CompensationResult]:
+        """
+        计算类问题尝试用本地计算器算出补偿金
+
+        Args:
+            question: 用户问题
+            question_type: 问题类型
+            use_context: 是否结合对话历史中的用户情况
+
+        Returns:
+            计算结果，不适用或信息不足时返回None
+        """
+        if question_type != QuestionType.CALCULATION or Config.CALCULATOR_MODE == "off":
+            return None
+
+        if use_context:
+            situation = self.conversation.extract_user_situation(question)
+        else:
+            situation = ConversationManager().extract_user_situation(question)
+
+        try:
+            return self.calculator.from_situation(situation, question)
+        except ValueError:
+            return None
+
+    def _prepare(
+        self,
+        question: str,
+        use_context: bool,
+        top_k: Optional[int]
+    ) -> tuple[QuestionType, List[Document], List[float], Optional[str], Optional[CompensationResult]]:
+        """
+        问题分类、文档检索和Prompt构建
+
+        计算类问题信息充足时由本地计算器算出金额：direct 模式下不再检索和调用LLM
+        （提示词为None），prompt 模式或未配置当地社平工资时用计算结果构建简短提示词交给LLM解释。
+        离职情形存在争议时不使用本地计算，按普通问题检索和回答。
+
+        Returns:
+            (问题类型, 相关文档, 相关度分数, 提示词, 计算结果)
+        """
+        top_k = top_k or Config.TOP_K_RESULTS
+
+        self._log(f"\n🤔 问题: {question}")
+        self._log("-" * 70)
+
+        # 1. 分类问题类型
+        self._log("📋 分析问题类型...", end=" ")
+        question_type = self._classify_question(question)
+        self._log(f"✅ {question_type.value}")
+
+        calculation = self._calculate(question, question_type, use_context)
+        if calculation is not None:
+            self._log(f"🧮 本地计算补偿金: {calculation.scheme or '未确定情形'} = {calculation.amount} 元")
+            if self._answers_directly():
+                return question_type, [], [], None, calculation
+            prompt = self.templates.build_calculation_result_prompt(question, calculation)
+            return question_type, [], [], prompt, calculation
+
+        follow_up = use_context and self.conversation.has_context()
+
+        # 2. 检索相关文档（追问时复用上一轮的文档，只在需要时补充检索）
+        if follow_up:
+            relevant_docs, scores = self._follow_up_documents(question, question_type, top_k)
+        else:
+            relevant_docs, scores = self._retrieve(question, top_k)
 
         # 3. 构建Prompt
-        print("💭 构建提示词...", end=" ")
+        self._log("💭 构建提示词...", end=" ")
 
-        if use_context and self.conversation.has_context():
-            # 多轮对话模式
-            history = self.conversation.get_conversation_history()
+        if follow_up:
+            # 多轮对话模式（较早的对话已压缩为摘要，历史部分不超过固定预算）
+            summary, recent = self.conversation.get_compressed_history()
             prompt = self.templates.build_follow_up_prompt(
-                previous_qa=history[-3:],  # 最近3轮
-                current_question=question
+                previous_qa=recent,
+                current_question=question,
+                context_documents=relevant_docs,
+                summary=summary,
+                situation=self.conversation.describe_situation(question)
             )
         else:
             # RAG模式
+            # 回答指导放在静态系统提示中（见 build_system_prompt），提示词只含动态内容
             prompt = self.templates.build_rag_prompt(
                 question=question,
                 context_documents=relevant_docs,
-                question_type=question_type
+                question_type=question_type,
+                include_instructions=False
             )
 
-        print("✅")
+        self._log("✅")
+
+        return question_type, relevant_docs, scores, prompt, None
+
+    def _retrieve(self, query: str, top_k: int) -> tuple[List[Document], List[float]]:
+        """
+        检索相关文档（失败时返回空结果）
 
-        # 4. 调用Claude生成答案
-        print("🤖 生成回答...", end=" ")
+        Returns:
+            (相关文档, 相关度分数)
+        """
+        self._log(f"🔍 检索相关文档 (Top-{top_k})...", end=" ")
         try:
-            answer_text = self.llm.complete(
-                prompt=prompt,
-                system=self.templates.SYSTEM_ROLE,
-                temperature=0.7
+            relevant_docs_with_scores = self.retriever.retrieve(
+                query=query,
+                top_k=top_k
             )
-            print("✅")
+            relevant_docs = [doc for doc, score in relevant_docs_with_scores]
+            scores = [score for doc, score in relevant_docs_with_scores]
+            self._log(f"✅ 找到 {len(relevant_docs)} 个相关文档")
+
+            # 显示相关度
+            if relevant_docs:
+                avg_score = sum(scores) / len(scores)
+                self._log(f"   平均相关度: {avg_score:.4f}")
+
         except Exception as e:
-            print(f"❌ 失败: {e}")
-            answer_text = "抱歉，我遇到了一些技术问题，无法生成回答。请稍后再试。"
+            self._log(f"⚠️  检索失败: {e}")
+            relevant_docs = []
+            scores = []
+
+        return relevant_docs, scores
+
+    def _follow_up_documents(
+        self,
+        question: str,
+        question_type: QuestionType,
+        top_k: int
+    ) -> tuple[List[Document], List[float]]:
+        """
+        追问时确定参考文档：复用上一轮的文档，需要时再用改写后的问题补充检索
+
+        Returns:
+            (参考文档, 相关度分数)，分数与文档一一对应：复用的文档沿用上一轮的分数
+        """
+        previous_docs = self.retriever.get_documents(self.conversation.get_last_doc_ids())
+        # 上一轮没有记录分数（如较早保存的会话）的文档按0计，置信度偏保守
+        last_scores = self.conversation.get_last_doc_scores()
+        previous_scores = [last_scores.get(doc.id, 0.0) for doc in previous_docs]
+
+        if previous_docs and not self._follow_up_needs_retrieval(question, question_type):
+            self._log(f"♻️  复用上一轮的 {len(previous_docs)} 个文档，跳过检索")
+            return previous_docs, previous_scores
+
+        # 追问往往省略主语，拼上上一轮问题后再检索
+        rewritten = f"{self.conversation.get_last_question()} {question}"
+        results, scores = self._retrieve(rewritten, top_k)
+
+        seen = {doc.id for doc in previous_docs}
+        delta = [(doc, score) for doc, score in zip(results, scores) if doc.id not in seen]
+        if previous_docs:
+            # 新话题的文档优先，上一轮的文档作为补充
+            delta = delta[:max(1, top_k // 2)]
+            self._log(f"♻️  复用上一轮的 {len(previous_docs)} 个文档，新增 {len(delta)} 个")
+
+        return (
+            [doc for doc, _ in delta] + previous_docs,
+            [score for _, score in delta] + previous_scores
+        )
+
+    def _follow_up_needs_retrieval(self, question: str, question_type: QuestionType) -> bool:
+        """
+        判断追问是否需要重新检索
+
+        简短的指代性追问（如"这个怎么理解？"）沿用上一轮的文档即可；
+        问题类型发生变化或问题较长时认为引入了新话题，需要补充检索。
+        """
+        last_type = self.conversation.get_last_question_type()
+        if question_type != QuestionType.GENERAL and question_type.value != last_type:
+            return True
 
-        # 5. 计算置信度
-        confidence = self._calculate_confidence(scores, question_type)
+        if len(question) > self.FOLLOW_UP_MAX_LENGTH:
+            return True
+
+        return not any(marker in question for marker in self.FOLLOW_UP_MARKERS)
+
+    def _build_answer(
+        self,
+        question: str,
+        answer_text: str,
+        question_type: QuestionType,
+        relevant_docs: List[Document],
+        scores: List[float],
+        calculation: Optional[CompensationResult] = None,
+        metadata: Optional[dict] = None
+    ) -> Answer:
+        """计算置信度并创建答案对象"""
+        # 5. 计算置信度（本地计算结果确定可复现，使用固定置信度）
+        if calculation is not None:
+            confidence = self.CALCULATION_CONFIDENCE
+        else:
+            confidence = self._calculate_confidence(scores, question_type)
 
         # 6. 提取来源
         sources = list(set(doc.source_url for doc in relevant_docs))
@@ -130,14 +554,18 @@ class LegalAgent:
             relevant_docs=relevant_docs,
             confidence=confidence,
             sources=sources,
-            created_at=datetime.now()
+            created_at=datetime.now(),
+            metadata=metadata or {}
         )
 
-        # 8. 保存到对话历史
-        self.conversation.add_turn(question, answer)
-
         return answer
 
+    @staticmethod
+    def _usage_metadata() -> dict:
+        """当前线程最近一次LLM调用的token用量（含提示词缓存命中的token数）"""
+        usage = get_last_usage()
+        return {"usage": usage} if usage else {}
+
     def chat(self, question: str, top_k: int = None) -> Answer:
         """
         多轮对话（带上下文）
@@ -151,10 +579,23 @@ class LegalAgent:
         """
         return self.ask(question, use_context=True, top_k=top_k)
 
+    def chat_stream(self, question: str, top_k: int = None) -> Iterator[Union[str, Answer]]:
+        """
+        流式多轮对话（带上下文）
+
+        Args:
+            question: 用户问题
+            top_k: 检索文档数量
+
+        Yields:
+            文本片段（str），最后一项为答案对象（Answer）
+        """
+        return self.ask_stream(question, use_context=True, top_k=top_k)
+
     def reset_conversation(self):
         """重置对话历史"""
         self.conversation.reset()
-        print("✅ 对话历史已重置")
+        self._log("✅ 对话历史已重置")
 
     def get_conversation_summary(self) -> str:
         """
@@ -175,27 +616,8 @@ class LegalAgent:
         Returns:
             问题类型
         """
-        # 简单的关键词匹配
-        question_lower = question.lower()
-
-        # 赔偿计算
-        if any(kw in question_lower for kw in ["计算", "多少钱", "金额", "算", "几个月"]):
-            return QuestionType.CALCULATION
-
-        # 维权流程
-        if any(kw in question_lower for kw in ["怎么办", "如何", "流程", "仲裁", "起诉", "维权"]):
-            return QuestionType.PROCEDURE
-
-        # 法律依据
-        if any(kw in question_lower for kw in ["法律", "法规", "规定", "依据", "条文"]):
-            return QuestionType.LEGAL_BASIS
-
-        # 经济补偿
-        if any(kw in question_lower for kw in ["补偿", "赔偿", "n+1", "2n"]):
-            return QuestionType.COMPENSATION
-
-        # 默认为一般咨询
-        return QuestionType.GENERAL
+        # 加权关键词自动机，一次扫描完成，不调用LLM
+        return self.classifier.classify(question)
 
     def _calculate_confidence(
         self,
@@ -2,8 +2,10 @@
 LiteLLM 客户端
 通过 LiteLLM 统一调用各种大模型
 """
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
 from ..config import Config
+from .http_pool import get_http_client
+from .llm_factory import _record_openai_usage, _iter_openai_stream
 
 
 class LiteLLMClient:
@@ -34,6 +36,7 @@ class LiteLLMClient:
             client = LiteLLMClient(model="claude-3-opus")
         """
         try:
+            import litellm
             from litellm import completion
         except ImportError:
             raise ImportError(
@@ -41,6 +44,9 @@ class LiteLLMClient:
                 "文档: https://docs.litellm.ai/"
             )
 
+        # 让 LiteLLM 复用共享连接池（异步调用的 aclient_session 绑定事件循环，不在此设置）
+        litellm.client_session = get_http_client()
+
         self.completion = completion
         self.model = model or Config.LITELLM_MODEL
         self.api_base = api_base or Config.LITELLM_API_BASE
@@ -104,6 +110,7 @@ class LiteLLMClient:
 
         try:
             response = self.completion(**kwargs)
+            _record_openai_usage(getattr(response, "usage", None))
             return response.choices[0].message.content
 
         except Exception as e:
@@ -151,6 +158,7 @@ class LiteLLMClient:
 
         try:
             response = self.completion(**kwargs)
+            _record_openai_usage(getattr(response, "usage", None))
             return response.choices[0].message.content
 
         except Exception as e:
@@ -158,6 +166,56 @@ class LiteLLMClient:
             raise
 
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        流式生成回复
+
+        Args:
+            prompt: 用户提示
+            system: 系统提示
+            temperature: 温度参数
+            max_tokens: 最大生成token数
+
+        Yields:
+            文本片段
+        """
+        max_tokens = max_tokens or self.max_tokens
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+            # 最后一块返回用量（含提示词缓存命中的token数）
+            "stream_options": {"include_usage": True},
+        }
+
+        if self.api_base:
+            kwargs["api_base"] = self.api_base
+
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+
+        try:
+            yield from _iter_openai_stream(self.completion(**kwargs))
+
+        except Exception as e:
+            print(f"❌ LiteLLM 调用失败: {e}")
+            raise
+
+
 def test_litellm():
     """测试 LiteLLM 配置"""
     print("🧪 测试 LiteLLM 配置")
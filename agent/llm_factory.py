@@ -3,13 +3,126 @@ LLM 客户端工厂
 根据配置自动选择合适的 LLM 客户端
 支持: LiteLLM(统一接口), Claude, 通义千问, DeepSeek, 智谱AI(GLM), 元宝(MiniMax), Kimi
 """
-from typing import Optional, List, Dict
+import json
+import threading
+from typing import Optional, List, Dict, Iterator
 from ..config import Config
+from .http_pool import get_http_client
+
+
+# ==================== Token 用量记录 ====================
+# 每个线程记录最近一次LLM调用的用量（含提示词缓存命中的token数）
+
+_usage = threading.local()
+
+
+def record_usage(
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0
+):
+    """记录当前线程最近一次LLM调用的token用量"""
+    _usage.last = {
+        "input_tokens": input_tokens or 0,
+        "output_tokens": output_tokens or 0,
+        "cache_read_tokens": cache_read_tokens or 0,
+        "cache_write_tokens": cache_write_tokens or 0,
+    }
+
+
+def get_last_usage() -> Dict[str, int]:
+    """获取当前线程最近一次LLM调用的token用量（未记录时为空字典）"""
+    return dict(getattr(_usage, "last", None) or {})
+
+
+def set_last_usage(usage: Dict[str, int]):
+    """设置当前线程的用量（用于把工作线程中的用量带回调用线程）"""
+    _usage.last = dict(usage) if usage else None
+
+
+def reset_usage():
+    """清除当前线程的用量记录"""
+    _usage.last = None
+
+
+def _usage_field(usage, name: str, default=None):
+    """读取用量字段（SDK对象或未建模的字典）"""
+    if isinstance(usage, dict):
+        return usage.get(name, default)
+    return getattr(usage, name, default)
+
+
+def _record_openai_usage(usage):
+    """记录OpenAI兼容接口返回的用量（DeepSeek上下文缓存 / OpenAI cached_tokens / Kimi cached_tokens）"""
+    if not usage:
+        return
+
+    # DeepSeek: prompt_cache_hit_tokens；OpenAI兼容接口: prompt_tokens_details.cached_tokens；
+    # Kimi: cached_tokens
+    cache_read = _usage_field(usage, "prompt_cache_hit_tokens")
+    if cache_read is None:
+        details = _usage_field(usage, "prompt_tokens_details")
+        cache_read = _usage_field(details, "cached_tokens", 0) if details else 0
+    if not cache_read:
+        cache_read = _usage_field(usage, "cached_tokens", 0)
+
+    record_usage(
+        input_tokens=_usage_field(usage, "prompt_tokens", 0),
+        output_tokens=_usage_field(usage, "completion_tokens", 0),
+        cache_read_tokens=cache_read
+    )
+
+
+def _record_anthropic_usage(usage):
+    """记录Claude返回的用量（含提示词缓存读写）"""
+    if usage is None:
+        return
+
+    record_usage(
+        input_tokens=getattr(usage, "input_tokens", 0),
+        output_tokens=getattr(usage, "output_tokens", 0),
+        cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0),
+        cache_write_tokens=getattr(usage, "cache_creation_input_tokens", 0)
+    )
+
+
+def _cached_system(system: Optional[str]):
+    """
+    把系统提示标记为可缓存（Anthropic cache_control）
+
+    系统提示是按问题类型固定的静态前缀，逐字节不变时可命中提供方的提示词缓存。
+    """
+    if not system:
+        return ""
+    return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+
+def _iter_openai_stream(response) -> Iterator[str]:
+    """逐块读取OpenAI兼容接口（DeepSeek/Kimi/智谱/LiteLLM）的流式响应"""
+    for chunk in response:
+        # 用量在最后一块中返回：DeepSeek/Kimi/LiteLLM 请求时传 stream_options={"include_usage": True}，
+        # 用量单独一块放在顶层 usage；智谱不需要该参数，与内容一起放在顶层 usage；
+        # Kimi 未开启时放在 choices[0].usage
+        if getattr(chunk, "usage", None):
+            _record_openai_usage(chunk.usage)
+        if not chunk.choices:
+            continue
+        choice_usage = getattr(chunk.choices[0], "usage", None)
+        if choice_usage:
+            _record_openai_usage(choice_usage)
+        content = getattr(chunk.choices[0].delta, "content", None)
+        if content:
+            yield content
 
 
 class LLMClientBase:
     """LLM客户端基类"""
 
+    # 是否对系统提示使用显式的提示词缓存（Anthropic cache_control）：
+    # 为True时系统提示附带常用法律依据，使前缀达到可缓存的最小长度
+    caches_system_prompt = False
+
     def complete(
         self,
         prompt: str,
@@ -30,17 +143,34 @@ class LLMClientBase:
         """多轮对话"""
         raise NotImplementedError
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """流式生成回复（默认退化为一次性返回完整结果）"""
+        yield self.complete(
+            prompt=prompt,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
 
 class ClaudeClient(LLMClientBase):
     """Claude API 客户端"""
 
+    caches_system_prompt = True
+
     def __init__(self, api_key: Optional[str] = None):
         from anthropic import Anthropic
         self.api_key = api_key or Config.CLAUDE_API_KEY
         if not self.api_key:
             raise ValueError("Claude API key is required")
 
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = Anthropic(api_key=self.api_key, http_client=get_http_client())
         self.model = Config.CLAUDE_MODEL
         self.max_tokens = Config.MAX_TOKENS
 
@@ -57,10 +187,11 @@ class ClaudeClient(LLMClientBase):
             model=self.model,
             max_tokens=max_tokens,
             temperature=temperature,
-            system=system or "",
+            system=_cached_system(system),
             messages=[{"role": "user", "content": prompt}]
         )
 
+        _record_anthropic_usage(response.usage)
         return response.content[0].text
 
     def chat(
@@ -76,12 +207,33 @@ class ClaudeClient(LLMClientBase):
             model=self.model,
             max_tokens=max_tokens,
             temperature=temperature,
-            system=system or "",
+            system=_cached_system(system),
             messages=messages
         )
 
+        _record_anthropic_usage(response.usage)
         return response.content[0].text
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        max_tokens = max_tokens or self.max_tokens
+
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=_cached_system(system),
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+            _record_anthropic_usage(stream.get_final_message().usage)
+
 
 class QwenClient(LLMClientBase):
     """通义千问 API 客户端"""
@@ -101,6 +253,7 @@ class QwenClient(LLMClientBase):
         self.max_tokens = Config.MAX_TOKENS
 
         # 设置API密钥
+        # 注意: dashscope SDK 不支持注入HTTP客户端，无法使用共享连接池
         import dashscope
         dashscope.api_key = self.api_key
 
@@ -157,9 +310,45 @@ class QwenClient(LLMClientBase):
         else:
             raise Exception(f"通义千问API调用失败: {response.message}")
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        max_tokens = max_tokens or self.max_tokens
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        responses = self.Generation.call(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            result_format='message',
+            stream=True,
+            incremental_output=True
+        )
+
+        for response in responses:
+            if response.status_code != 200:
+                raise Exception(f"通义千问API调用失败: {response.message}")
+            content = response.output.choices[0].message.content
+            if content:
+                yield content
+
 
 class DeepSeekClient(LLMClientBase):
-    """DeepSeek API 客户端（兼容OpenAI接口）"""
+    """
+    DeepSeek API 客户端（兼容OpenAI接口）
+
+    DeepSeek 的上下文缓存对相同的消息前缀自动生效，无需额外标记；
+    命中的token数由 usage.prompt_cache_hit_tokens 返回。
+    """
 
     def __init__(self, api_key: Optional[str] = None):
         try:
@@ -173,7 +362,8 @@ class DeepSeekClient(LLMClientBase):
 
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            http_client=get_http_client()
         )
         self.model = Config.DEEPSEEK_MODEL
         self.max_tokens = Config.MAX_TOKENS
@@ -199,6 +389,7 @@ class DeepSeekClient(LLMClientBase):
             max_tokens=max_tokens
         )
 
+        _record_openai_usage(response.usage)
         return response.choices[0].message.content
 
     def chat(
@@ -220,8 +411,34 @@ class DeepSeekClient(LLMClientBase):
             max_tokens=max_tokens
         )
 
+        _record_openai_usage(response.usage)
         return response.choices[0].message.content
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        max_tokens = max_tokens or self.max_tokens
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        yield from _iter_openai_stream(response)
+
 
 class ZhipuClient(LLMClientBase):
     """智谱AI (GLM) API 客户端"""
@@ -236,7 +453,7 @@ class ZhipuClient(LLMClientBase):
         if not self.api_key:
             raise ValueError("Zhipu AI API key is required")
 
-        self.client = ZhipuAI(api_key=self.api_key)
+        self.client = ZhipuAI(api_key=self.api_key, http_client=get_http_client())
         self.model = Config.ZHIPU_CHAT_MODEL
         self.max_tokens = Config.MAX_TOKENS
 
@@ -261,6 +478,7 @@ class ZhipuClient(LLMClientBase):
             max_tokens=max_tokens
         )
 
+        _record_openai_usage(response.usage)
         return response.choices[0].message.content
 
     def chat(
@@ -282,24 +500,44 @@ class ZhipuClient(LLMClientBase):
             max_tokens=max_tokens
         )
 
+        _record_openai_usage(response.usage)
         return response.choices[0].message.content
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        max_tokens = max_tokens or self.max_tokens
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+        yield from _iter_openai_stream(response)
+
 
 class MinimaxClient(LLMClientBase):
     """元宝 (MiniMax) API 客户端"""
 
     def __init__(self, api_key: Optional[str] = None, group_id: Optional[str] = None):
-        try:
-            import requests
-        except ImportError:
-            raise ImportError("请先安装 requests: pip install requests")
-
         self.api_key = api_key or Config.MINIMAX_API_KEY
         self.group_id = group_id or Config.MINIMAX_GROUP_ID
         if not self.api_key or not self.group_id:
             raise ValueError("MiniMax API key and group_id are required")
 
-        self.requests = requests
+        self.http = get_http_client()
         self.model = Config.MINIMAX_MODEL
         self.max_tokens = Config.MAX_TOKENS
         self.base_url = f"https://api.minimax.chat/v1/text/chatcompletion_v2?GroupId={self.group_id}"
@@ -330,10 +568,11 @@ class MinimaxClient(LLMClientBase):
             "max_tokens": max_tokens
         }
 
-        response = self.requests.post(self.base_url, headers=headers, json=data)
+        response = self.http.post(self.base_url, headers=headers, json=data)
         response.raise_for_status()
 
         result = response.json()
+        _record_openai_usage(result.get("usage"))
         return result["choices"][0]["message"]["content"]
 
     def chat(
@@ -360,12 +599,63 @@ class MinimaxClient(LLMClientBase):
             "max_tokens": max_tokens
         }
 
-        response = self.requests.post(self.base_url, headers=headers, json=data)
+        response = self.http.post(self.base_url, headers=headers, json=data)
         response.raise_for_status()
 
         result = response.json()
+        _record_openai_usage(result.get("usage"))
         return result["choices"][0]["message"]["content"]
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        max_tokens = max_tokens or self.max_tokens
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+        data = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+
+        with self.http.stream("POST", self.base_url, headers=headers, json=data) as response:
+            response.raise_for_status()
+
+            # SSE格式: 每行 "data: {...}"，以 "data: [DONE]" 结束
+            for line in response.iter_lines():
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    # 继续读完响应体，连接才能放回连接池复用
+                    continue
+
+                data = json.loads(payload)
+                # 最后一块带有本次调用的用量
+                if data.get("usage"):
+                    _record_openai_usage(data["usage"])
+                choices = data.get("choices") or []
+                if not choices:
+                    continue
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+
 
 class KimiClient(LLMClientBase):
     """Kimi (月之暗面) API 客户端（兼容OpenAI接口）"""
@@ -382,7 +672,8 @@ class KimiClient(LLMClientBase):
 
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url="https://api.moonshot.cn/v1"
+            base_url="https://api.moonshot.cn/v1",
+            http_client=get_http_client()
         )
         self.model = Config.KIMI_MODEL
         self.max_tokens = Config.MAX_TOKENS
@@ -408,6 +699,7 @@ class KimiClient(LLMClientBase):
             max_tokens=max_tokens
         )
 
+        _record_openai_usage(response.usage)
         return response.choices[0].message.content
 
     def chat(
@@ -429,15 +721,41 @@ class KimiClient(LLMClientBase):
             max_tokens=max_tokens
         )
 
+        _record_openai_usage(response.usage)
         return response.choices[0].message.content
 
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        max_tokens = max_tokens or self.max_tokens
+
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        yield from _iter_openai_stream(response)
+
 
 def create_llm_client(llm_type: Optional[str] = None) -> LLMClientBase:
     """
     创建LLM客户端
 
     Args:
-        llm_type: 指定类型 ('litellm', 'claude', 'qwen', 'deepseek', 'zhipu', 'minimax', 'kimi') 或 None（自动选择）
+        llm_type: 指定类型 ('fallback', 'litellm', 'claude', 'qwen', 'deepseek', 'zhipu', 'minimax', 'kimi') 或 None（自动选择）
 
     Returns:
         LLM客户端实例
@@ -445,10 +763,14 @@ def create_llm_client(llm_type: Optional[str] = None) -> LLMClientBase:
     Raises:
         ValueError: 如果没有可用的配置
     """
+    # 配置了降级链时组合多个提供方
+    if llm_type == "fallback" or (not llm_type and Config.LLM_FALLBACK_PROVIDERS):
+        return create_fallback_client()
+
     # 优先检查 LiteLLM
     if llm_type == "litellm" or (not llm_type and Config.LITELLM_MODEL):
         from .litellm_client import LiteLLMClient
-        return LiteLLMClient()
+        return _rate_limited("litellm", LiteLLMClient())
 
     # 如果指定了类型
     if llm_type:
@@ -465,7 +787,7 @@ def create_llm_client(llm_type: Optional[str] = None) -> LLMClientBase:
             raise ValueError(f"未知的LLM类型: {llm_type}")
 
         print(f"📦 使用 {llm_type.upper()} LLM")
-        return client_map[llm_type]()
+        return _rate_limited(llm_type, client_map[llm_type]())
 
     # 自动选择
     selected = Config.auto_select_llm()
@@ -494,6 +816,50 @@ def create_llm_client(llm_type: Optional[str] = None) -> LLMClientBase:
     if selected in client_map:
         client_class, display_name = client_map[selected]
         print(f"📦 使用 {display_name} (自动选择)")
-        return client_class()
+        return _rate_limited(selected, client_class())
     else:
         raise ValueError(f"未知的LLM选择: {selected}")
+
+
+def _rate_limited(provider: str, client: LLMClientBase) -> LLMClientBase:
+    """配置了该提供方的RPM/TPM限额时包装上速率限制"""
+    from .rate_limiter import RateLimitedClient, get_scheduler
+
+    if get_scheduler(provider).enabled:
+        return RateLimitedClient(client, provider)
+    return client
+
+
+def create_fallback_client(providers: Optional[List[str]] = None) -> LLMClientBase:
+    """
+    创建LLM降级链客户端
+
+    Args:
+        providers: 按优先级排列的提供方列表，为None则使用 Config.LLM_FALLBACK_PROVIDERS
+                   （仍为空时使用所有已配置的提供方）
+
+    Returns:
+        降级链客户端（只有一个可用提供方时直接返回该客户端）
+
+    Raises:
+        ValueError: 如果没有可用的提供方
+    """
+    from .fallback_client import FallbackLLMClient
+
+    providers = providers or Config.LLM_FALLBACK_PROVIDERS or Config.available_llms()
+
+    clients = []
+    for name in providers:
+        try:
+            clients.append((name, create_llm_client(name)))
+        except Exception as e:
+            print(f"⚠️  跳过 {name}: {e}")
+
+    if not clients:
+        raise ValueError("降级链中没有可用的LLM提供方，请检查 LLM_FALLBACK 和API密钥配置")
+
+    if len(clients) == 1:
+        return clients[0][1]
+
+    print(f"🔗 LLM降级链: {' → '.join(name for name, _ in clients)}")
+    return FallbackLLMClient(clients)
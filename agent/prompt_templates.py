@@ -3,7 +3,7 @@ Prompt 模板
 为不同类型的问题提供专业的提示词
 """
 from typing import List, Optional
-from ..models import QuestionType, Document
+from ..models import QuestionType, Document, CompensationResult
 
 
 class PromptTemplates:
@@ -31,11 +31,126 @@ class PromptTemplates:
 - 建议用户在重要决策前咨询当地律师
 - 始终在回答末尾添加免责声明"""
 
-    @staticmethod
+    # 常用法律依据（静态内容，只在使用显式提示词缓存的客户端上加入系统提示，见 build_system_prompt）
+    LEGAL_REFERENCE = """# 常用法律依据（摘要）
+
+以下条文摘要用于快速核对，回答时以参考文档中的原文为准；参考文档与摘要不一致时，说明差异并以参考文档为准。
+
+## 《中华人民共和国劳动合同法》
+- 第十条：建立劳动关系，应当订立书面劳动合同。已建立劳动关系未同时订立书面劳动合同的，应当自用工之日起一个月内订立。
+- 第十四条：连续订立二次固定期限劳动合同且劳动者没有第三十九条和第四十条第一项、第二项规定的情形续订的，或者劳动者在该用人单位连续工作满十年的，劳动者提出或者同意续订、订立劳动合同的，除劳动者提出订立固定期限劳动合同外，应当订立无固定期限劳动合同。
+- 第十九条：劳动合同期限三个月以上不满一年的，试用期不得超过一个月；一年以上不满三年的，不得超过二个月；三年以上固定期限和无固定期限的，不得超过六个月。同一用人单位与同一劳动者只能约定一次试用期。
+- 第三十六条：用人单位与劳动者协商一致，可以解除劳动合同。
+- 第三十七条：劳动者提前三十日以书面形式通知用人单位，可以解除劳动合同；在试用期内提前三日通知用人单位，可以解除劳动合同。
+- 第三十八条：用人单位未按照劳动合同约定提供劳动保护或者劳动条件、未及时足额支付劳动报酬、未依法为劳动者缴纳社会保险费、规章制度违反法律法规损害劳动者权益等情形的，劳动者可以解除劳动合同；以暴力、威胁或者非法限制人身自由的手段强迫劳动的，劳动者可以立即解除劳动合同，不需事先告知用人单位。
+- 第三十九条：劳动者在试用期间被证明不符合录用条件、严重违反用人单位的规章制度、严重失职营私舞弊给用人单位造成重大损害、被依法追究刑事责任等情形的，用人单位可以解除劳动合同，无需支付经济补偿。
+- 第四十条：劳动者患病或者非因工负伤，在规定的医疗期满后不能从事原工作也不能从事另行安排的工作的；劳动者不能胜任工作，经过培训或者调整工作岗位，仍不能胜任工作的；劳动合同订立时所依据的客观情况发生重大变化，致使劳动合同无法履行，经协商未能就变更劳动合同内容达成协议的，用人单位提前三十日以书面形式通知劳动者本人或者额外支付劳动者一个月工资后，可以解除劳动合同。
+- 第四十一条：经济性裁员的条件和程序（裁减人员二十人以上或者不足二十人但占职工总数百分之十以上的，应当提前三十日向工会或者全体职工说明情况，并向劳动行政部门报告）。
+- 第四十二条：从事接触职业病危害作业未进行离岗前职业健康检查、患职业病或者因工负伤并被确认丧失或者部分丧失劳动能力、患病或者非因工负伤在规定的医疗期内、女职工在孕期产期哺乳期、在本单位连续工作满十五年且距法定退休年龄不足五年等情形的，用人单位不得依照第四十条、第四十一条的规定解除劳动合同。
+- 第四十六条：劳动者依照第三十八条解除劳动合同的；用人单位提出并与劳动者协商一致解除劳动合同的；用人单位依照第四十条、第四十一条解除劳动合同的；劳动合同期满，除用人单位维持或者提高劳动合同约定条件续订而劳动者不同意续订的情形外终止固定期限劳动合同的，用人单位应当向劳动者支付经济补偿。
+- 第四十七条：经济补偿按劳动者在本单位工作的年限，每满一年支付一个月工资的标准向劳动者支付。六个月以上不满一年的，按一年计算；不满六个月的，向劳动者支付半个月工资的经济补偿。劳动者月工资高于用人单位所在直辖市、设区的市级人民政府公布的本地区上年度职工月平均工资三倍的，向其支付经济补偿的标准按职工月平均工资三倍的数额支付，向其支付经济补偿的年限最高不超过十二年。本条所称月工资是指劳动者在劳动合同解除或者终止前十二个月的平均工资。
+- 第四十八条：用人单位违反本法规定解除或者终止劳动合同，劳动者要求继续履行劳动合同的，用人单位应当继续履行；劳动者不要求继续履行或者劳动合同已经不能继续履行的，用人单位应当依照第八十七条规定支付赔偿金。
+- 第五十条：用人单位应当在解除或者终止劳动合同时出具解除或者终止劳动合同的证明，并在十五日内为劳动者办理档案和社会保险关系转移手续。
+- 第八十二条：用人单位自用工之日起超过一个月不满一年未与劳动者订立书面劳动合同的，应当向劳动者每月支付二倍的工资。
+- 第八十五条：未按照劳动合同的约定或者国家规定及时足额支付劳动报酬、低于当地最低工资标准支付工资、安排加班不支付加班费、解除或者终止劳动合同未依照本法规定支付经济补偿的，由劳动行政部门责令限期支付；逾期不支付的，责令用人单位按应付金额百分之五十以上百分之一百以下的标准向劳动者加付赔偿金。
+- 第八十七条：用人单位违反本法规定解除或者终止劳动合同的，应当依照本法第四十七条规定的经济补偿标准的二倍向劳动者支付赔偿金。
+
+## 《中华人民共和国劳动合同法实施条例》
+- 第二十条：用人单位依照劳动合同法第四十条的规定，选择额外支付劳动者一个月工资解除劳动合同的，其额外支付的工资应当按照该劳动者上一个月的工资标准确定。
+- 第二十五条：用人单位违反劳动合同法的规定解除或者终止劳动合同，依照劳动合同法第八十七条的规定支付了赔偿金的，不再支付经济补偿。赔偿金的计算年限自用工之日起计算。
+- 第二十七条：劳动合同法第四十七条规定的经济补偿的月工资按照劳动者应得工资计算，包括计时工资或者计件工资以及奖金、津贴和补贴等货币性收入。劳动者在劳动合同解除或者终止前十二个月的平均工资低于当地最低工资标准的，按照当地最低工资标准计算。
+
+## 《中华人民共和国劳动争议调解仲裁法》
+- 第二十七条：劳动争议申请仲裁的时效期间为一年，从当事人知道或者应当知道其权利被侵害之日起计算。劳动关系存续期间因拖欠劳动报酬发生争议的，不受一年时效期间的限制；但是，劳动关系终止的，应当自劳动关系终止之日起一年内提出。
+- 第四十三条：仲裁庭裁决劳动争议案件，应当自劳动争议仲裁委员会受理仲裁申请之日起四十五日内结束；案情复杂需要延期的，经批准可以延期并书面通知当事人，但是延长期限不得超过十五日。
+- 第四十七条：追索劳动报酬、工伤医疗费、经济补偿或者赔偿金，不超过当地月最低工资标准十二个月金额的争议，以及因执行国家的劳动标准在工作时间、休息休假、社会保险等方面发生的争议，仲裁裁决为终局裁决，裁决书自作出之日起发生法律效力（劳动者不服的仍可以向人民法院提起诉讼）。
+- 第五十三条：劳动争议仲裁不收费。
+
+## 常用概念
+- N：经济补偿，按劳动合同法第四十七条计算，N为工作年限折算的月数。
+- N+1：用人单位依照第四十条解除且未提前三十日书面通知，在经济补偿之外额外支付一个月工资（代通知金）。
+- 2N：用人单位违法解除或者终止劳动合同的赔偿金，为经济补偿标准的二倍；支付赔偿金后不再支付经济补偿。
+- 二倍工资：未订立书面劳动合同的第二个月起至满一年，每月额外支付一倍工资，最多十一个月。
+
+## 分析步骤
+1. 先确认劳动关系的基本事实：入职时间、离职时间、月工资构成、劳动合同类型和期限
+2. 再判断解除或者终止的方式：协商解除、劳动者辞职、被迫解除、用人单位单方解除、合同期满终止
+3. 对照上述条文判断用人单位解除是否合法，以及适用经济补偿、代通知金、赔偿金中的哪一种
+4. 涉及金额时说明计算基数（前十二个月平均工资、三倍封顶）和计算年限（十二年封顶）
+5. 最后给出维权路径：与用人单位协商、向劳动监察投诉、申请劳动仲裁、向人民法院起诉，并提示仲裁时效和需要保留的证据（劳动合同、工资流水、考勤记录、解除通知、沟通记录等）"""
+
+    # 各问题类型的回答指导
+    TYPE_INSTRUCTIONS = {
+        QuestionType.CALCULATION: """
+这是一个补偿金计算问题。请：
+1. 明确列出计算公式
+2. 逐步展示计算过程
+3. 给出最终金额
+4. 说明可能的调整因素
+""",
+        QuestionType.PROCEDURE: """
+这是一个维权流程问题。请：
+1. 按步骤列出具体流程
+2. 说明每步需要的材料
+3. 提示注意事项和时限
+4. 给出建议和Tips
+""",
+        QuestionType.LEGAL_BASIS: """
+这是一个法律依据问题。请：
+1. 引用具体的法律条文
+2. 解释法条的含义
+3. 说明适用条件
+4. 举例说明
+""",
+    }
+
+    # 通用回答要求
+    ANSWER_REQUIREMENTS = """请基于参考文档，为用户提供专业、准确、实用的解答。
+
+回答要求：
+1. 直接回答问题，不要重复问题内容
+2. 引用参考文档中的具体内容
+3. 使用清晰的结构（标题、列表等）
+4. 如果文档中信息不完整，说明哪些信息缺失
+5. 在回答末尾添加：**免责声明：本回答仅供参考，具体情况请咨询专业律师。**"""
+
+    @classmethod
+    def build_system_prompt(
+        cls,
+        question_type: Optional[QuestionType] = None,
+        legal_reference: bool = False
+    ) -> str:
+        """
+        构建静态系统提示（系统角色 + [常用法律依据] + 问题类型指导 + 回答要求）
+
+        只依赖问题类型，同一类型逐字节不变，可以命中提供方的提示词缓存
+        （Anthropic cache_control / DeepSeek 上下文缓存）。动态内容（问题、文档）
+        一律放在用户消息里。
+
+        Args:
+            question_type: 问题类型
+            legal_reference: 是否加入常用法律依据。Anthropic 的前缀不足1024 token时
+                cache_control 不生效，加入后才能缓存；其他提供方没有最小长度要求或不支持缓存，
+                加入只会增加每次请求的输入token，因此只在 Claude 客户端上开启
+
+        Returns:
+            系统提示
+        """
+        instruction = cls.TYPE_INSTRUCTIONS.get(question_type, "")
+        reference = f"\n\n{cls.LEGAL_REFERENCE}" if legal_reference else ""
+        return f"""{cls.SYSTEM_ROLE}{reference}
+
+# 回答指导
+{instruction}
+{cls.ANSWER_REQUIREMENTS}"""
+
+    @classmethod
     def build_rag_prompt(
+        cls,
         question: str,
         context_documents: List[Document],
-        question_type: Optional[QuestionType] = None
+        question_type: Optional[QuestionType] = None,
+        include_instructions: bool = True
     ) -> str:
         """
         构建RAG提示（基于检索结果回答）
@@ -44,6 +159,8 @@ class PromptTemplates:
             question: 用户问题
             context_documents: 检索到的相关文档
             question_type: 问题类型
+            include_instructions: 是否在提示中包含回答指导
+                （使用 build_system_prompt 作为系统提示时传False，避免重复）
 
         Returns:
             完整的提示词
@@ -59,32 +176,17 @@ class PromptTemplates:
 
         context = "\n".join(context_parts)
 
+        if not include_instructions:
+            return f"""# 相关法律文档
+{context}
+
+# 用户问题
+{question}
+
+请开始回答："""
+
         # 根据问题类型调整指令
-        type_specific_instruction = ""
-        if question_type == QuestionType.CALCULATION:
-            type_specific_instruction = """
-这是一个补偿金计算问题。请：
-1. 明确列出计算公式
-2. 逐步展示计算过程
-3. 给出最终金额
-4. 说明可能的调整因素
-"""
-        elif question_type == QuestionType.PROCEDURE:
-            type_specific_instruction = """
-这是一个维权流程问题。请：
-1. 按步骤列出具体流程
-2. 说明每步需要的材料
-3. 提示注意事项和时限
-4. 给出建议和Tips
-"""
-        elif question_type == QuestionType.LEGAL_BASIS:
-            type_specific_instruction = """
-这是一个法律依据问题。请：
-1. 引用具体的法律条文
-2. 解释法条的含义
-3. 说明适用条件
-4. 举例说明
-"""
+        type_specific_instruction = cls.TYPE_INSTRUCTIONS.get(question_type, "")
 
         prompt = f"""# 用户问题
 {question}
@@ -95,14 +197,7 @@ class PromptTemplates:
 # 回答指导
 {type_specific_instruction}
 
-请基于以上参考文档，为用户提供专业、准确、实用的解答。
-
-回答要求：
-1. 直接回答问题，不要重复问题内容
-2. 引用参考文档中的具体内容
-3. 使用清晰的结构（标题、列表等）
-4. 如果文档中信息不完整，说明哪些信息缺失
-5. 在回答末尾添加：**免责声明：本回答仅供参考，具体情况请咨询专业律师。**
+{cls.ANSWER_REQUIREMENTS}
 
 请开始回答："""
 
@@ -177,10 +272,54 @@ class PromptTemplates:
 
         return prompt
 
+    @staticmethod
+    def build_calculation_result_prompt(
+        question: str,
+        result: CompensationResult
+    ) -> str:
+        """
+        构建补偿金解释提示（金额已由本地计算器算出，LLM只负责解释）
+
+        Args:
+            question: 用户问题
+            result: 本地计算结果
+
+        Returns:
+            提示词
+        """
+        steps = "\n".join(f"{i}. {step}" for i, step in enumerate(result.steps, 1))
+        alternatives = "\n".join(
+            f"- {scheme}: {amount} 元" for scheme, amount in result.alternatives.items()
+        )
+        scheme = result.scheme or "未确定（请按不同情形分别说明）"
+
+        prompt = f"""# 用户问题
+{question}
+
+# 已确定的计算结果（请勿修改数字）
+- 适用标准：{scheme}
+- 金额：{result.amount} 元
+
+## 计算步骤
+{steps}
+
+## 不同情形下的金额
+{alternatives}
+
+请用简洁的语言向用户解释上述计算结果和适用条件，说明可能影响金额的因素。
+在回答末尾添加：**免责声明：本回答仅供参考，具体情况请咨询专业律师。**
+
+请开始回答："""
+
+        return prompt
+
     @staticmethod
     def build_follow_up_prompt(
         previous_qa: List[tuple[str, str]],
-        current_question: str
+        current_question: str,
+        context_documents: Optional[List[Document]] = None,
+        summary: Optional[str] = None,
+        situation: Optional[str] = None
     ) -> str:
         """
         构建追问提示（多轮对话）
@@ -188,18 +327,35 @@ class PromptTemplates:
         Args:
             previous_qa: 之前的问答对 [(question, answer), ...]
             current_question: 当前问题
+            context_documents: 参考文档（复用上一轮的文档和补充检索的文档）
+            summary: 较早对话的滚动摘要（提供时 previous_qa 已按预算压缩，不再截断）
+            situation: 从对话中抽取的用户情况（每项一行）
 
         Returns:
             追问提示
         """
         history = []
+        if summary:
+            history.append(f"【此前对话摘要】\n{summary}")
         for i, (q, a) in enumerate(previous_qa, 1):
             history.append(f"【问题{i}】{q}")
-            history.append(f"【回答{i}】{a[:200]}...")  # 只保留前200字
+            if summary is None:
+                a = f"{a[:200]}..."  # 只保留前200字
+            history.append(f"【回答{i}】{a}")
 
         history_text = "\n\n".join(history)
 
-        prompt = f"""# 对话历史
+        documents_text = ""
+        if context_documents:
+            parts = []
+            for i, doc in enumerate(context_documents, 1):
+                section_info = f"【{doc.section_title}】" if doc.section_title else ""
+                parts.append(f"## 参考文档 {i} {section_info}\n{doc.content}\n")
+            documents_text = "# 相关法律文档\n" + "\n".join(parts) + "\n"
+
+        situation_text = f"# 用户情况\n{situation}\n\n" if situation else ""
+
+        prompt = f"""{documents_text}{situation_text}# 对话历史
 {history_text}
 
 # 当前问题
@@ -211,6 +367,42 @@ class PromptTemplates:
 
         return prompt
 
+    @staticmethod
+    def build_history_fold_prompt(
+        summary: str,
+        question: str,
+        answer: str,
+        max_chars: int
+    ) -> str:
+        """
+        构建滚动摘要提示（把一轮对话合并进已有摘要）
+
+        Args:
+            summary: 已有摘要
+            question: 要合并的问题
+            answer: 要合并的回答
+            max_chars: 摘要字数上限
+
+        Returns:
+            摘要提示
+        """
+        prompt = f"""# 已有摘要
+{summary or "（无）"}
+
+# 新的一轮对话
+用户：{question}
+回答：{answer}
+
+请把新的一轮对话合并进已有摘要，要求：
+1. 保留用户的具体情况（工作年限、工资、离职原因等）和已给出的结论、法条、金额
+2. 删除客套话和重复内容
+3. 每个要点一行，以"- "开头
+4. 总字数不超过{max_chars}字
+
+只输出摘要："""
+
+        return prompt
+
     @staticmethod
     def build_summary_prompt(
         conversation: List[tuple[str, str]]
@@ -0,0 +1,386 @@
+"""
+问题分类器
+基于 Aho-Corasick 自动机的加权关键词分类（单次扫描，不调用LLM），
+可选用字符 n-gram 逻辑回归小模型兜底
+"""
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional, List, Dict, Iterator
+
+from ..models import QuestionType
+from ..config import Config
+
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机（一次扫描找出文本中出现的所有关键词）"""
+
+    def __init__(self, patterns: List[str]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 关键词列表（下标即关键词编号）
+        """
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            self._insert(pattern, index)
+        self._build_fail_links()
+
+    def _insert(self, pattern: str, index: int):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(index)
+
+    def _build_fail_links(self):
+        # 按层次遍历，失败指针指向最长的可匹配后缀
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                # 第一层节点的失败指针指向根节点
+                self._fail[child] = target if target != child else 0
+                # 合并失败节点的输出，匹配时无需再沿失败链回溯
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[int]:
+        """
+        扫描文本
+
+        Args:
+            text: 待匹配文本
+
+        Yields:
+            命中的关键词编号（重复出现则重复产出）
+        """
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                yield from output[node]
+
+
+class NgramLogisticRegression:
+    """字符 n-gram 多分类逻辑回归（numpy实现，用于少量样本的本地小模型）"""
+
+    def __init__(self, ngram_range: tuple[int, int] = (1, 2)):
+        self.ngram_range = ngram_range
+        self.vocabulary: Dict[str, int] = {}
+        self.labels: List[QuestionType] = []
+        self.weights = None
+        self.bias = None
+
+    def _ngrams(self, text: str) -> Iterator[str]:
+        text = text.lower()
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                yield text[i:i + n]
+
+    def _vectorize(self, texts: List[str]):
+        import numpy as np
+
+        features = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram in self._ngrams(text):
+                column = self.vocabulary.get(gram)
+                if column is not None:
+                    features[row, column] += 1.0
+            norm = np.linalg.norm(features[row])
+            if norm:
+                features[row] /= norm
+        return features
+
+    def fit(
+        self,
+        texts: List[str],
+        labels: List[QuestionType],
+        epochs: int = 300,
+        learning_rate: float = 0.5,
+        l2: float = 1e-3
+    ) -> "NgramLogisticRegression":
+        """
+        训练模型（全量梯度下降）
+
+        Args:
+            texts: 问题文本
+            labels: 问题类型
+            epochs: 迭代次数
+            learning_rate: 学习率
+            l2: L2正则系数
+
+        Returns:
+            self
+        """
+        import numpy as np
+
+        self.vocabulary = {}
+        for text in texts:
+            for gram in self._ngrams(text):
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+
+        self.labels = sorted(set(labels), key=lambda label: label.name)
+        label_index = {label: i for i, label in enumerate(self.labels)}
+
+        x = self._vectorize(texts)
+        y = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        for row, label in enumerate(labels):
+            y[row, label_index[label]] = 1.0
+
+        self.weights = np.zeros((x.shape[1], len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+        for _ in range(epochs):
+            probs = self._softmax(x @ self.weights + self.bias)
+            grad = (probs - y) / len(texts)
+            self.weights -= learning_rate * (x.T @ grad + l2 * self.weights)
+            self.bias -= learning_rate * grad.sum(axis=0)
+
+        return self
+
+    @staticmethod
+    def _softmax(logits):
+        import numpy as np
+
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, text: str) -> tuple[QuestionType, float]:
+        """
+        预测问题类型
+
+        Returns:
+            (问题类型, 概率)
+        """
+        probs = self._softmax(self._vectorize([text]) @ self.weights + self.bias)[0]
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    @classmethod
+    def from_test_cases(cls, path: Optional[Path] = None) -> "NgramLogisticRegression":
+        """
+        用 examples/test_cases.json 中的问题和 expected_type 训练模型
+
+        Args:
+            path: 测试用例文件路径
+
+        Returns:
+            训练好的模型
+        """
+        path = path or Config.PROJECT_ROOT / "examples" / "test_cases.json"
+        with open(path, 'r', encoding='utf-8') as f:
+            cases = json.load(f)["test_cases"]
+
+        texts = [case["question"] for case in cases]
+        labels = [QuestionType[case["expected_type"]] for case in cases]
+        return cls().fit(texts, labels)
+
+
+class QuestionClassifier:
+    """问题分类器"""
+
+    # 默认词典：关键词 -> 权重（同一问题中命中的权重按类型累加）
+    DEFAULT_LEXICON: Dict[QuestionType, Dict[str, float]] = {
+        QuestionType.CALCULATION: {
+            "计算": 2.0, "怎么算": 2.0, "算": 1.0, "多少钱": 2.0, "金额": 1.5, "几个月": 1.5,
+            "赔多少": 2.0, "补多少": 2.0, "拿多少": 2.0, "给多少": 2.0, "拿到多少": 2.0,
+            "月薪": 1.5, "工作了": 1.0,
+        },
+        QuestionType.PROCEDURE: {
+            "怎么办": 2.0, "流程": 2.0, "仲裁": 1.5, "起诉": 1.5, "维权": 1.5,
+            "材料": 1.5, "步骤": 1.5, "投诉": 1.5, "举报": 1.5, "讨薪": 1.5, "劳动监察": 1.5,
+            "找谁": 2.0, "去哪": 1.5,
+            # 疑问词和办事动词单独出现时不足以判定（如"如何注册公司"），同时出现才达到最低得分
+            "如何": 0.5, "怎么": 0.5,
+            "要回": 0.5, "处理": 0.5, "办理": 0.5, "申请": 0.5, "认定": 0.5, "证明": 0.5,
+        },
+        QuestionType.LEGAL_BASIS: {
+            "法律": 1.5, "法规": 1.5, "规定": 1.0, "依据": 2.0, "条文": 2.0, "法条": 2.0, "第几条": 2.0,
+        },
+        QuestionType.COMPENSATION: {
+            "补偿": 1.0, "赔偿": 1.0, "n+1": 1.0, "2n": 1.0,
+        },
+    }
+
+    # 得分相同时的优先级（与原先按顺序匹配的规则一致）
+    PRIORITY = [
+        QuestionType.CALCULATION,
+        QuestionType.PROCEDURE,
+        QuestionType.LEGAL_BASIS,
+        QuestionType.COMPENSATION,
+        QuestionType.CASE_ANALYSIS,
+        QuestionType.GENERAL,
+    ]
+
+    # 最高得分低于此值时视为没有明确意图
+    MIN_SCORE = 1.0
+
+    # 使用小模型时采纳其结果的最低概率
+    MODEL_MIN_PROBABILITY = 0.5
+
+    def __init__(
+        self,
+        lexicon: Optional[Dict[QuestionType, Dict[str, float]]] = None,
+        model: Optional[NgramLogisticRegression] = None
+    ):
+        """
+        初始化分类器
+
+        Args:
+            lexicon: 词典（为None则使用默认词典）
+            model: 可选的n-gram小模型，关键词没有明确结果时使用
+        """
+        self.lexicon = lexicon or self.DEFAULT_LEXICON
+        self.model = model
+
+        self._keywords: List[tuple[QuestionType, float]] = []
+        patterns = []
+        for question_type, keywords in self.lexicon.items():
+            for keyword, weight in keywords.items():
+                patterns.append(keyword.lower())
+                self._keywords.append((question_type, weight))
+
+        self.automaton = AhoCorasick(patterns)
+        self._rank = {question_type: i for i, question_type in enumerate(self.PRIORITY)}
+
+    @classmethod
+    def from_config(cls) -> "QuestionClassifier":
+        """
+        按Config创建分类器
+
+        CLASSIFIER_LEXICON_PATH 指向的JSON词典（{"CALCULATION": {"关键词": 权重}}）
+        合并到默认词典上；CLASSIFIER_USE_MODEL 为真时训练n-gram小模型。
+        """
+        lexicon = {qt: dict(keywords) for qt, keywords in cls.DEFAULT_LEXICON.items()}
+
+        if Config.CLASSIFIER_LEXICON_PATH:
+            with open(Config.CLASSIFIER_LEXICON_PATH, 'r', encoding='utf-8') as f:
+                custom = json.load(f)
+            for name, keywords in custom.items():
+                lexicon.setdefault(QuestionType[name], {}).update(keywords)
+
+        model = None
+        if Config.CLASSIFIER_USE_MODEL:
+            try:
+                model = NgramLogisticRegression.from_test_cases()
+            except Exception as e:
+                print(f"⚠️  问题分类小模型训练失败，仅使用关键词: {e}")
+
+        return cls(lexicon=lexicon, model=model)
+
+    def scores(self, question: str) -> Dict[QuestionType, float]:
+        """
+        计算各类型的关键词得分
+
+        Args:
+            question: 用户问题
+
+        Returns:
+            {问题类型: 得分}（只包含命中的类型）
+        """
+        scores: Dict[QuestionType, float] = {}
+        for index in self.automaton.iter_matches(question.lower()):
+            question_type, weight = self._keywords[index]
+            scores[question_type] = scores.get(question_type, 0.0) + weight
+        return scores
+
+    def classify(self, question: str) -> QuestionType:
+        """
+        分类问题类型
+
+        Args:
+            question: 用户问题
+
+        Returns:
+            问题类型
+        """
+        scores = self.scores(question)
+        if scores:
+            # 得分最高者胜出，同分按优先级
+            best = min(scores, key=lambda qt: (-scores[qt], self._rank.get(qt, len(self._rank))))
+            if scores[best] >= self.MIN_SCORE:
+                return best
+
+        if self.model is not None:
+            predicted, probability = self.model.predict(question)
+            if probability >= self.MODEL_MIN_PROBABILITY:
+                return predicted
+
+        return QuestionType.GENERAL
+
+
+# 按配置缓存的分类器（词典加载、自动机构建和小模型训练每个进程只做一次）
+_classifiers: Dict[tuple, QuestionClassifier] = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_question_classifier() -> QuestionClassifier:
+    """
+    获取按当前Config创建的共享分类器
+
+    分类器创建后只读，可在多个Agent和线程之间共用；配置变化时重新创建。
+    """
+    key = (Config.CLASSIFIER_LEXICON_PATH, Config.CLASSIFIER_USE_MODEL)
+    with _classifiers_lock:
+        if key not in _classifiers:
+            _classifiers[key] = QuestionClassifier.from_config()
+        return _classifiers[key]
+
+
+def main():
+    """测试问题分类器"""
+    import time
+
+    print("🧪 测试问题分类器")
+    print("=" * 70)
+
+    with open(Config.PROJECT_ROOT / "examples" / "test_cases.json", 'r', encoding='utf-8') as f:
+        cases = json.load(f)["test_cases"]
+
+    classifier = QuestionClassifier()
+    correct = 0
+    for case in cases:
+        predicted = classifier.classify(case["question"])
+        expected = QuestionType[case["expected_type"]]
+        correct += predicted == expected
+        mark = "✅" if predicted == expected else "❌"
+        print(f"{mark} {case['question']} → {predicted.value}（期望: {expected.value}）")
+
+    print(f"\n准确率: {correct}/{len(cases)}")
+
+    rounds = 1000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for case in cases:
+            classifier.classify(case["question"])
+    elapsed = (time.perf_counter() - start) / (rounds * len(cases))
+    print(f"平均耗时: {elapsed * 1e6:.1f} 微秒/问题")
+
+    print("\n" + "=" * 70)
+    print("✅ 测试完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ class QwenClient:
         """
         self.api_key = api_key
         self.model = model
+        # dashscope SDK 不支持注入HTTP客户端，无法使用共享连接池
         dashscope.api_key = api_key
 
     def complete(
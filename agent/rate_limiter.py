@@ -0,0 +1,253 @@
+"""
+LLM 调用速率限制
+按提供方分别限制每分钟请求数（RPM）和每分钟token数（TPM），
+等待者按优先级 + 先来先到排队，交互式对话优先于批量任务
+"""
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Iterator
+
+from ..config import Config
+from .llm_factory import LLMClientBase
+
+
+# 请求优先级（数值越小越优先）
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "llm_request_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    在当前上下文中设置LLM请求优先级
+
+    Examples:
+        with request_priority(PRIORITY_BATCH):
+            agent.ask(question)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """当前上下文的LLM请求优先级"""
+    return _priority.get()
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """粗略估算文本token数（中文约1.5字/token，宁多勿少）"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / 1.5)
+
+
+class TokenBucket:
+    """令牌桶：容量为每分钟额度，按秒匀速补充"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """还需等待多久才有足够的令牌（秒）"""
+        self._refill(now)
+        # 单次请求超过桶容量时按满桶计算，避免永远等不到
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderScheduler:
+    """
+    单个提供方的调度器
+
+    同时检查RPM和TPM两个令牌桶；等待者放在按 (优先级, 到达顺序) 排序的堆里，
+    只有队首能取令牌，保证同优先级先来先到、不被后来者插队。
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0):
+        """
+        初始化调度器
+
+        Args:
+            name: 提供方名称
+            rpm: 每分钟请求数上限（0表示不限制）
+            tpm: 每分钟token数上限（0表示不限制）
+        """
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._waiters: List[tuple[int, int]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了任何限制"""
+        return self.requests is not None or self.tokens is not None
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def acquire(self, tokens: int = 0, priority: Optional[int] = None) -> float:
+        """
+        阻塞直到可以发出一次请求
+
+        Args:
+            tokens: 本次请求预计消耗的token数
+            priority: 优先级，为None则使用当前上下文的优先级
+
+        Returns:
+            排队等待的时间（秒）
+        """
+        if not self.enabled:
+            return 0.0
+
+        priority = current_priority() if priority is None else priority
+        entry = (priority, next(self._counter))
+        started = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        wait = self._wait_time(tokens, time.monotonic())
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                # 无论成功还是被中断都要出队，并唤醒下一个队首
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+
+        return time.monotonic() - started
+
+
+# 同一进程内每个提供方共享一个调度器
+_schedulers: Dict[str, ProviderScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    """获取（或按Config创建）提供方的调度器"""
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            _schedulers[provider] = ProviderScheduler(
+                provider,
+                rpm=Config.LLM_RPM_LIMITS.get(provider, 0),
+                tpm=Config.LLM_TPM_LIMITS.get(provider, 0)
+            )
+        return _schedulers[provider]
+
+
+class RateLimitedClient(LLMClientBase):
+    """为LLM客户端加上速率限制的包装器"""
+
+    def __init__(self, client: LLMClientBase, provider: str):
+        """
+        初始化包装器
+
+        Args:
+            client: 被包装的LLM客户端
+            provider: 提供方名称（决定使用哪组限额）
+        """
+        self.client = client
+        self.provider = provider
+        self.scheduler = get_scheduler(provider)
+
+    @property
+    def caches_system_prompt(self) -> bool:
+        return getattr(self.client, "caches_system_prompt", False)
+
+    def __getattr__(self, name):
+        # 其余属性（model、max_tokens 等）透传给被包装的客户端
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _acquire(self, text: str, max_tokens: Optional[int]):
+        # 多数提供方按 输入 + max_tokens 预占TPM额度，这里同样保守估算
+        output_tokens = max_tokens or getattr(self.client, "max_tokens", None) or Config.MAX_TOKENS
+        self.scheduler.acquire(estimate_tokens(text) + output_tokens)
+
+    def complete(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        self._acquire((system or "") + prompt, max_tokens)
+        return self.client.complete(
+            prompt=prompt,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        text = (system or "") + "".join(m.get("content", "") for m in messages)
+        self._acquire(text, max_tokens)
+        return self.client.chat(
+            messages=messages,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
+    def complete_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        self._acquire((system or "") + prompt, max_tokens)
+        yield from self.client.complete_stream(
+            prompt=prompt,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
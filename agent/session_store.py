@@ -0,0 +1,206 @@
+"""
+会话存储
+按 session_id 管理多个对话：内存中只保留有限数量的活跃会话（LRU），
+不活跃的会话以紧凑格式写入 SQLite，再次访问时加载回内存
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from ..models import Answer, ConversationTurn, QuestionType, SituationFact
+from ..config import Config
+from .conversation_manager import ConversationManager
+
+
+class SessionStore:
+    """多会话存储（内存LRU + SQLite）"""
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        db_path: Optional[Path] = None,
+        max_history: int = 10
+    ):
+        """
+        初始化会话存储
+
+        Args:
+            capacity: 内存中最多保留的会话数（为None则读取Config）
+            db_path: SQLite 数据库路径（为None则读取Config）
+            max_history: 每个会话保留的对话轮数
+        """
+        self.capacity = max(1, capacity or Config.SESSION_CACHE_SIZE)
+        self.db_path = Path(db_path or Config.SESSION_DB_PATH)
+        self.max_history = max_history
+
+        self._hot: "OrderedDict[str, ConversationManager]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, session_id: str) -> ConversationManager:
+        """
+        获取会话（不存在时创建新会话）
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            对话管理器
+        """
+        with self._lock:
+            manager = self._hot.get(session_id)
+            if manager is not None:
+                self._hot.move_to_end(session_id)
+                return manager
+
+            manager = self._load(session_id) or ConversationManager(
+                max_history=self.max_history, compact=True
+            )
+            self._insert(session_id, manager)
+            return manager
+
+    def put(self, session_id: str, manager: ConversationManager):
+        """
+        放回会话（请求处理完毕后调用）
+
+        请求处理期间会话可能已被换出到磁盘，放回时以内存中的最新状态为准。
+
+        Args:
+            session_id: 会话ID
+            manager: 对话管理器
+        """
+        with self._lock:
+            if self._hot.get(session_id) is manager:
+                self._hot.move_to_end(session_id)
+            else:
+                self._insert(session_id, manager)
+
+    def delete(self, session_id: str):
+        """删除会话"""
+        with self._lock:
+            self._hot.pop(session_id, None)
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def flush(self):
+        """把内存中的所有会话写入磁盘（服务关闭时调用）"""
+        with self._lock:
+            for session_id, manager in self._hot.items():
+                self._save(session_id, manager)
+            self._db.commit()
+
+    def close(self):
+        """写入所有会话并关闭数据库"""
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        """
+        获取统计信息
+
+        Returns:
+            {hot: 内存中的会话数, stored: 磁盘上的会话数}
+        """
+        with self._lock:
+            stored = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {"hot": len(self._hot), "stored": stored}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._hot)
+
+    # ==================== 内部方法（调用方持有锁） ====================
+
+    def _insert(self, session_id: str, manager: ConversationManager):
+        self._hot[session_id] = manager
+        self._hot.move_to_end(session_id)
+
+        # 超出容量时把最久未使用的会话写入磁盘
+        evicted = False
+        while len(self._hot) > self.capacity:
+            cold_id, cold_manager = self._hot.popitem(last=False)
+            self._save(cold_id, cold_manager)
+            evicted = True
+        if evicted:
+            self._db.commit()
+
+    def _save(self, session_id: str, manager: ConversationManager):
+        data = {
+            "user_info": manager.context.user_info,
+            "summary": manager.context.summary,
+            "facts": {name: fact.model_dump() for name, fact in manager.context.facts.items()},
+            "turn_count": manager.context.turn_count,
+            "turns": [_turn_to_dict(turn) for turn in manager.context.turns],
+        }
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(data, ensure_ascii=False, default=str), time.time())
+        )
+
+    def _load(self, session_id: str) -> Optional[ConversationManager]:
+        row = self._db.execute(
+            "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        data = json.loads(row[0])
+        manager = ConversationManager(max_history=self.max_history, compact=True)
+        manager.context.user_info = data.get("user_info", {})
+        manager.context.summary = data.get("summary", "")
+        manager.context.facts = {
+            name: SituationFact(**fact) for name, fact in data.get("facts", {}).items()
+        }
+        manager.context.turn_count = data.get("turn_count", len(manager.context.turns))
+        manager.context.turns = [_turn_from_dict(item) for item in data.get("turns", [])]
+        return manager
+
+
+def _turn_to_dict(turn: ConversationTurn) -> dict:
+    """对话轮次的紧凑表示（问题、回答正文、文档ID和相关度）"""
+    answer = turn.answer
+    return {
+        "question": turn.question,
+        "answer": answer.answer_text,
+        "question_type": answer.question_type.name,
+        "confidence": answer.confidence,
+        "sources": answer.sources,
+        "doc_ids": turn.doc_ids,
+        "doc_scores": turn.doc_scores,
+        "timestamp": turn.timestamp.isoformat(),
+    }
+
+
+def _turn_from_dict(item: dict) -> ConversationTurn:
+    """从紧凑表示恢复对话轮次（不含文档内容）"""
+    timestamp = datetime.fromisoformat(item["timestamp"])
+    answer = Answer(
+        question=item["question"],
+        answer_text=item["answer"],
+        question_type=QuestionType[item["question_type"]],
+        confidence=item["confidence"],
+        sources=item.get("sources", []),
+        created_at=timestamp
+    )
+    return ConversationTurn(
+        question=item["question"],
+        answer=answer,
+        doc_ids=item.get("doc_ids", []),
+        doc_scores=item.get("doc_scores", []),
+        timestamp=timestamp
+    )
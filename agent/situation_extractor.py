@@ -0,0 +1,264 @@
+"""
+用户情况抽取
+每轮对话加入时增量抽取工作年限、月工资、离职原因、通知期和城市，
+支持中文数字和万/千单位，并记录每个字段的出处
+"""
+import re
+from typing import Optional, Dict
+
+from ..models import SituationFact
+
+
+_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+           "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_UNITS = {"十": 10, "百": 100, "千": 1000, "k": 1000, "K": 1000}
+_WAN = {"万", "w", "W"}
+
+_NUMBER_TOKEN = re.compile(r'\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百千万kKwW]')
+
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    解析阿拉伯数字、中文数字及混合写法
+
+    支持 "8000"、"1.5万"、"1万5"、"8千"、"12k"、"二十五"、"五千五"、"一百零五" 等。
+
+    Args:
+        text: 数字文本
+
+    Returns:
+        数值，无法解析时返回None
+    """
+    tokens = _NUMBER_TOKEN.findall(text)
+    if not tokens:
+        return None
+
+    total = 0.0       # 已完成的"万"以上部分
+    section = 0.0     # 当前"万"以内部分
+    number = None     # 尚未乘单位的数字
+    last_unit = None  # 上一个单位，用于"五千五"这类省略末位单位的口语写法
+    zero_seen = False
+
+    for token in tokens:
+        if token in _WAN:
+            section += number or 0.0
+            total += (section or 1.0) * 10000
+            section, number, last_unit, zero_seen = 0.0, None, 10000, False
+        elif token in _UNITS:
+            section += (1.0 if number is None else number) * _UNITS[token]
+            number, last_unit, zero_seen = None, _UNITS[token], False
+        elif token in _DIGITS:
+            number = float(_DIGITS[token])
+            zero_seen = zero_seen or number == 0
+        else:
+            number = float(token)
+
+    if number is not None:
+        if last_unit and not zero_seen and number < 10:
+            # "五千五" = 5500，"1万5" = 15000
+            number *= last_unit / 10
+        section += number
+
+    return total + section
+
+
+# 数字（不含"万"，用于年限、天数等）和金额（可带万/千单位）
+_NUM = r'(?:\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百千]+)'
+_AMOUNT = (
+    r'(?:\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百千万]+)'
+    r'(?:\s*[万千kKwW](?:\d+|[一二三四五六七八九])?)?'
+)
+# 金额后不能紧跟更多数字或表示次数、时长的量词（如"工资3个月没发"）
+_AMOUNT_END = r'(?![\d.零〇一二两三四五六七八九十百千万]|\s*(?:个|年|天|次|号|日|%|岁|周))'
+
+_YEARS = re.compile(
+    rf'(?P<years>{_NUM})\s*年(?P<half>半)?(?:零?(?P<months>{_NUM})\s*个?月)?(?!薪|终|假|级)'
+)
+_MONTHS = re.compile(rf'(?:工作|干|做|入职|在职|上班|待)了?\s*(?P<months>{_NUM})\s*个?月')
+_HALF_YEAR = re.compile(r'(?:工作|干|做|入职|在职|上班|待)了?\s*半年')
+
+_SALARY_AFTER = re.compile(
+    rf'(?P<keyword>月薪|月工资|月收入|年薪|工资|薪资|薪水|收入|底薪)'
+    rf'[^\d，。,；;！？!?\n]{{0,6}}?(?P<amount>{_AMOUNT}){_AMOUNT_END}'
+)
+_SALARY_BEFORE = re.compile(
+    rf'(?P<amount>{_AMOUNT})\s*(?:元|块)?\s*(?:/|每|一)\s*个?月'
+)
+_SALARY_PER_MONTH = re.compile(
+    rf'(?:每个?月|一个月|月入)[^\d，。,；;！？!?\n]{{0,4}}?(?P<amount>{_AMOUNT}){_AMOUNT_END}'
+)
+
+# 离职情形按优先级分组：用人单位过错优先于劳动者过错，其余情形最后
+_TERMINATION_FAULT = re.compile(
+    r'违法解除|违法辞退|非法辞退|恶意辞退|无故辞退|违法裁员|被迫辞职|被迫离职|被迫解除'
+)
+_TERMINATION_MISCONDUCT = re.compile(
+    r'严重违纪|严重违反|主动辞职|自己辞职|个人原因辞职|不符合录用条件'
+)
+_TERMINATION_OTHER = re.compile(
+    r'协商解除|协商离职|合同到期|不续签|公司倒闭|倒闭'
+    r'|被裁员?|裁员|被辞退|被开除|被解雇|辞退|开除|解雇|辞职'
+)
+# 对解除理由有异议
+_DISPUTE = re.compile(r'不服|说我|称我|认为我|冤枉|不认可|不承认')
+# 劳动者过错与用人单位过错或异议同时出现时记录的离职情形
+TERMINATION_DISPUTED = "存在争议"
+
+_NOTICE_NONE = re.compile(r'未提前|没有?提前|当天通知|突然(?:通知|辞退|解除|开除)')
+_NOTICE = re.compile(rf'提前\s*(?P<amount>{_NUM})\s*(?P<unit>天|日|个?月|周|星期)')
+_NOTICE_DAYS = {"天": 1, "日": 1, "月": 30, "个月": 30, "周": 7, "星期": 7}
+
+_CITY = re.compile(
+    r'北京|上海|天津|重庆|广州|深圳|杭州|南京|苏州|成都|武汉|西安|长沙|郑州|东莞|佛山'
+    r'|宁波|无锡|青岛|济南|合肥|福州|厦门|昆明|沈阳|大连|哈尔滨|长春|石家庄|太原'
+    r'|南昌|南宁|贵阳|海口|兰州|银川|西宁|呼和浩特|乌鲁木齐|拉萨|珠海|中山|惠州'
+    r'|(?:在|到|去|于|住)?(?P<city>[一-龥]{2,3}?)(?<![城都超])市'
+)
+
+# 超出此范围的年限多半是年份（如"2023年"）
+_MAX_WORK_YEARS = 60
+# 低于此值的"工资"多半不是月工资金额
+_MIN_SALARY = 100
+
+
+class SituationExtractor:
+    """用户情况抽取器（预编译正则，单次扫描一段文本）"""
+
+    FIELDS = ["work_years", "monthly_salary", "termination_reason", "notice_period", "city"]
+
+    # 写入提示词时的字段名称和单位
+    LABELS = {
+        "work_years": ("工作年限", "年"),
+        "monthly_salary": ("月工资", "元"),
+        "termination_reason": ("离职情形", ""),
+        "notice_period": ("提前通知天数", "天"),
+        "city": ("工作城市", ""),
+    }
+
+    def extract(self, text: str, turn: Optional[int] = None) -> Dict[str, SituationFact]:
+        """
+        从一段文本中抽取用户情况
+
+        Args:
+            text: 用户问题
+            turn: 文本所在的对话轮次（当前问题为None）
+
+        Returns:
+            {字段名: 抽取结果}（只包含抽取到的字段）
+        """
+        facts: Dict[str, SituationFact] = {}
+        if not text:
+            return facts
+
+        for name, finder in (
+            ("work_years", self._work_years),
+            ("monthly_salary", self._monthly_salary),
+            ("termination_reason", self._termination_reason),
+            ("notice_period", self._notice_period),
+            ("city", self._city),
+        ):
+            found = finder(text)
+            if found is not None:
+                value, source = found
+                facts[name] = SituationFact(value=value, source=source, turn=turn)
+
+        return facts
+
+    @staticmethod
+    def _work_years(text: str) -> Optional[tuple[float, str]]:
+        for match in _YEARS.finditer(text):
+            years = parse_number(match.group("years"))
+            if years is None or years > _MAX_WORK_YEARS:
+                continue
+            if match.group("half"):
+                years += 0.5
+            elif match.group("months"):
+                years += (parse_number(match.group("months")) or 0) / 12
+            return round(years, 4), match.group(0)
+
+        match = _MONTHS.search(text)
+        if match:
+            months = parse_number(match.group("months"))
+            if months is not None:
+                return round(months / 12, 4), match.group(0)
+
+        match = _HALF_YEAR.search(text)
+        if match:
+            return 0.5, match.group(0)
+        return None
+
+    @staticmethod
+    def _monthly_salary(text: str) -> Optional[tuple[float, str]]:
+        for pattern in (_SALARY_AFTER, _SALARY_BEFORE, _SALARY_PER_MONTH):
+            for match in pattern.finditer(text):
+                amount = parse_number(match.group("amount"))
+                if amount is None:
+                    continue
+                if match.groupdict().get("keyword") == "年薪":
+                    amount /= 12
+                if amount >= _MIN_SALARY:
+                    return round(amount, 2), match.group(0)
+        return None
+
+    @staticmethod
+    def _termination_reason(text: str) -> Optional[tuple[str, str]]:
+        text = text.lower()
+        fault = _TERMINATION_FAULT.search(text)
+        misconduct = _TERMINATION_MISCONDUCT.search(text)
+        if misconduct:
+            dispute = fault or _DISPUTE.search(text)
+            if dispute:
+                # 如"公司严重违反规定，我被迫辞职""公司说我严重违纪，我不服"：是否有补偿取决于事实认定
+                return TERMINATION_DISPUTED, f"{misconduct.group(0)}…{dispute.group(0)}"
+
+        match = fault or misconduct or _TERMINATION_OTHER.search(text)
+        if match:
+            return match.group(0), match.group(0)
+        return None
+
+    @staticmethod
+    def _notice_period(text: str) -> Optional[tuple[int, str]]:
+        match = _NOTICE_NONE.search(text)
+        if match:
+            return 0, match.group(0)
+
+        match = _NOTICE.search(text)
+        if match:
+            amount = parse_number(match.group("amount"))
+            if amount is not None:
+                return int(amount * _NOTICE_DAYS[match.group("unit")]), match.group(0)
+        return None
+
+    @staticmethod
+    def _city(text: str) -> Optional[tuple[str, str]]:
+        match = _CITY.search(text)
+        if match:
+            return match.group("city") or match.group(0), match.group(0)
+        return None
+
+
+def main():
+    """测试用户情况抽取"""
+    print("🧪 测试用户情况抽取")
+    print("=" * 70)
+
+    extractor = SituationExtractor()
+    texts = [
+        "我在深圳工作了5年半，月薪1.5万，被公司辞退了",
+        "工作了三年零六个月，工资大概是八千五，公司没有提前通知",
+        "入职18个月，税前工资3个月没发了，每月12k",
+        "2023年入职，年薪24万，公司提前一个月通知合同到期不续签",
+        "在杭州上班半年，工资五千五，主动辞职",
+    ]
+
+    for text in texts:
+        print(f"\n{text}")
+        for name, fact in extractor.extract(text).items():
+            print(f"  {name}: {fact.value}（来源: {fact.source}）")
+
+    print("\n" + "=" * 70)
+    print("✅ 测试完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 """
 from pathlib import Path
 from typing import Optional
-from .env_loader import get_api_key, get_rate_limit, load_env_file
+from .env_loader import get_api_key, get_rate_limit, get_number, load_env_file
 
 
 class Config:
@@ -59,6 +59,24 @@ class Config:
     EMBEDDING_MODEL: str = "text-embedding-3-small"  # OpenAI embedding模型
     ZHIPU_EMBEDDING_MODEL: str = "embedding-2"  # 智谱AI embedding模型
 
+    # ==================== 知识库构建配置 ====================
+    BUILD_DIR: Path = DATA_DIR / "build"  # 构建检查点目录（支持 build-kb --resume）
+    BUILD_QUEUE_SIZE: int = 8  # 流水线阶段之间的队列容量
+    BUILD_EMBED_BATCH_SIZE: int = 100  # 每个Embedding批次的文档块数（每批完成后写入检查点）
+    BUILD_PARSE_WORKERS: int = 0  # HTML清洗/解析进程数（0表示CPU核数，1表示单进程）
+    HTML_BACKEND: str = "bs4"  # HTML清洗/解析后端：bs4、lxml、selectolax（需安装）
+    CACHE_STORE: str = "files"  # 网页缓存存储：files（每页一个.html文件）、pack（压缩缓存包）
+    CACHE_COMPRESSION: str = "zstd"  # 压缩缓存包的压缩格式：zstd（需安装 zstandard）、gzip
+
+    # ==================== 网页抓取配置 ====================
+    CRAWL_MAX_CONCURRENCY: int = 16  # 所有主机合计同时进行的请求数上限
+    CRAWL_HOST_CONCURRENCY: int = 2  # 每个主机同时进行的请求数上限
+    CRAWL_HOST_RATE: float = 2.0  # 每个主机每秒最多发起的请求数（礼貌抓取，0表示不限制）
+    CRAWL_TIMEOUT: float = 30.0  # 网页请求超时（秒）
+    CRAWL_HTTP2: bool = False  # 是否启用HTTP/2（需安装 h2）
+    CRAWL_MAX_DEPTH: int = 0  # 构建知识库时从 TARGET_URLS 跟随链接的层数（0表示只抓取 TARGET_URLS）
+    CRAWL_MAX_PAGES: int = 200  # 跟随链接抓取时最多抓取的网页数
+
     # ==================== LLM模型配置 ====================
 
     # Claude配置
@@ -81,6 +99,50 @@ class Config:
 
     MAX_TOKENS: int = 2000  # 最大生成token数
 
+    # 各提供方的速率限制（每分钟请求数 / 每分钟token数，0表示不限制）
+    # 可在 .env 中按提供方覆盖，如 DEEPSEEK_RPM=60, DEEPSEEK_TPM=100000
+    LLM_RPM_LIMITS: dict[str, int] = {
+        "litellm": 0, "claude": 0, "qwen": 0, "deepseek": 0, "zhipu": 0, "kimi": 0, "minimax": 0,
+    }
+    LLM_TPM_LIMITS: dict[str, int] = {
+        "litellm": 0, "claude": 0, "qwen": 0, "deepseek": 0, "zhipu": 0, "kimi": 0, "minimax": 0,
+    }
+
+    # ==================== HTTP连接池配置 ====================
+    HTTP_POOL_SIZE: int = 20  # 所有LLM提供方共享的最大连接数
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # 空闲连接保留时间（秒），超时后回收
+    HTTP_TIMEOUT: float = 60.0  # HTTP请求超时（秒）
+
+    # ==================== LLM降级链配置 ====================
+    # 按优先级排列的LLM提供方（如 ['deepseek', 'qwen', 'zhipu']），为空时只使用单一LLM
+    LLM_FALLBACK_PROVIDERS: list[str] = []
+    LLM_ATTEMPT_TIMEOUT: float = 30.0  # 单个提供方单次调用的超时时间（秒）
+    LLM_HEDGE: bool = False  # 是否启用对冲请求（主提供方超过p95延迟时并发请求下一个）
+    LLM_HEDGE_DELAY: float = 5.0  # 延迟样本不足时的对冲等待时间（秒）
+    LLM_BREAKER_FAILURES: int = 3  # 连续失败多少次后熔断
+    LLM_BREAKER_COOLDOWN: float = 30.0  # 熔断后多久允许试探请求（秒）
+
+    # ==================== 对话历史压缩配置 ====================
+    HISTORY_TOKEN_BUDGET: int = 1000  # 追问提示中对话历史（摘要 + 最新一轮）的token预算
+    HISTORY_SUMMARY_MODE: str = "extractive"  # extractive: 抽取式摘要；llm: 由LLM生成摘要
+
+    # ==================== 会话存储配置（HTTP服务） ====================
+    SESSION_CACHE_SIZE: int = 1000  # 内存中保留的活跃会话数，超出后写入SQLite
+    SESSION_DB_PATH: Path = DATA_DIR / "sessions.db"
+
+    # ==================== 问题分类配置 ====================
+    # 自定义关键词词典（JSON: {"CALCULATION": {"关键词": 权重}}），合并到默认词典
+    CLASSIFIER_LEXICON_PATH: Optional[Path] = None
+    # 关键词无明确结果时，是否使用 examples/test_cases.json 训练的n-gram小模型
+    CLASSIFIER_USE_MODEL: bool = False
+
+    # ==================== 补偿金计算配置 ====================
+    # 当地上年度职工月平均工资（用于第47条3倍封顶，未配置时不封顶）
+    LOCAL_AVERAGE_MONTHLY_WAGE: Optional[float] = None
+    # 计算类问题的处理方式: direct（本地计算直接回答，未配置社平工资时按 prompt 处理）,
+    # prompt（计算结果注入提示词）, off（关闭）
+    CALCULATOR_MODE: str = "direct"
+
     @classmethod
     def load(cls):
         """加载配置（从环境变量或.env文件）"""
@@ -103,6 +165,68 @@ class Config:
 
         cls.RATE_LIMIT_PER_SECOND = get_rate_limit(default=4)
 
+        # 加载知识库构建配置
+        cls.BUILD_QUEUE_SIZE = get_number('BUILD_QUEUE_SIZE', cls.BUILD_QUEUE_SIZE, int)
+        cls.BUILD_EMBED_BATCH_SIZE = get_number('BUILD_EMBED_BATCH_SIZE', cls.BUILD_EMBED_BATCH_SIZE, int)
+        cls.BUILD_PARSE_WORKERS = get_number('BUILD_PARSE_WORKERS', cls.BUILD_PARSE_WORKERS, int)
+        cls.HTML_BACKEND = (get_api_key('HTML_BACKEND') or cls.HTML_BACKEND).lower()
+        cls.CACHE_STORE = (get_api_key('CACHE_STORE') or cls.CACHE_STORE).lower()
+        cls.CACHE_COMPRESSION = (get_api_key('CACHE_COMPRESSION') or cls.CACHE_COMPRESSION).lower()
+
+        # 加载网页抓取配置
+        cls.CRAWL_MAX_CONCURRENCY = get_number('CRAWL_MAX_CONCURRENCY', cls.CRAWL_MAX_CONCURRENCY, int)
+        cls.CRAWL_HOST_CONCURRENCY = get_number('CRAWL_HOST_CONCURRENCY', cls.CRAWL_HOST_CONCURRENCY, int)
+        cls.CRAWL_HOST_RATE = get_number('CRAWL_HOST_RATE', cls.CRAWL_HOST_RATE)
+        cls.CRAWL_TIMEOUT = get_number('CRAWL_TIMEOUT', cls.CRAWL_TIMEOUT)
+        cls.CRAWL_HTTP2 = (get_api_key('CRAWL_HTTP2') or "").lower() in ("1", "true", "yes", "on")
+        cls.CRAWL_MAX_DEPTH = get_number('CRAWL_MAX_DEPTH', cls.CRAWL_MAX_DEPTH, int)
+        cls.CRAWL_MAX_PAGES = get_number('CRAWL_MAX_PAGES', cls.CRAWL_MAX_PAGES, int)
+
+        # 加载对话历史压缩配置
+        cls.HISTORY_TOKEN_BUDGET = get_number('HISTORY_TOKEN_BUDGET', cls.HISTORY_TOKEN_BUDGET, int)
+        cls.HISTORY_SUMMARY_MODE = (get_api_key('HISTORY_SUMMARY_MODE') or cls.HISTORY_SUMMARY_MODE).lower()
+
+        # 加载会话存储配置
+        cls.SESSION_CACHE_SIZE = get_number('SESSION_CACHE_SIZE', cls.SESSION_CACHE_SIZE, int)
+        session_db_path = get_api_key('SESSION_DB_PATH')
+        if session_db_path:
+            cls.SESSION_DB_PATH = Path(session_db_path)
+
+        # 加载问题分类配置
+        lexicon_path = get_api_key('CLASSIFIER_LEXICON_PATH')
+        cls.CLASSIFIER_LEXICON_PATH = Path(lexicon_path) if lexicon_path else None
+        cls.CLASSIFIER_USE_MODEL = (get_api_key('CLASSIFIER_USE_MODEL') or "").lower() in ("1", "true", "yes", "on")
+
+        # 加载补偿金计算配置
+        cls.LOCAL_AVERAGE_MONTHLY_WAGE = get_number('LOCAL_AVERAGE_MONTHLY_WAGE')
+        cls.CALCULATOR_MODE = (get_api_key('CALCULATOR_MODE') or cls.CALCULATOR_MODE).lower()
+
+        # 加载各提供方的速率限制
+        for provider in cls.LLM_RPM_LIMITS:
+            cls.LLM_RPM_LIMITS[provider] = get_number(
+                f'{provider.upper()}_RPM', cls.LLM_RPM_LIMITS[provider], int
+            )
+            cls.LLM_TPM_LIMITS[provider] = get_number(
+                f'{provider.upper()}_TPM', cls.LLM_TPM_LIMITS[provider], int
+            )
+
+        # 加载HTTP连接池配置
+        cls.HTTP_POOL_SIZE = get_number('HTTP_POOL_SIZE', cls.HTTP_POOL_SIZE, int)
+        cls.HTTP_KEEPALIVE_EXPIRY = get_number('HTTP_KEEPALIVE_EXPIRY', cls.HTTP_KEEPALIVE_EXPIRY)
+        cls.HTTP_TIMEOUT = get_number('HTTP_TIMEOUT', cls.HTTP_TIMEOUT)
+
+        # 加载LLM降级链配置（LLM_FALLBACK=deepseek,qwen,zhipu 或 auto）
+        fallback = (get_api_key('LLM_FALLBACK') or "").lower()
+        if fallback == "auto":
+            cls.LLM_FALLBACK_PROVIDERS = cls.available_llms()
+        else:
+            cls.LLM_FALLBACK_PROVIDERS = [p.strip() for p in fallback.split(",") if p.strip()]
+        cls.LLM_ATTEMPT_TIMEOUT = get_number('LLM_ATTEMPT_TIMEOUT', cls.LLM_ATTEMPT_TIMEOUT)
+        cls.LLM_HEDGE = (get_api_key('LLM_HEDGE') or "").lower() in ("1", "true", "yes", "on")
+        cls.LLM_HEDGE_DELAY = get_number('LLM_HEDGE_DELAY', cls.LLM_HEDGE_DELAY)
+        cls.LLM_BREAKER_FAILURES = get_number('LLM_BREAKER_FAILURES', cls.LLM_BREAKER_FAILURES, int)
+        cls.LLM_BREAKER_COOLDOWN = get_number('LLM_BREAKER_COOLDOWN', cls.LLM_BREAKER_COOLDOWN)
+
         # 加载LLM模式配置
         env_vars = load_env_file()
         if 'LLM_MODE' in env_vars:
@@ -137,6 +261,19 @@ class Config:
         else:
             return None
 
+    @classmethod
+    def available_llms(cls) -> list[str]:
+        """按自动选择的优先级列出所有已配置的LLM（不含LiteLLM）"""
+        candidates = [
+            ("deepseek", cls.DEEPSEEK_API_KEY),
+            ("qwen", cls.DASHSCOPE_API_KEY),
+            ("zhipu", cls.ZHIPUAI_API_KEY),
+            ("kimi", cls.KIMI_API_KEY),
+            ("minimax", cls.MINIMAX_API_KEY),
+            ("claude", cls.CLAUDE_API_KEY),
+        ]
+        return [name for name, key in candidates if key]
+
     @classmethod
     def auto_select_embedding(cls) -> str:
         """自动选择可用的Embedding"""
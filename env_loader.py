@@ -134,6 +134,28 @@ def get_rate_limit(default: int = 4) -> int:
     return default
 
 
+def get_number(key_name: str, default=None, cast=float):
+    """
+    获取数值型配置（环境变量或 .env 文件）
+
+    Args:
+        key_name: 配置名称
+        default: 未配置或格式错误时的默认值
+        cast: 类型转换函数（float / int）
+
+    Returns:
+        转换后的数值或默认值
+    """
+    value = get_api_key(key_name)
+    if value is None:
+        return default
+
+    try:
+        return cast(value)
+    except ValueError:
+        return default
+
+
 def print_api_key_status():
     """打印 API 密钥状态信息"""
     claude_key = get_claude_api_key()
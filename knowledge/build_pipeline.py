@@ -0,0 +1,741 @@
+"""
+知识库构建流水线
+抓取 → 解析 → 分块/生成文档 → Embedding → 索引，各阶段在独立线程中并行运行，
+阶段之间用有界队列衔接；每个阶段的产出写入检查点，中断后可从最后完成的单元继续。
+已有索引时按构建清单增量更新，只重新处理变化的来源
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Optional, List, Dict, Callable, TYPE_CHECKING
+
+from ..models import Document, StructuredContent
+from ..config import Config
+from .embedding_factory import create_embedding_client, EmbeddingClientBase
+from .document_chunker import DocumentChunker
+from .vector_indexer import VectorIndexer
+
+if TYPE_CHECKING:
+    from ..scraper.cache_store import CacheStore
+
+
+# 队列结束标记
+_DONE = object()
+
+
+class BuildCancelled(Exception):
+    """流水线已因其他阶段出错而中止"""
+
+
+def _atomic_write(path: Path, data: bytes):
+    """先写临时文件再替换，避免中断时留下不完整的检查点"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def content_hash(text: str) -> str:
+    """文本内容哈希（用于确认检查点中的向量对应的是同一段文本）"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class BuildCheckpoint:
+    """
+    构建检查点
+
+    目录结构（默认 DATA_DIR/build）:
+        parsed/<key>.json          解析后的结构化内容（连同所解析网页的内容哈希）
+        chunks/<key>.json          分块清单（不含向量，连同所解析网页的内容哈希）
+        embeddings/batch-N.pkl     已完成的Embedding批次 [(文档ID, 内容哈希, 向量)]
+        state.json                 构建状态（Embedding客户端、是否完成）
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        初始化检查点目录
+
+        Args:
+            root: 检查点根目录（如果为None则使用 Config.BUILD_DIR）
+        """
+        self.root = Path(root or Config.BUILD_DIR)
+        self.parsed_dir = self.root / "parsed"
+        self.chunks_dir = self.root / "chunks"
+        self.embeddings_dir = self.root / "embeddings"
+        self.state_path = self.root / "state.json"
+        self._batch_lock = threading.Lock()
+        self._next_batch = 0
+        self._ensure_dirs()
+
+    def _ensure_dirs(self):
+        for directory in (self.parsed_dir, self.chunks_dir, self.embeddings_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def reset(self):
+        """清空所有检查点（全新构建）"""
+        if self.root.exists():
+            shutil.rmtree(self.root)
+        self._ensure_dirs()
+        self._next_batch = 0
+
+    def clear_embeddings(self):
+        """清空Embedding检查点（Embedding客户端变化时）"""
+        shutil.rmtree(self.embeddings_dir, ignore_errors=True)
+        self.embeddings_dir.mkdir(parents=True, exist_ok=True)
+        self._next_batch = 0
+
+    # ==================== 解析结果 ====================
+
+    def _load(self, path: Path, source: str) -> Optional[dict]:
+        """读取检查点，网页内容已变化（或没有记录内容哈希）时返回None"""
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, dict) or data.get("source") != source:
+            return None
+        return data
+
+    def load_parsed(self, key: str, source: str) -> Optional[StructuredContent]:
+        """
+        读取解析检查点
+
+        Args:
+            key: 来源键
+            source: 缓存中网页当前的内容哈希（与检查点记录的不一致时丢弃检查点）
+        """
+        data = self._load(self.parsed_dir / f"{key}.json", source)
+        if data is None:
+            return None
+        return StructuredContent.model_validate(data["content"])
+
+    def save_parsed(self, key: str, content: StructuredContent, source: str):
+        data = {"source": source, "content": content.model_dump(mode="json")}
+        _atomic_write(self.parsed_dir / f"{key}.json", json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    # ==================== 分块清单 ====================
+
+    def load_chunks(self, key: str, source: str) -> Optional[List[Document]]:
+        """读取分块检查点（网页内容已变化时返回None）"""
+        data = self._load(self.chunks_dir / f"{key}.json", source)
+        if data is None:
+            return None
+        return [Document.model_validate(item) for item in data["chunks"]]
+
+    def save_chunks(self, key: str, documents: List[Document], source: str):
+        items = [doc.model_dump(mode="json", exclude={"embedding"}) for doc in documents]
+        _atomic_write(
+            self.chunks_dir / f"{key}.json",
+            json.dumps({"source": source, "chunks": items}, ensure_ascii=False).encode("utf-8")
+        )
+
+    # ==================== Embedding批次 ====================
+
+    def load_embeddings(self) -> Dict[tuple[str, str], List[float]]:
+        """
+        加载所有已完成的Embedding批次
+
+        Returns:
+            {(文档ID, 内容哈希): 向量}
+        """
+        embeddings = {}
+        batch_files = sorted(self.embeddings_dir.glob("batch-*.pkl"))
+        for path in batch_files:
+            with open(path, "rb") as f:
+                for doc_id, digest, vector in pickle.load(f):
+                    embeddings[(doc_id, digest)] = vector
+
+        with self._batch_lock:
+            self._next_batch = max(self._next_batch, len(batch_files))
+        return embeddings
+
+    def save_embeddings(self, items: List[tuple[str, str, List[float]]]):
+        """
+        写入一个已完成的Embedding批次
+
+        Args:
+            items: [(文档ID, 内容哈希, 向量)]
+        """
+        with self._batch_lock:
+            number = self._next_batch
+            self._next_batch += 1
+        _atomic_write(self.embeddings_dir / f"batch-{number:05d}.pkl", pickle.dumps(items))
+
+    # ==================== 构建状态 ====================
+
+    def read_state(self) -> dict:
+        if not self.state_path.exists():
+            return {}
+        return json.loads(self.state_path.read_text(encoding="utf-8"))
+
+    def write_state(self, **fields):
+        state = self.read_state()
+        state.update(fields)
+        _atomic_write(self.state_path, json.dumps(state, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+class BuildManifest:
+    """
+    构建清单（与索引一起保存在 VECTORS_DIR/manifest.json）
+
+    每个来源记录: 原始HTML的内容哈希、缓存版本（文件大小和修改时间，压缩缓存包中为原始大小和偏移量）、
+    构建设置（清洗/解析版本、分块参数、Embedding模型）以及生成的文档块ID。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        加载构建清单
+
+        Args:
+            path: 清单文件路径（如果为None则使用 VECTORS_DIR/manifest.json）
+        """
+        self.path = Path(path or Config.VECTORS_DIR / "manifest.json")
+        self.sources: Dict[str, dict] = {}
+        if self.path.exists():
+            self.sources = json.loads(self.path.read_text(encoding="utf-8")).get("sources", {})
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def is_current(self, key: str, store: "CacheStore", settings: dict) -> bool:
+        """
+        来源是否与上次构建时一致
+
+        缓存版本未变时直接判定为未变化（不读取内容）；
+        否则比较内容哈希，只是版本变化（如文件被重写、迁移到压缩缓存包）时顺便更新记录。
+
+        Args:
+            key: 来源键（缓存键）
+            store: 网页缓存存储
+            settings: 当前构建设置
+
+        Returns:
+            是否可以跳过
+        """
+        entry = self.sources.get(key)
+        if entry is None or entry.get("settings") != settings:
+            return False
+
+        size, version = store.signature(key)
+        if entry.get("size") == size and entry.get("mtime_ns") == version:
+            return True
+
+        if entry.get("hash") == store.content_hash(key):
+            entry["size"], entry["mtime_ns"] = size, version
+            return True
+        return False
+
+    def record(self, key: str, store: "CacheStore", url: str, settings: dict, chunk_ids: List[str], complete: bool):
+        """
+        记录一个来源的构建结果
+
+        Args:
+            complete: 是否所有文档块都已入索引（否则不记录哈希，下次构建时重新处理）
+        """
+        size, version = store.signature(key)
+        self.sources[key] = {
+            "url": url,
+            "hash": store.content_hash(key) if complete else "",
+            "size": size if complete else -1,
+            "mtime_ns": version if complete else -1,
+            "settings": settings,
+            "chunk_ids": chunk_ids,
+        }
+
+    def remove(self, key: str) -> List[str]:
+        """删除来源记录，返回其文档块ID"""
+        entry = self.sources.pop(key, None)
+        return entry.get("chunk_ids", []) if entry else []
+
+    def save(self):
+        data = {"sources": self.sources}
+        _atomic_write(self.path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+class BuildPipeline:
+    """知识库构建流水线"""
+
+    def __init__(
+        self,
+        embedding_client: Optional[EmbeddingClientBase] = None,
+        chunker: Optional[DocumentChunker] = None,
+        checkpoint: Optional[BuildCheckpoint] = None,
+        manifest: Optional[BuildManifest] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        parse_workers: Optional[int] = None,
+        generate_docs: bool = True
+    ):
+        """
+        初始化流水线
+
+        Args:
+            embedding_client: Embedding客户端（如果为None则自动选择）
+            chunker: 文档分块器
+            checkpoint: 检查点（如果为None则使用 Config.BUILD_DIR）
+            manifest: 构建清单（如果为None则使用 VECTORS_DIR/manifest.json）
+            queue_size: 阶段之间的队列容量（如果为None则读取Config）
+            batch_size: 每个Embedding批次的文档块数（如果为None则读取Config）
+            parse_workers: 解析进程数（如果为None则读取Config，0表示CPU核数，1表示不使用进程池）
+            generate_docs: 是否同时生成Markdown文档
+        """
+        self.embedding_client = embedding_client or create_embedding_client()
+        self.chunker = chunker or DocumentChunker()
+        self.checkpoint = checkpoint or BuildCheckpoint()
+        self.manifest = manifest or BuildManifest()
+        self.queue_size = queue_size or Config.BUILD_QUEUE_SIZE
+        self.batch_size = batch_size or Config.BUILD_EMBED_BATCH_SIZE
+        workers = Config.BUILD_PARSE_WORKERS if parse_workers is None else parse_workers
+        self.parse_workers = workers or os.cpu_count() or 1
+        self.generate_docs = generate_docs
+
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self) -> dict:
+        """影响构建结果的设置（任何一项变化都需要重新处理来源）"""
+        from ..scraper import HTMLCleaner, ContentParser
+
+        client = self.embedding_client
+        return {
+            "cleaner": HTMLCleaner.VERSION,
+            "parser": ContentParser.VERSION,
+            "chunk_size": self.chunker.chunk_size,
+            "chunk_overlap": self.chunker.chunk_overlap,
+            "embedding": f"{type(client).__name__}:{getattr(client, 'model', '')}",
+            "dimension": client.get_embedding_dimension(),
+        }
+
+    def run(
+        self,
+        scrape: bool = True,
+        use_cache: bool = True,
+        resume: bool = False,
+        incremental: bool = True
+    ) -> Optional[VectorIndexer]:
+        """
+        运行流水线并保存索引
+
+        Args:
+            scrape: 是否抓取 Config.TARGET_URLS（否则只处理缓存中已有的网页）
+            use_cache: 抓取时是否使用已缓存的网页
+            resume: 是否从上次中断处继续（否则清空检查点重新构建）
+            incremental: 已有索引和构建清单时只处理变化的来源并修补索引
+
+        Returns:
+            构建好的索引器，没有可索引的内容时返回None
+        """
+        from ..scraper.cache_store import open_cache_store
+
+        self._stop.clear()
+        self._error = None
+        self._documents: Dict[str, List[Document]] = {}
+        self._source_order: List[str] = []
+        self._source_hashes: Dict[str, str] = {}
+        self._seen_keys = set()
+        self._stats = {"sources": 0, "skipped": 0, "parsed": 0, "parse_failed": 0, "resumed": 0,
+                       "chunks": 0, "embedded": 0, "embed_failed": 0}
+
+        self._settings = self.settings
+        self._store = open_cache_store()
+        self._base_index = self._load_base_index() if incremental else None
+        if self._base_index is None:
+            self.manifest.sources = {}
+
+        self._prepare_checkpoint(resume)
+        self._embeddings = self.checkpoint.load_embeddings() if resume else {}
+        if self._embeddings:
+            print(f"📦 从检查点恢复 {len(self._embeddings)} 个已完成的向量")
+
+        sources: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        parsed: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        chunks: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        stages = [
+            ("抓取", lambda: self._source_stage(sources, scrape, use_cache)),
+            ("解析", lambda: self._parse_stage(sources, parsed, resume)),
+            ("分块", lambda: self._chunk_stage(parsed, chunks, resume)),
+            ("Embedding", lambda: self._embed_stage(chunks)),
+        ]
+        threads = [
+            threading.Thread(target=self._run_stage, args=(name, fn), name=f"build-{name}", daemon=True)
+            for name, fn in stages
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        self._print_stats()
+        return self._build_index()
+
+    # ==================== 阶段 ====================
+
+    def _run_stage(self, name: str, fn: Callable[[], None]):
+        """运行单个阶段，出错时中止整个流水线"""
+        try:
+            fn()
+        except BuildCancelled:
+            pass
+        except BaseException as e:
+            with self._lock:
+                if self._error is None:
+                    print(f"❌ {name}阶段失败: {e}")
+                    self._error = e
+            self._stop.set()
+
+    def _source_stage(self, outbox: queue.Queue, scrape: bool, use_cache: bool):
+        """产出待解析的缓存键：先产出刚抓取完成的网页，再产出缓存中的其余网页"""
+        seen = set()
+
+        def emit(key: str):
+            if key in seen or not self._store.exists(key):
+                return
+            seen.add(key)
+            self._seen_keys.add(key)
+            # 增量构建：与构建清单一致的来源直接跳过
+            if self._base_index is not None and self.manifest.is_current(key, self._store, self._settings):
+                self._stats["skipped"] += 1
+                return
+            self._put(outbox, key)
+
+        if scrape:
+            asyncio.run(self._scrape(emit, use_cache))
+
+        for key in self._store.keys():
+            emit(key)
+
+        if not seen:
+            raise FileNotFoundError(
+                f"没有找到缓存的HTML文件，请先抓取网页或手动添加HTML到 {Config.CACHE_DIR}"
+            )
+        self._put(outbox, _DONE)
+
+    async def _scrape(self, emit: Callable[[str], None], use_cache: bool):
+        from ..scraper import WebScraper, LinkCrawler, CrawlScope
+        from ..scraper.cache_index import cache_key
+
+        scraper = WebScraper()
+        urls = Config.TARGET_URLS
+        if Config.CRAWL_MAX_DEPTH > 0:
+            # 从目标URL出发跟随同站链接，扩充语料不需要手动维护URL列表
+            print(f"\n🚀 从 {len(urls)} 个网页开始跟随链接抓取（最多 {Config.CRAWL_MAX_DEPTH} 层、"
+                  f"{Config.CRAWL_MAX_PAGES} 个网页，抓取完成的网页立即进入解析）")
+            pages = LinkCrawler(CrawlScope.for_seeds(urls), scraper).crawl_iter(urls, use_cache)
+        else:
+            print(f"\n🚀 开始抓取 {len(urls)} 个网页（抓取完成的网页立即进入解析）")
+            pages = scraper.fetch_iter(urls, use_cache)
+
+        async for url, html in pages:
+            if html:
+                # 队列满时在线程中等待，不阻塞其他抓取任务
+                await asyncio.to_thread(emit, cache_key(url))
+
+    def _parse_stage(self, inbox: queue.Queue, outbox: queue.Queue, resume: bool):
+        """
+        解析阶段：清洗和解析分散到进程池中并行执行
+
+        同时在途的网页数不超过工作进程数的两倍，既让所有进程保持忙碌，
+        又不会一次性把所有网页读入内存。
+        """
+        from ..scraper.batch_parser import parse_cache_file
+
+        location = (str(self._store.cache_dir), self._store.name)
+        workers = self.parse_workers
+        if workers <= 1:
+            # 单进程：直接在当前线程中解析
+            while True:
+                key = self._get(inbox)
+                if key is _DONE:
+                    break
+                if not self._start_source(key, outbox, resume):
+                    self._finish_parse(parse_cache_file(key, *location), outbox)
+            self._put(outbox, _DONE)
+            return
+
+        # 工作线程中使用 fork 不安全，统一使用 spawn 启动工作进程
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            pending: Dict[Future, str] = {}
+            inbox_done = False
+
+            while not inbox_done or pending:
+                # 补充在途任务（有在途任务时不阻塞等待新网页）
+                while not inbox_done and len(pending) < workers * 2:
+                    if pending:
+                        try:
+                            key = inbox.get_nowait()
+                        except queue.Empty:
+                            break
+                    else:
+                        key = self._get(inbox)
+                    if key is _DONE:
+                        inbox_done = True
+                    elif not self._start_source(key, outbox, resume):
+                        pending[pool.submit(parse_cache_file, key, *location)] = key
+
+                if not pending:
+                    continue
+
+                done, _ = wait(list(pending), timeout=0.1, return_when=FIRST_COMPLETED)
+                if self._stop.is_set():
+                    for future in pending:
+                        future.cancel()
+                    raise BuildCancelled()
+
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # 工作进程异常退出等情况，只影响这一个网页
+                        result = (key, None, f"{type(e).__name__}: {e}")
+                    self._finish_parse(result, outbox)
+
+        self._put(outbox, _DONE)
+
+    def _start_source(self, key: str, outbox: queue.Queue, resume: bool) -> bool:
+        """
+        登记一个来源；继续构建且已有同一网页内容的解析检查点时直接产出
+
+        网页的内容哈希在解析前取得并随检查点保存：中断后网页被重新抓取（内容变化）时，
+        继续构建会丢弃旧的检查点重新解析。
+
+        Returns:
+            是否已从检查点产出（无需再解析）
+        """
+        self._stats["sources"] += 1
+        self._source_order.append(key)
+        source = self._source_hashes[key] = self._store.content_hash(key)
+
+        content = self.checkpoint.load_parsed(key, source) if resume else None
+        if content is None:
+            return False
+
+        self._stats["resumed"] += 1
+        self._emit_parsed(key, content, outbox)
+        return True
+
+    def _finish_parse(
+        self,
+        result: tuple[str, Optional[str], Optional[str]],
+        outbox: queue.Queue
+    ):
+        """处理一个网页的解析结果：写入检查点并产出"""
+        key, payload, error = result
+        if error is not None:
+            self._stats["parse_failed"] += 1
+            print(f"  ❌ 解析失败 {key}: {error}")
+            return
+
+        content = StructuredContent.model_validate_json(payload)
+        self.checkpoint.save_parsed(key, content, self._source_hashes[key])
+        self._emit_parsed(key, content, outbox)
+
+    def _emit_parsed(self, key: str, content: StructuredContent, outbox: queue.Queue):
+        self._stats["parsed"] += 1
+        print(f"  ✅ 解析 {key}: {content.title}（{len(content.sections)} 个章节）")
+        self._put(outbox, (key, content))
+
+    def _chunk_stage(self, inbox: queue.Queue, outbox: queue.Queue, resume: bool):
+        from .text_generator import TextGenerator
+
+        generator = TextGenerator() if self.generate_docs else None
+
+        while True:
+            item = self._get(inbox)
+            if item is _DONE:
+                break
+
+            key, content = item
+            if generator is not None:
+                try:
+                    generator.generate(content, format="md")
+                except Exception as e:
+                    print(f"  ⚠️  文档生成失败 {content.title}: {e}")
+
+            source = self._source_hashes[key]
+            documents = self.checkpoint.load_chunks(key, source) if resume else None
+            if documents is None:
+                documents = self.chunker.chunk_structured_content(content)
+                self.checkpoint.save_chunks(key, documents, source)
+
+            self._documents[key] = documents
+            self._stats["chunks"] += len(documents)
+            self._put(outbox, documents)
+
+        self._put(outbox, _DONE)
+
+    def _embed_stage(self, inbox: queue.Queue):
+        pending: List[Document] = []
+
+        while True:
+            documents = self._get(inbox)
+            if documents is _DONE:
+                break
+
+            for doc in documents:
+                vector = self._embeddings.get((doc.id, content_hash(doc.content)))
+                if vector is not None:
+                    doc.embedding = vector
+                else:
+                    pending.append(doc)
+
+            while len(pending) >= self.batch_size:
+                self._embed_batch(pending[:self.batch_size])
+                pending = pending[self.batch_size:]
+
+        if pending:
+            self._embed_batch(pending)
+
+    def _embed_batch(self, documents: List[Document]):
+        """生成一个批次的向量，成功的部分立即写入检查点"""
+        vectors = self.embedding_client.embed_batch(
+            [doc.content for doc in documents],
+            batch_size=len(documents),
+            show_progress=False
+        )
+
+        completed = []
+        for doc, vector in zip(documents, vectors):
+            # Embedding客户端在批次失败时返回零向量，这些文档不写入检查点，下次继续重试
+            if vector and any(vector):
+                doc.embedding = vector
+                completed.append((doc.id, content_hash(doc.content), vector))
+
+        if completed:
+            self.checkpoint.save_embeddings(completed)
+        self._stats["embedded"] += len(completed)
+        self._stats["embed_failed"] += len(documents) - len(completed)
+        print(f"  🔢 Embedding 批次完成: {len(completed)}/{len(documents)}")
+
+    # ==================== 索引 ====================
+
+    def _load_base_index(self) -> Optional[VectorIndexer]:
+        """加载已有索引作为增量构建的基础（没有索引或清单时返回None，进行全量构建）"""
+        index_path = Config.VECTORS_DIR / "index.faiss"
+        if not self.manifest.exists() or not index_path.exists():
+            return None
+
+        indexer = VectorIndexer(embedding_client=self.embedding_client, chunker=self.chunker)
+        try:
+            indexer.load_index()
+        except Exception as e:
+            print(f"⚠️  加载已有索引失败，进行全量构建: {e}")
+            return None
+
+        if indexer.index.d != indexer.dimension:
+            print("⚠️  向量维度已变化，进行全量构建")
+            return None
+        return indexer
+
+    def _build_index(self) -> Optional[VectorIndexer]:
+        new_documents = [
+            doc
+            for key in self._source_order
+            for doc in self._documents.get(key, [])
+            if doc.embedding
+        ]
+
+        indexer = self._base_index
+        if indexer is None:
+            if not new_documents:
+                print("❌ 没有文档可以索引")
+                return None
+            indexer = VectorIndexer(embedding_client=self.embedding_client, chunker=self.chunker)
+            indexer.build_from_documents(new_documents)
+        else:
+            # 重新处理过的来源和已删除的来源：删除旧文档块，再追加新文档块
+            deleted = [key for key in self.manifest.sources if key not in self._seen_keys]
+            stale_ids = set()
+            for key in list(self._documents) + deleted:
+                stale_ids.update(self.manifest.remove(key))
+
+            if not new_documents and not stale_ids:
+                print("\n✅ 知识库已是最新，无需更新索引")
+                self.manifest.save()
+                self.checkpoint.write_state(status="complete", documents=len(indexer.documents))
+                return indexer
+
+            removed = indexer.remove_documents(stale_ids)
+            indexer.add_documents(new_documents)
+            print(f"\n🔧 增量更新索引: 删除 {removed} 个旧文档块，新增 {len(new_documents)} 个"
+                  f"（移除来源 {len(deleted)} 个）")
+
+        for key, documents in self._documents.items():
+            self.manifest.record(
+                key,
+                self._store,
+                url=documents[0].source_url if documents else "",
+                settings=self._settings,
+                chunk_ids=[doc.id for doc in documents if doc.embedding],
+                complete=all(doc.embedding for doc in documents)
+            )
+
+        indexer.save_index()
+        self.manifest.save()
+        self.checkpoint.write_state(status="complete", documents=len(indexer.documents))
+        return indexer
+
+    def _prepare_checkpoint(self, resume: bool):
+        """全新构建时清空检查点；继续构建时确认Embedding客户端未变化"""
+        signature = {
+            "embedding_client": type(self.embedding_client).__name__,
+            "dimension": self.embedding_client.get_embedding_dimension(),
+        }
+
+        if not resume:
+            self.checkpoint.reset()
+        else:
+            state = self.checkpoint.read_state()
+            previous = {name: state.get(name) for name in signature}
+            if state and previous != signature:
+                print("⚠️  Embedding客户端已变化，丢弃已有的向量检查点")
+                self.checkpoint.clear_embeddings()
+
+        self.checkpoint.write_state(status="running", **signature)
+
+    def _print_stats(self):
+        stats = self._stats
+        print("\n📊 流水线统计:")
+        print(f"  - 来源文件: {stats['sources'] + stats['skipped']}（未变化跳过 {stats['skipped']}，"
+              f"解析成功 {stats['parsed']}，失败 {stats['parse_failed']}，从检查点恢复 {stats['resumed']}）")
+        print(f"  - 文档块: {stats['chunks']}")
+        print(f"  - 新生成向量: {stats['embedded']}，失败: {stats['embed_failed']}")
+        if stats["embed_failed"]:
+            print("  ⚠️  Embedding失败的文档块未加入索引，可使用 --resume 重试")
+
+    # ==================== 队列操作 ====================
+
+    def _put(self, q: queue.Queue, item):
+        """放入队列（队列满时等待，流水线中止时退出）"""
+        while True:
+            if self._stop.is_set():
+                raise BuildCancelled()
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue):
+        """从队列取出（队列空时等待，流水线中止时退出）"""
+        while True:
+            if self._stop.is_set():
+                raise BuildCancelled()
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
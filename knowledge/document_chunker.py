@@ -167,9 +167,9 @@ class DocumentChunker:
             )
             documents.append(title_doc)
 
-        # 处理所有章节
+        # 处理所有章节（ID以来源URL为前缀，不同文档的同名章节不会冲突）
         for section in content.sections:
-            section_documents = self.chunk_section(section, content.url)
+            section_documents = self.chunk_section(section, content.url, content.url)
             documents.extend(section_documents)
 
         return documents
@@ -60,7 +60,44 @@ class KnowledgeRetriever:
         # 向量检索
         results = self.indexer.search(query, top_k=top_k * 2)  # 多检索一些用于过滤
 
-        # 过滤结果
+        return self._filter_results(results, top_k, min_score, filter_section)
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = None,
+        min_score: float = 0.0,
+        filter_section: Optional[str] = None
+    ) -> List[List[tuple[Document, float]]]:
+        """
+        批量检索相关文档
+
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回Top-K结果
+            min_score: 最小相似度阈值
+            filter_section: 过滤特定章节
+
+        Returns:
+            与 queries 一一对应的 (文档, 相似度) 列表
+        """
+        top_k = top_k or Config.TOP_K_RESULTS
+
+        batch_results = self.indexer.search_batch(queries, top_k=top_k * 2)
+
+        return [
+            self._filter_results(results, top_k, min_score, filter_section)
+            for results in batch_results
+        ]
+
+    def _filter_results(
+        self,
+        results: List[tuple[Document, float]],
+        top_k: int,
+        min_score: float,
+        filter_section: Optional[str]
+    ) -> List[tuple[Document, float]]:
+        """按分数和章节过滤检索结果"""
         filtered_results = []
         for doc, score in results:
             # 分数过滤
@@ -204,6 +241,18 @@ class KnowledgeRetriever:
 
         return combined_results[:top_k]
 
+    def get_documents(self, doc_ids: List[str]) -> List[Document]:
+        """
+        按ID获取文档（用于复用之前检索到的文档）
+
+        Args:
+            doc_ids: 文档ID列表
+
+        Returns:
+            文档列表
+        """
+        return self.indexer.get_documents(doc_ids)
+
     def get_stats(self) -> dict:
         """
         获取检索器统计信息
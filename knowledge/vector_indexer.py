@@ -5,7 +5,7 @@
 import json
 import pickle
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Dict
 import numpy as np
 import faiss
 
@@ -36,6 +36,8 @@ class VectorIndexer:
         self.index: Optional[faiss.Index] = None
         self.documents: List[Document] = []
         self.dimension = self.embedding_client.get_embedding_dimension()
+        self._id_lookup: Optional[Dict[str, Document]] = None
+        self._id_lookup_source: Optional[List[Document]] = None
 
     def build_index(
         self,
@@ -82,19 +84,80 @@ class VectorIndexer:
             print(f"\n[步骤3/3] 构建FAISS索引")
             print("-" * 70)
 
+        self.build_from_documents(self.documents, show_progress=False)
+
+        if show_progress:
+            print(f"✅ 索引构建完成")
+            print(f"   文档数: {len(self.documents)}")
+            print(f"   向量维度: {self.dimension}")
+            print(f"   索引类型: IndexFlatL2")
+
+    def build_from_documents(
+        self,
+        documents: List[Document],
+        show_progress: bool = True
+    ):
+        """
+        用已带向量的文档构建FAISS索引（构建流水线使用）
+
+        Args:
+            documents: 文档块列表（embedding 已填充）
+            show_progress: 是否显示进度
+        """
+        self.documents = documents
+
         # 转换为numpy数组
-        vectors = np.array(embeddings, dtype=np.float32)
+        vectors = np.array([doc.embedding for doc in documents], dtype=np.float32)
 
         # 创建FAISS索引（使用L2距离）
         self.index = faiss.IndexFlatL2(self.dimension)
         self.index.add(vectors)
 
         if show_progress:
-            print(f"✅ 索引构建完成")
+            print(f"\n✅ 索引构建完成")
             print(f"   文档数: {len(self.documents)}")
             print(f"   向量维度: {self.dimension}")
             print(f"   索引类型: IndexFlatL2")
 
+    def remove_documents(self, doc_ids: set) -> int:
+        """
+        从索引中删除文档（增量构建时删除已变化来源的旧文档块）
+
+        Args:
+            doc_ids: 要删除的文档ID集合
+
+        Returns:
+            删除的文档数
+        """
+        if self.index is None or not doc_ids:
+            return 0
+
+        positions = [i for i, doc in enumerate(self.documents) if doc.id in doc_ids]
+        if not positions:
+            return 0
+
+        # IndexFlat 删除后其余向量保持原有顺序，与文档列表同步删除即可保持对应
+        self.index.remove_ids(np.array(positions, dtype=np.int64))
+        removed = set(positions)
+        self.documents = [doc for i, doc in enumerate(self.documents) if i not in removed]
+        return len(positions)
+
+    def add_documents(self, documents: List[Document]):
+        """
+        向索引追加已带向量的文档
+
+        Args:
+            documents: 文档块列表（embedding 已填充）
+        """
+        if not documents:
+            return
+        if self.index is None:
+            self.index = faiss.IndexFlatL2(self.dimension)
+
+        vectors = np.array([doc.embedding for doc in documents], dtype=np.float32)
+        self.index.add(vectors)
+        self.documents = self.documents + documents
+
     def save_index(
         self,
         index_path: Optional[Path] = None,
@@ -208,10 +271,53 @@ class VectorIndexer:
         # 搜索
         distances, indices = self.index.search(query_vector, top_k)
 
-        # 返回结果
+        return self._to_results(distances[0], indices[0])
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = None
+    ) -> List[List[tuple[Document, float]]]:
+        """
+        批量搜索相似文档（一次Embedding批量请求 + 一次FAISS检索）
+
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回Top-K结果
+
+        Returns:
+            与 queries 一一对应的 (文档, 相似度) 列表
+        """
+        if self.index is None:
+            raise ValueError("Index not loaded")
+
+        if not queries:
+            return []
+
+        top_k = top_k or Config.TOP_K_RESULTS
+
+        # 批量生成查询向量
+        embeddings = self.embedding_client.embed_batch(queries, show_progress=False)
+        query_vectors = np.array(embeddings, dtype=np.float32)
+
+        # embed_batch 在批次失败时返回零向量，这些查询单独重试
+        for i, vector in enumerate(query_vectors):
+            if not vector.any():
+                query_vectors[i] = self.embedding_client.embed(queries[i])
+
+        distances, indices = self.index.search(query_vectors, top_k)
+
+        return [
+            self._to_results(row_distances, row_indices)
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+
+    def _to_results(self, distances, indices) -> List[tuple[Document, float]]:
+        """将FAISS检索结果转换为 (文档, 相似度) 列表"""
         results = []
-        for distance, idx in zip(distances[0], indices[0]):
-            if idx < len(self.documents):
+        for distance, idx in zip(distances, indices):
+            # 结果不足 top_k 时 FAISS 用 -1 填充
+            if 0 <= idx < len(self.documents):
                 doc = self.documents[idx]
                 # 将L2距离转换为相似度分数（距离越小，相似度越高）
                 # 使用 1 / (1 + distance) 将距离映射到 (0, 1]
@@ -220,6 +326,23 @@ class VectorIndexer:
 
         return results
 
+    def get_documents(self, doc_ids: List[str]) -> List[Document]:
+        """
+        按ID查找文档（保持输入顺序，跳过已不存在的ID）
+
+        Args:
+            doc_ids: 文档ID列表
+
+        Returns:
+            文档列表
+        """
+        # 文档列表被替换（重新构建或加载）后重建查找表
+        if self._id_lookup is None or self._id_lookup_source is not self.documents:
+            self._id_lookup = {doc.id: doc for doc in self.documents}
+            self._id_lookup_source = self.documents
+
+        return [self._id_lookup[doc_id] for doc_id in doc_ids if doc_id in self._id_lookup]
+
     def get_stats(self) -> dict:
         """
         获取索引统计信息
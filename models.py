@@ -53,6 +53,7 @@ class Answer(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0, description="置信度")
     sources: List[str] = Field(default=[], description="引用的URL来源")
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
+    metadata: Dict[str, Any] = Field(default={}, description="附加信息（token用量、提示词缓存命中等）")
 
     def display(self) -> str:
         """格式化显示答案"""
@@ -75,10 +76,33 @@ class Answer(BaseModel):
         return "\n".join(output)
 
 
+class CompensationResult(BaseModel):
+    """补偿金计算结果模型"""
+    scheme: str = Field(description="补偿标准（N / N+1 / 2N / 无）")
+    work_years: float = Field(description="工作年限")
+    compensation_months: float = Field(description="经济补偿月数（N）")
+    monthly_salary: float = Field(description="月平均工资")
+    wage_base: float = Field(description="计算基数（封顶后的月工资）")
+    capped: bool = Field(default=False, description="是否适用3倍社平工资封顶")
+    amount: float = Field(description="补偿金额（元）")
+    steps: List[str] = Field(default=[], description="计算步骤")
+    legal_basis: List[str] = Field(default=[], description="法律依据")
+    alternatives: Dict[str, float] = Field(default={}, description="其他情形下的金额")
+
+
+class SituationFact(BaseModel):
+    """从对话中抽取的用户情况（带出处）"""
+    value: Any = Field(description="抽取的值")
+    source: str = Field(description="匹配到的原文片段")
+    turn: Optional[int] = Field(default=None, description="所在对话轮次（从1开始，当前问题为None）")
+
+
 class ConversationTurn(BaseModel):
     """对话轮次模型"""
     question: str = Field(description="用户问题")
     answer: Answer = Field(description="AI回答")
+    doc_ids: List[str] = Field(default=[], description="回答使用的文档ID")
+    doc_scores: List[float] = Field(default=[], description="文档的检索相关度（与 doc_ids 一一对应）")
     timestamp: datetime = Field(default_factory=datetime.now, description="时间戳")
 
 
@@ -86,11 +110,21 @@ class ConversationContext(BaseModel):
     """对话上下文模型"""
     turns: List[ConversationTurn] = Field(default=[], description="对话历史")
     user_info: Dict[str, Any] = Field(default={}, description="用户信息（可选）")
-
-    def add_turn(self, question: str, answer: Answer):
-        """添加一轮对话"""
-        turn = ConversationTurn(question=question, answer=answer)
+    summary: str = Field(default="", description="较早对话的滚动摘要")
+    facts: Dict[str, SituationFact] = Field(default={}, description="从对话中抽取的用户情况")
+    turn_count: int = Field(default=0, description="累计对话轮数（不受历史长度限制）")
+
+    def add_turn(self, question: str, answer: Answer, doc_scores: Optional[List[float]] = None):
+        """添加一轮对话（doc_scores 与 answer.relevant_docs 一一对应）"""
+        doc_ids = [doc.id for doc in answer.relevant_docs]
+        turn = ConversationTurn(
+            question=question,
+            answer=answer,
+            doc_ids=doc_ids,
+            doc_scores=list(doc_scores) if doc_scores and len(doc_scores) == len(doc_ids) else []
+        )
         self.turns.append(turn)
+        self.turn_count += 1
 
     def get_recent_turns(self, n: int = 3) -> List[ConversationTurn]:
         """获取最近N轮对话"""
@@ -100,6 +134,9 @@ class ConversationContext(BaseModel):
         """重置对话历史"""
         self.turns = []
         self.user_info = {}
+        self.summary = ""
+        self.facts = {}
+        self.turn_count = 0
 
 
 # 启用嵌套模型的前向引用
@@ -3,11 +3,26 @@
 提供网页抓取、HTML清洗和内容解析功能
 """
 from .web_scraper import WebScraper
+from .crawler_engine import CrawlerEngine
+from .cache_index import CacheIndex
+from .crawl_frontier import CrawlFrontier, CrawlScope
+from .link_crawler import LinkCrawler
 from .html_cleaner import HTMLCleaner
 from .content_parser import ContentParser
+from .document_processor import DocumentProcessor
+from .html_backend import HTMLBackend, create_html_backend, available_html_backends
 
 __all__ = [
     'WebScraper',
+    'CrawlerEngine',
+    'CacheIndex',
+    'CrawlFrontier',
+    'CrawlScope',
+    'LinkCrawler',
     'HTMLCleaner',
     'ContentParser',
+    'DocumentProcessor',
+    'HTMLBackend',
+    'create_html_backend',
+    'available_html_backends',
 ]
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+批量解析
+在进程池的工作进程中清洗并解析缓存的网页（CPU密集，多进程可利用多核），
+返回紧凑的JSON结果，单个网页出错不影响其他网页
+"""
+from pathlib import Path
+from typing import Optional
+
+from .document_processor import DocumentProcessor
+from .cache_index import CacheIndex
+from .cache_store import CacheStore, open_cache_store
+
+
+# 每个工作进程复用一个文档处理器和缓存存储（连同缓存索引连接）
+_processor: Optional[DocumentProcessor] = None
+_store: Optional[CacheStore] = None
+_index: Optional[CacheIndex] = None
+
+
+def _open(cache_dir: Path, kind: Optional[str]) -> tuple[CacheIndex, CacheStore]:
+    """打开（或复用）缓存索引和缓存存储"""
+    global _store, _index
+    if _index is None or _index.cache_dir != cache_dir:
+        _index = CacheIndex(cache_dir)
+        _store = None
+    if _store is None or (kind and _store.name != kind):
+        _store = open_cache_store(kind, cache_dir=cache_dir, index=_index)
+    return _index, _store
+
+
+def source_url(key: str, cache_dir: Path, store: Optional[str] = None) -> str:
+    """从缓存索引中查找原始URL（没有记录时使用缓存位置）"""
+    index, cache_store = _open(Path(cache_dir), store)
+    return index.url_for(key) or cache_store.locate(key)
+
+
+def parse_cache_file(
+    key: str,
+    cache_dir: str,
+    store: Optional[str] = None
+) -> tuple[str, Optional[str], Optional[str]]:
+    """
+    清洗并解析一个缓存的网页（可在工作进程中运行）
+
+    Args:
+        key: 缓存键
+        cache_dir: 缓存目录
+        store: 缓存存储方式（files、pack，为None则读取Config）
+
+    Returns:
+        (来源键, StructuredContent 的JSON, 错误信息)，成功时错误信息为None，失败时JSON为None
+    """
+    global _processor
+    if _processor is None:
+        _processor = DocumentProcessor()
+
+    try:
+        index, cache_store = _open(Path(cache_dir), store)
+        html = cache_store.read(key)
+        if html is None:
+            raise FileNotFoundError(f"缓存中没有: {key}")
+        _, content = _processor.process(html, url=index.url_for(key) or cache_store.locate(key))
+        if content.title == "未命名文档":
+            content.title = f"法律文档 {key[:8]}"
+        # 返回JSON字符串而不是模型对象，进程间传输更小更快
+        return key, content.model_dump_json(), None
+    except Exception as e:
+        return key, None, f"{type(e).__name__}: {e}"
@@ -0,0 +1,291 @@
+"""
+网页缓存索引
+每个缓存网页在 SQLite 中有一条记录：原始URL、ETag、Last-Modified、内容哈希、抓取时间和状态，
+用于条件请求（If-None-Match / If-Modified-Since）以及从缓存文件反查来源URL；
+使用压缩缓存包时，每个网页在包文件中的偏移量也记录在这里
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List
+
+from ..config import Config
+
+
+INDEX_FILENAME = "index.sqlite"
+PACK_FILENAME = "pages.pack"
+
+
+def cache_key(url: str) -> str:
+    """缓存键（URL的MD5，即缓存文件名）"""
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def content_hash(html: str) -> str:
+    """网页内容哈希（与缓存文件按UTF-8编码后的字节一致）"""
+    return hashlib.sha1(html.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """缓存索引记录"""
+    key: str
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    fetched_at: float = 0.0  # 最近一次取得内容的时间（200）
+    checked_at: float = 0.0  # 最近一次向服务器确认的时间（200或304）
+    status: int = 0  # 最近一次请求的HTTP状态码（0表示手动添加）
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class PackEntry:
+    """网页在压缩缓存包中的位置"""
+    key: str
+    offset: int  # 压缩数据在包文件中的起始位置
+    length: int  # 压缩后的字节数
+    raw_size: int  # 原始HTML（UTF-8）的字节数
+    codec: str  # 压缩格式：zstd、gzip
+    content_hash: str  # 原始HTML的内容哈希
+    file: str = PACK_FILENAME  # 所在的包文件（整理后写入新的包文件）
+
+
+class CacheIndex:
+    """网页缓存索引（SQLite，保存在缓存目录中）"""
+
+    _COLUMNS = "key, url, etag, last_modified, content_hash, fetched_at, checked_at, status"
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        打开缓存索引（首次创建时导入旧版 .meta 文件中的URL）
+
+        Args:
+            cache_dir: 缓存目录（为None则使用 Config.CACHE_DIR）
+        """
+        self.cache_dir = Path(cache_dir or Config.CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / INDEX_FILENAME
+        self._lock = threading.Lock()
+
+        # 构建流水线的解析进程会同时读取，使用 WAL 避免读写互相阻塞
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        created = self._db.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='pages'"
+        ).fetchone() is None
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT,"
+            " fetched_at REAL NOT NULL DEFAULT 0,"
+            " checked_at REAL NOT NULL DEFAULT 0,"
+            " status INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pack ("
+            " key TEXT PRIMARY KEY,"
+            " offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " raw_size INTEGER NOT NULL,"
+            " codec TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            f" file TEXT NOT NULL DEFAULT '{PACK_FILENAME}')"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pack)")}
+        if "file" not in columns:
+            # 旧版索引：所有记录都在 pages.pack 中
+            self._db.execute(f"ALTER TABLE pack ADD COLUMN file TEXT NOT NULL DEFAULT '{PACK_FILENAME}'")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pack_state ("
+            " name TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+        if created:
+            self._import_legacy_meta()
+
+    def _import_legacy_meta(self):
+        """导入旧版缓存的 .meta 文件（url=... / timestamp=... 文本）"""
+        rows = []
+        for meta_file in self.cache_dir.glob("*.meta"):
+            fields = {}
+            for line in meta_file.read_text(encoding="utf-8", errors="ignore").splitlines():
+                name, sep, value = line.partition("=")
+                if sep:
+                    fields[name.strip()] = value.strip()
+            if not fields.get("url"):
+                continue
+            fetched_at = meta_file.stat().st_mtime
+            rows.append((meta_file.stem, fields["url"], fetched_at, fetched_at))
+
+        if rows:
+            with self._lock, self._db:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO pages (key, url, fetched_at, checked_at, status)"
+                    " VALUES (?, ?, ?, ?, 200)",
+                    rows
+                )
+            print(f"📦 已导入 {len(rows)} 条旧版缓存元数据到 {self.path.name}")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """按URL获取记录"""
+        return self.get_by_key(cache_key(url))
+
+    def get_by_key(self, key: str) -> Optional[CacheEntry]:
+        """按缓存键（缓存文件名）获取记录"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def record(
+        self,
+        url: str,
+        html: str,
+        status: int = 200,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> CacheEntry:
+        """
+        记录一次取得的网页内容
+
+        Args:
+            url: 原始URL
+            html: 网页内容
+            status: HTTP状态码（手动添加时为0）
+            etag: 响应的 ETag
+            last_modified: 响应的 Last-Modified
+
+        Returns:
+            写入的记录
+        """
+        now = time.time()
+        entry = CacheEntry(
+            key=cache_key(url), url=url, etag=etag, last_modified=last_modified,
+            content_hash=content_hash(html), fetched_at=now, checked_at=now, status=status
+        )
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO pages ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.key, entry.url, entry.etag, entry.last_modified, entry.content_hash,
+                 entry.fetched_at, entry.checked_at, entry.status)
+            )
+        return entry
+
+    def mark_not_modified(self, url: str):
+        """记录一次 304（内容未变化，只更新确认时间和状态）"""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE pages SET checked_at = ?, status = 304 WHERE key = ?",
+                (time.time(), cache_key(url))
+            )
+
+    def url_for(self, key: str) -> Optional[str]:
+        """缓存键对应的原始URL"""
+        entry = self.get_by_key(key)
+        return entry.url if entry else None
+
+    # ==================== 压缩缓存包 ====================
+
+    _PACK_COLUMNS = "key, offset, length, raw_size, codec, content_hash, file"
+
+    def pack_entry(self, key: str) -> Optional[PackEntry]:
+        """网页在压缩缓存包中的位置（不在包中时返回None）"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {self._PACK_COLUMNS} FROM pack WHERE key = ?", (key,)
+            ).fetchone()
+        return PackEntry(*row) if row else None
+
+    def pack_entries(self) -> List[PackEntry]:
+        """压缩缓存包中的所有网页（按所在包文件和位置排序）"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {self._PACK_COLUMNS} FROM pack ORDER BY file, offset"
+            ).fetchall()
+        return [PackEntry(*row) for row in rows]
+
+    def set_pack_entries(self, entries: List[PackEntry]):
+        """记录网页在压缩缓存包中的位置（同一事务中写入）"""
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO pack ({self._PACK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(e.key, e.offset, e.length, e.raw_size, e.codec, e.content_hash, e.file) for e in entries]
+            )
+
+    def pack_file(self) -> str:
+        """新记录追加写入的包文件名"""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM pack_state WHERE name = 'file'").fetchone()
+        return row[0] if row else PACK_FILENAME
+
+    def pack_file_refs(self, file: str) -> int:
+        """仍在指定包文件中的记录数"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pack WHERE file = ?", (file,)).fetchone()[0]
+
+    def swap_pack_file(
+        self,
+        moved: List[tuple[PackEntry, PackEntry]],
+        file: str,
+        lost: Optional[List[PackEntry]] = None
+    ) -> int:
+        """
+        整理后切换到新的包文件：新位置、删除的记录和新的写入文件在同一事务中生效
+
+        整理期间被其他进程覆盖的记录（位置已不同）保持不变
+
+        Args:
+            moved: [(原位置, 新位置)]
+            file: 新的包文件名
+            lost: 无法读取、需要删除的记录
+
+        Returns:
+            切换到新位置的记录数
+        """
+        with self._lock, self._db:
+            count = 0
+            for old, new in moved:
+                count += self._db.execute(
+                    "UPDATE pack SET file = ?, offset = ? WHERE key = ? AND file = ? AND offset = ?",
+                    (file, new.offset, old.key, old.file, old.offset)
+                ).rowcount
+            self._db.executemany(
+                "DELETE FROM pack WHERE key = ? AND file = ? AND offset = ?",
+                [(entry.key, entry.file, entry.offset) for entry in lost or []]
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO pack_state (name, value) VALUES ('file', ?)", (file,)
+            )
+        return count
+
+    def remove_pack_entry(self, key: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM pack WHERE key = ?", (key,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
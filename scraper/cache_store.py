@@ -0,0 +1,407 @@
+"""
+网页缓存存储
+files: 每个网页一个未压缩的 .html 文件（默认，兼容手动保存到缓存目录的网页）
+pack: 所有网页压缩后追加写入同一个包文件，偏移量记录在缓存索引中，读取时流式解压
+"""
+import gzip
+import hashlib
+import io
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, List, Iterator, TextIO
+
+from ..config import Config
+from .cache_index import CacheIndex, PackEntry
+
+
+# 整理后的包文件依次命名为 pages.1.pack、pages.2.pack ……
+PACK_GLOB = "pages*.pack"
+_PACK_GENERATION = re.compile(r"^pages\.(\d+)\.pack$")
+_GENERATION_SHIFT = 40  # 版本号 = 包文件代数 << 40 | 偏移量（单个包文件不超过 1TB）
+
+# 压缩级别（政府网页模板重复度高，中等级别已接近最高压缩率）
+_ZSTD_LEVEL = 10
+_GZIP_LEVEL = 6
+
+
+class CacheStore(ABC):
+    """网页缓存存储（按缓存键读写原始HTML）"""
+
+    name = ""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir or Config.CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @abstractmethod
+    def keys(self) -> List[str]:
+        """所有缓存键（排序后）"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """是否已缓存"""
+
+    @abstractmethod
+    def open(self, key: str) -> Iterator[TextIO]:
+        """以文本流打开缓存的网页（上下文管理器）"""
+
+    @abstractmethod
+    def write(self, key: str, html: str):
+        """写入网页"""
+
+    @abstractmethod
+    def signature(self, key: str) -> tuple[int, int]:
+        """
+        不读取内容即可得到的版本信息（内容变化时一定变化，用于增量构建的快速判断）
+
+        Returns:
+            (大小, 版本)
+        """
+
+    @abstractmethod
+    def content_hash(self, key: str) -> str:
+        """原始HTML的内容哈希（SHA1，与未压缩的缓存文件一致）"""
+
+    @abstractmethod
+    def usage(self) -> dict:
+        """
+        空间占用
+
+        Returns:
+            {entries, raw_bytes, stored_bytes, reclaimable_bytes}
+        """
+
+    def read(self, key: str) -> Optional[str]:
+        """读取缓存的网页（不存在时返回None）"""
+        if not self.exists(key):
+            return None
+        with self.open(key) as f:
+            return f.read()
+
+    def locate(self, key: str) -> str:
+        """缓存位置的描述（用于日志和没有来源URL时的占位）"""
+        return f"file://{self.cache_dir / key}"
+
+    def close(self):
+        pass
+
+
+class FileCacheStore(CacheStore):
+    """每个网页一个 .html 文件"""
+
+    name = "files"
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.html"
+
+    def keys(self) -> List[str]:
+        return sorted(path.stem for path in self.cache_dir.glob("*.html"))
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[TextIO]:
+        with open(self.path(key), encoding="utf-8") as f:
+            yield f
+
+    def write(self, key: str, html: str):
+        self.path(key).write_text(html, encoding="utf-8")
+
+    def delete(self, key: str):
+        """删除缓存文件（连同旧版的 .meta 文件）"""
+        self.path(key).unlink(missing_ok=True)
+        (self.cache_dir / f"{key}.meta").unlink(missing_ok=True)
+
+    def signature(self, key: str) -> tuple[int, int]:
+        stat = self.path(key).stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def content_hash(self, key: str) -> str:
+        digest = hashlib.sha1()
+        with open(self.path(key), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def locate(self, key: str) -> str:
+        return f"file://{self.path(key)}"
+
+    def usage(self) -> dict:
+        sizes = [path.stat().st_size for path in self.cache_dir.glob("*.html")]
+        total = sum(sizes)
+        return {"entries": len(sizes), "raw_bytes": total, "stored_bytes": total, "reclaimable_bytes": 0}
+
+
+class _Slice(io.RawIOBase):
+    """文件中一段字节的只读视图（包文件中的一条记录）"""
+
+    def __init__(self, f, offset: int, length: int):
+        self._f = f
+        self._f.seek(offset)
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._f.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+class PackCacheStore(CacheStore):
+    """
+    压缩缓存包
+
+    每个网页压缩为一条独立记录追加到包文件末尾，索引中记录偏移量和长度；
+    同一网页重新写入时追加新记录，旧记录成为可回收空间，由 compact() 清理。
+    compact() 写入新的包文件，索引切换后才删除旧文件，中断或并发读取都不会读到错位的数据。
+    """
+
+    name = "pack"
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        index: Optional[CacheIndex] = None,
+        compression: Optional[str] = None
+    ):
+        """
+        打开压缩缓存包
+
+        Args:
+            cache_dir: 缓存目录（为None则使用 Config.CACHE_DIR）
+            index: 缓存索引（为None则打开缓存目录中的索引）
+            compression: 新写入记录的压缩格式 zstd 或 gzip（为None则读取Config；未安装 zstandard 时使用 gzip）
+        """
+        super().__init__(cache_dir)
+        self._owns_index = index is None
+        self.index = index or CacheIndex(self.cache_dir)
+        self._lock = threading.Lock()
+
+        self.compression = (compression or Config.CACHE_COMPRESSION).lower()
+        if self.compression not in ("zstd", "gzip"):
+            raise ValueError(f"未知的压缩格式: {self.compression}（可选: zstd、gzip）")
+        if self.compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                print("⚠️  未安装 zstandard，缓存包改用 gzip 压缩（pip install zstandard）")
+                self.compression = "gzip"
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            import zstandard
+            return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=_GZIP_LEVEL)
+
+    @property
+    def path(self) -> Path:
+        """新记录追加写入的包文件"""
+        return self.cache_dir / self.index.pack_file()
+
+    def pack_files(self) -> List[Path]:
+        """缓存目录中的所有包文件（包括整理中断留下的未引用文件）"""
+        return sorted(self.cache_dir.glob(PACK_GLOB))
+
+    def keys(self) -> List[str]:
+        return sorted(entry.key for entry in self.index.pack_entries())
+
+    def exists(self, key: str) -> bool:
+        return self.index.pack_entry(key) is not None
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[TextIO]:
+        entry = self._entry(key)
+        try:
+            f = open(self.cache_dir / entry.file, "rb")
+        except FileNotFoundError:
+            # 查询位置后其他进程完成了整理并删除了旧包文件，按新位置重新读取
+            entry = self._entry(key)
+            f = open(self.cache_dir / entry.file, "rb")
+
+        with f:
+            raw = _Slice(f, entry.offset, entry.length)
+            if entry.codec == "zstd":
+                import zstandard
+                stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+            else:
+                stream = gzip.GzipFile(fileobj=raw, mode="rb")
+            text = io.TextIOWrapper(stream, encoding="utf-8")
+            try:
+                yield text
+            finally:
+                text.close()
+
+    def write(self, key: str, html: str):
+        self.write_many([(key, html)])
+
+    def write_many(self, pages: List[tuple[str, str]]):
+        """
+        追加写入多个网页（索引在同一事务中更新）
+
+        Args:
+            pages: [(缓存键, HTML)]
+        """
+        with self._lock:
+            entries = []
+            path = self.path
+            with open(path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                for key, html in pages:
+                    data = html.encode("utf-8")
+                    compressed = self._compress(data)
+                    f.write(compressed)
+                    entries.append(PackEntry(
+                        key=key, offset=offset, length=len(compressed), raw_size=len(data),
+                        codec=self.compression, content_hash=hashlib.sha1(data).hexdigest(),
+                        file=path.name
+                    ))
+                    offset += len(compressed)
+                # 数据先落盘再更新索引，中断时最多留下未被引用的记录
+                f.flush()
+                os.fsync(f.fileno())
+            self.index.set_pack_entries(entries)
+
+    def _entry(self, key: str) -> PackEntry:
+        entry = self.index.pack_entry(key)
+        if entry is None:
+            raise FileNotFoundError(f"缓存包中没有: {key}")
+        return entry
+
+    def signature(self, key: str) -> tuple[int, int]:
+        # 同一包文件只追加不覆盖，内容变化时（包文件, 偏移量）一定变化；
+        # 整理后写入新一代包文件，偏移量可能与旧文件中的记录相同，因此版本号包含包文件代数
+        entry = self._entry(key)
+        return entry.raw_size, _pack_generation(entry.file) << _GENERATION_SHIFT | entry.offset
+
+    def content_hash(self, key: str) -> str:
+        return self._entry(key).content_hash
+
+    def locate(self, key: str) -> str:
+        return f"file://{self.path}#{key}"
+
+    def usage(self) -> dict:
+        entries = self.index.pack_entries()
+        stored = self._stored_bytes()
+        live = sum(entry.length for entry in entries)
+        return {
+            "entries": len(entries),
+            "raw_bytes": sum(entry.raw_size for entry in entries),
+            "stored_bytes": stored,
+            "reclaimable_bytes": max(stored - live, 0),  # 包文件丢失时记录仍在索引中
+        }
+
+    def _stored_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.pack_files())
+
+    def compact(self) -> int:
+        """
+        把仍被引用的记录复制到新的包文件，去掉已被覆盖的旧记录（直接复制压缩数据，不重新压缩）
+
+        新文件落盘后，新位置和新的写入文件在同一事务中切换；切换前中断时旧文件和索引都未改动，
+        只留下未被引用的新文件（下次整理时删除）。旧文件不再被引用后才删除。
+        所在包文件丢失或不完整的记录从索引中删除（之后按未缓存重新抓取）。
+
+        Returns:
+            回收的字节数
+        """
+        with self._lock:
+            old_files = self.pack_files()
+            if not old_files:
+                return 0
+            before = self._stored_bytes()
+
+            generation = max(_pack_generation(path.name) for path in old_files)
+            target = self.cache_dir / f"pages.{generation + 1}.pack"
+            moved = []
+            lost = []
+            sources = {}
+            try:
+                with open(target, "wb") as dst:
+                    for entry in self.index.pack_entries():
+                        if entry.file not in sources:
+                            try:
+                                sources[entry.file] = open(self.cache_dir / entry.file, "rb")
+                            except FileNotFoundError:
+                                sources[entry.file] = None
+                        src = sources[entry.file]
+                        data = b""
+                        if src is not None:
+                            src.seek(entry.offset)
+                            data = src.read(entry.length)
+                        if len(data) != entry.length:
+                            lost.append(entry)
+                            continue
+                        moved.append((entry, PackEntry(
+                            key=entry.key, offset=dst.tell(), length=entry.length, raw_size=entry.raw_size,
+                            codec=entry.codec, content_hash=entry.content_hash, file=target.name
+                        )))
+                        dst.write(data)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+            finally:
+                for src in sources.values():
+                    if src is not None:
+                        src.close()
+
+            if lost:
+                print(f"⚠️  {len(lost)} 条缓存记录所在的包文件丢失或不完整，已从索引中删除")
+            self.index.swap_pack_file(moved, target.name, lost)
+            for path in old_files:
+                if self.index.pack_file_refs(path.name) == 0:
+                    path.unlink(missing_ok=True)
+            return before - self._stored_bytes()
+
+    def close(self):
+        if self._owns_index:
+            self.index.close()
+
+
+def _pack_generation(file: str) -> int:
+    """包文件的代数（pages.pack 为 0，pages.N.pack 为 N）"""
+    match = _PACK_GENERATION.match(file)
+    return int(match.group(1)) if match else 0
+
+
+_STORES = {
+    "files": FileCacheStore,
+    "pack": PackCacheStore,
+}
+
+
+def open_cache_store(
+    kind: Optional[str] = None,
+    cache_dir: Optional[Path] = None,
+    index: Optional[CacheIndex] = None
+) -> CacheStore:
+    """
+    打开网页缓存存储
+
+    Args:
+        kind: 存储方式 files 或 pack（为None则读取 Config.CACHE_STORE）
+        cache_dir: 缓存目录（为None则使用 Config.CACHE_DIR）
+        index: 缓存索引（pack 存储使用，为None则自行打开）
+
+    Returns:
+        缓存存储
+
+    Raises:
+        ValueError: 未知的存储方式
+    """
+    kind = (kind or Config.CACHE_STORE).lower()
+    if kind not in _STORES:
+        raise ValueError(f"未知的缓存存储: {kind}（可选: {', '.join(_STORES)}）")
+    if kind == "pack":
+        return PackCacheStore(cache_dir, index=index)
+    return FileCacheStore(cache_dir)
+
@@ -2,8 +2,8 @@
 内容解析器
 将清洗后的HTML解析成结构化内容
 """
-from bs4 import BeautifulSoup
-from typing import List
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from typing import List, Optional
 from datetime import datetime
 import re
 
@@ -13,6 +13,13 @@ from ..models import LegalSection, StructuredContent
 class ContentParser:
     """内容解析器"""
 
+    # 解析规则版本（修改解析逻辑时递增，增量构建据此重新处理已有文档）
+    # 2: 事件式章节构建，每段文本只计入最内层的标题/段落一次
+    VERSION = 2
+
+    # 参与章节解析的标签（标题和段落）
+    BLOCK_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div', 'li']
+
     def __init__(self):
         """初始化解析器"""
         # 标题标签层级映射
@@ -41,25 +48,32 @@ class ContentParser:
                 scraped_at=datetime.now()
             )
 
-        soup = BeautifulSoup(html, 'lxml')
+        return self.parse_soup(BeautifulSoup(html, 'lxml'), url, title)
+
+    def parse_soup(self, soup: BeautifulSoup, url: str, title: str = None) -> StructuredContent:
+        """
+        解析已清洗的文档树为结构化内容
 
+        Args:
+            soup: 清洗后的文档树
+            url: 来源URL
+            title: 文档标题（如果为None则自动提取）
+
+        Returns:
+            结构化内容
+        """
         # 提取标题
         if not title:
             title = self._extract_title(soup)
 
         # 解析章节
-        sections = self._parse_sections(soup)
+        builder = self.section_builder()
+        walk_soup(soup, builder)
+        sections = builder.finish()
 
         # 如果没有找到章节结构，将整个内容作为一个章节
         if not sections:
-            content = soup.get_text(separator='\n', strip=True)
-            if content:
-                sections = [LegalSection(
-                    title="正文",
-                    content=content,
-                    subsections=[],
-                    level=1
-                )]
+            sections = self.fallback_sections(builder.text_content)
 
         return StructuredContent(
             url=url,
@@ -87,56 +101,21 @@ class ContentParser:
 
         return "未命名文档"
 
-    def _parse_sections(self, soup: BeautifulSoup) -> List[LegalSection]:
-        """解析章节结构"""
-        sections = []
-        current_section = None
-        section_stack = []  # 用于处理嵌套章节
-
-        # 找到所有标题和段落
-        for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div', 'li']):
-            tag_name = element.name
-
-            # 处理标题
-            if tag_name in self.heading_levels:
-                level = self.heading_levels[tag_name]
-                title = element.get_text(strip=True)
-
-                if not title:
-                    continue
-
-                # 创建新章节
-                new_section = LegalSection(
-                    title=title,
-                    content="",
-                    subsections=[],
-                    level=level
-                )
-
-                # 处理嵌套关系
-                while section_stack and section_stack[-1].level >= level:
-                    section_stack.pop()
-
-                if section_stack:
-                    # 作为子章节添加
-                    section_stack[-1].subsections.append(new_section)
-                else:
-                    # 作为顶层章节添加
-                    sections.append(new_section)
-
-                section_stack.append(new_section)
-                current_section = new_section
-
-            # 处理内容
-            elif current_section:
-                text = element.get_text(strip=True)
-                if text:
-                    if current_section.content:
-                        current_section.content += "\n\n" + text
-                    else:
-                        current_section.content = text
-
-        return sections
+    def section_builder(self) -> "SectionBuilder":
+        """创建章节构建器（各HTML后端遍历文档树时向其发送事件）"""
+        return SectionBuilder(self.heading_levels, self.BLOCK_TAGS)
+
+    @staticmethod
+    def fallback_sections(text: str) -> List[LegalSection]:
+        """没有章节结构时，将整个内容作为一个章节"""
+        if not text:
+            return []
+        return [LegalSection(
+            title="正文",
+            content=text,
+            subsections=[],
+            level=1
+        )]
 
     def _identify_legal_articles(self, text: str) -> List[str]:
         """识别法律条文"""
@@ -236,6 +215,158 @@ class ContentParser:
         return merged
 
 
+class SectionBuilder:
+    """
+    事件式章节构建器
+
+    遍历文档树时依次接收 start(标签)、text(文本)、end(标签) 事件，每个文本节点只处理一次：
+    标题内的文本组成章节标题，其余文本计入最内层的段落（段落在标题/段落标签开始和结束处分隔）。
+    章节内容先累积在列表中，结束时一次性拼接，长篇法规的解析耗时和内存与文本长度成线性关系。
+    """
+
+    def __init__(self, heading_levels: dict, block_tags: List[str]):
+        """
+        初始化构建器
+
+        Args:
+            heading_levels: 标题标签到层级的映射
+            block_tags: 分隔段落的标签（包含标题标签）
+        """
+        self.heading_levels = heading_levels
+        self.block_tags = frozenset(block_tags)
+
+        self.sections: List[LegalSection] = []  # 顶层章节
+        self._stack: List[LegalSection] = []    # 当前章节路径，用于处理嵌套
+        self._parts: List[tuple[LegalSection, List[str]]] = []  # (章节, 段落列表)
+        self._current: Optional[List[str]] = None  # 当前章节的段落列表
+
+        self._paragraph: List[str] = []
+        self._heading: Optional[List[str]] = None  # 正在读取的标题文本（不在标题内时为None）
+        self._heading_tag = ""
+        self._heading_depth = 0  # 标题内嵌套的标签层数
+
+        self._strings: List[str] = []  # 全部文本（用于纯文本）
+
+    def start(self, tag: str):
+        """标签开始"""
+        if self._heading is not None:
+            self._heading_depth += 1
+        elif tag in self.heading_levels:
+            self._flush()
+            self._heading = []
+            self._heading_tag = tag
+            self._heading_depth = 0
+        elif tag in self.block_tags:
+            self._flush()
+
+    def end(self, tag: str):
+        """标签结束"""
+        if self._heading is not None:
+            if self._heading_depth:
+                self._heading_depth -= 1
+            else:
+                self._add_section(''.join(self._heading), self.heading_levels[self._heading_tag])
+                self._heading = None
+        elif tag in self.block_tags:
+            self._flush()
+
+    def text(self, text: str):
+        """文本节点"""
+        text = text.strip()
+        if not text:
+            return
+        self._strings.append(text)
+        if self._heading is not None:
+            self._heading.append(text)
+        else:
+            self._paragraph.append(text)
+
+    def finish(self) -> List[LegalSection]:
+        """
+        结束构建
+
+        Returns:
+            顶层章节列表
+        """
+        self._flush()
+        for section, parts in self._parts:
+            section.content = "\n\n".join(parts)
+        return self.sections
+
+    @property
+    def text_content(self) -> str:
+        """全部文本（每段文本去除首尾空白后以换行连接）"""
+        return '\n'.join(self._strings)
+
+    def _flush(self):
+        """结束当前段落（第一个标题之前的文本不属于任何章节）"""
+        if self._paragraph:
+            if self._current is not None:
+                self._current.append(''.join(self._paragraph))
+            self._paragraph = []
+
+    def _add_section(self, title: str, level: int):
+        if not title:
+            return
+
+        new_section = LegalSection(
+            title=title,
+            content="",
+            subsections=[],
+            level=level
+        )
+
+        # 处理嵌套关系
+        while self._stack and self._stack[-1].level >= level:
+            self._stack.pop()
+
+        if self._stack:
+            # 作为子章节添加
+            self._stack[-1].subsections.append(new_section)
+        else:
+            # 作为顶层章节添加
+            self.sections.append(new_section)
+
+        self._stack.append(new_section)
+        self._current = []
+        self._parts.append((new_section, self._current))
+
+
+# 其中的文本不计入正文的标签（与 BeautifulSoup 的 string_containers 一致）
+STRING_CONTAINERS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+
+def walk_soup(soup: BeautifulSoup, handler: SectionBuilder):
+    """
+    按文档顺序遍历 BeautifulSoup 文档树，向构建器发送事件
+
+    Args:
+        soup: 文档树
+        handler: 接收 start/text/end 事件的构建器
+    """
+    stack = [(soup, False)]
+    while stack:
+        node, exiting = stack.pop()
+        if isinstance(node, NavigableString):
+            handler.text(node)
+            continue
+        if exiting:
+            handler.end(node.name)
+            continue
+
+        if node is not soup:
+            handler.start(node.name)
+            stack.append((node, True))
+
+        # 子节点逆序入栈，出栈时即为文档顺序；注释等特殊字符串不计入文本
+        for child in reversed(node.contents):
+            if isinstance(child, Tag):
+                if child.name not in STRING_CONTAINERS:
+                    stack.append((child, False))
+            elif type(child) in (NavigableString, CData):
+                stack.append((child, False))
+
+
 def test_parser():
     """测试解析器"""
     sample_html = """
@@ -0,0 +1,240 @@
+"""
+抓取边界（crawl frontier）
+链接跟随抓取时待抓取URL的优先队列：URL规范化、域名/路径白名单和深度限制，
+已见过的URL用布隆过滤器记录（内存占用固定，不随抓取规模增长）
+"""
+import hashlib
+import heapq
+import itertools
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Optional, List, Iterable
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from ..config import Config
+
+
+# 统计和推广参数，不影响页面内容
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|spm)$", re.I)
+
+# 链接文本或URL像法律法规时优先抓取
+_LAW_PATTERN = re.compile(r"法|条例|规定|办法|解释|细则|意见|通知|law|regulation|fagui", re.I)
+
+# 不是网页的资源
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".zip", ".rar", ".7z",
+    ".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".ico", ".webp",
+    ".mp3", ".mp4", ".avi", ".wmv", ".flv", ".css", ".js", ".xml", ".json", ".txt",
+)
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    规范化URL（同一网页只保留一种写法）
+
+    解析相对链接，协议和主机名转小写，去掉默认端口、用户信息、片段（#...）和统计参数，
+    解析路径中的 . 和 ..，空路径补为 /。
+
+    Args:
+        url: 链接（可以是相对链接）
+        base: 链接所在网页的URL
+
+    Returns:
+        规范化后的URL，不是 http/https 链接时返回None
+    """
+    url = (url or "").strip()
+    if not url:
+        return None
+    if base:
+        url = urljoin(base, url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    host = parts.hostname.lower().rstrip(".")
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+
+    # 借助 urljoin 解析路径中的 . 和 ..
+    path = urlsplit(urljoin(f"{scheme}://{netloc}/", parts.path or "/")).path or "/"
+
+    # 其余参数原样保留（不重新编码，与配置中的URL保持同一个缓存键）
+    query = "&".join(
+        param for param in parts.query.split("&")
+        if param and not _TRACKING_PARAMS.match(param.split("=", 1)[0])
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class BloomFilter:
+    """布隆过滤器（可能误判为已存在，不会漏判）"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity: 预计存放的元素数
+            error_rate: 存满时的误判率
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # 双重哈希：由一个128位摘要派生出 k 个位置
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> bool:
+        """
+        加入元素
+
+        Returns:
+            是否为新元素（之前判定为不存在）
+        """
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p // 8] & (1 << (p % 8)) for p in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+@dataclass
+class CrawlScope:
+    """抓取范围"""
+    allowed_domains: List[str]  # 允许的域名（包括其子域名）
+    allowed_paths: List[str] = field(default_factory=list)  # 允许的路径前缀（为空表示不限制）
+    max_depth: int = 2  # 从种子出发最多跟随的链接层数
+
+    def __post_init__(self):
+        self.allowed_domains = [d.lower().strip(".") for d in self.allowed_domains if d]
+
+    @classmethod
+    def for_seeds(
+        cls,
+        seeds: Iterable[str],
+        allowed_paths: Optional[List[str]] = None,
+        max_depth: Optional[int] = None
+    ) -> "CrawlScope":
+        """以种子URL的主机名作为允许的域名"""
+        domains = []
+        for seed in seeds:
+            url = normalize_url(seed)
+            if url:
+                domains.append(urlsplit(url).hostname)
+        return cls(
+            allowed_domains=list(dict.fromkeys(domains)),
+            allowed_paths=allowed_paths or [],
+            max_depth=Config.CRAWL_MAX_DEPTH if max_depth is None else max_depth
+        )
+
+    def allows(self, url: str) -> bool:
+        """规范化后的URL是否在抓取范围内"""
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if not any(host == d or host.endswith("." + d) for d in self.allowed_domains):
+            return False
+        if self.allowed_paths and not any(parts.path.startswith(p) for p in self.allowed_paths):
+            return False
+        return not parts.path.lower().endswith(SKIPPED_EXTENSIONS)
+
+
+@dataclass(order=True)
+class FrontierItem:
+    """待抓取的URL"""
+    priority: int
+    seq: int
+    url: str = field(compare=False)
+    depth: int = field(compare=False)
+
+
+class CrawlFrontier:
+    """
+    抓取边界
+
+    按优先级出队：层数浅的先抓，同一层中链接文本或URL像法律法规的先抓，其余按发现顺序。
+    """
+
+    def __init__(
+        self,
+        scope: CrawlScope,
+        capacity: int = 100_000,
+        error_rate: float = 0.001
+    ):
+        """
+        初始化抓取边界
+
+        Args:
+            scope: 抓取范围
+            capacity: 预计见到的URL数（布隆过滤器容量）
+            error_rate: 布隆过滤器的误判率（误判的新URL会被当作已见过而跳过）
+        """
+        self.scope = scope
+        self.seen = BloomFilter(capacity, error_rate)
+        self._heap: List[FrontierItem] = []
+        self._seq = itertools.count()
+        self.stats = {"queued": 0, "duplicates": 0, "out_of_scope": 0}
+
+    def add(
+        self,
+        url: str,
+        depth: int = 0,
+        anchor_text: str = "",
+        base: Optional[str] = None,
+        force: bool = False
+    ) -> bool:
+        """
+        加入待抓取URL
+
+        Args:
+            url: 链接（可以是相对链接）
+            depth: 从种子出发的层数
+            anchor_text: 链接文本（用于计算优先级）
+            base: 链接所在网页的URL
+            force: 不检查抓取范围（用于种子URL）
+
+        Returns:
+            是否加入了队列
+        """
+        url = normalize_url(url, base)
+        if url is None:
+            return False
+        if not force and (depth > self.scope.max_depth or not self.scope.allows(url)):
+            self.stats["out_of_scope"] += 1
+            return False
+        if not self.seen.add(url):
+            self.stats["duplicates"] += 1
+            return False
+
+        bonus = 5 if _LAW_PATTERN.search(anchor_text) or _LAW_PATTERN.search(url) else 0
+        heapq.heappush(self._heap, FrontierItem(depth * 10 - bonus, next(self._seq), url, depth))
+        self.stats["queued"] += 1
+        return True
+
+    def pop(self) -> FrontierItem:
+        """取出优先级最高的URL"""
+        return heapq.heappop(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,184 @@
+"""
+抓取引擎
+所有请求共用一个带连接池的 httpx.AsyncClient（可选HTTP/2），
+按主机限制并发数和请求间隔（礼貌抓取），再加一个全局并发上限，
+重试和退避策略集中在这里，批量抓取时各主机的网络等待可以安全地重叠
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import Config
+
+
+# 不重试的状态码（资源不存在或无权访问），其余错误按指数退避重试
+_NO_RETRY_STATUS = {401, 403, 404}
+
+
+@dataclass
+class _HostState:
+    """单个主机的并发和请求间隔状态"""
+    semaphore: asyncio.Semaphore
+    interval: float
+    next_start: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def wait_turn(self):
+        """等待到本主机允许发起下一个请求的时刻（先预约时刻再等待，不阻塞其他请求预约）"""
+        async with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class CrawlerEngine:
+    """并发抓取引擎（在 async with 中使用，连接池随之创建和关闭）"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        host_concurrency: Optional[int] = None,
+        host_rate: Optional[float] = None,
+        http2: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        max_retries: int = 3
+    ):
+        """
+        初始化抓取引擎
+
+        Args:
+            max_concurrency: 全局同时进行的请求数上限（为None则读取Config）
+            host_concurrency: 每个主机同时进行的请求数上限（为None则读取Config）
+            host_rate: 每个主机每秒最多发起的请求数，0表示不限制（为None则读取Config）
+            http2: 是否启用HTTP/2（为None则读取Config，未安装 h2 时自动关闭）
+            timeout: 单次请求超时（秒）
+            max_retries: 每个URL最多尝试的次数
+        """
+        self.max_concurrency = max(1, max_concurrency or Config.CRAWL_MAX_CONCURRENCY)
+        self.host_concurrency = max(1, host_concurrency or Config.CRAWL_HOST_CONCURRENCY)
+        self.host_rate = Config.CRAWL_HOST_RATE if host_rate is None else host_rate
+        self.http2 = Config.CRAWL_HTTP2 if http2 is None else http2
+        self.timeout = timeout or Config.CRAWL_TIMEOUT
+        self.max_retries = max(1, max_retries)
+
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️  未安装 h2，HTTP/2 已关闭（pip install httpx[http2]）")
+                self.http2 = False
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _HostState] = {}
+        self._stats = {"requests": 0, "retries": 0, "failed": 0, "not_modified": 0, "bytes": 0}
+
+    async def __aenter__(self) -> "CrawlerEngine":
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            follow_redirects=True,
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts = {}
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            interval = 1.0 / self.host_rate if self.host_rate > 0 else 0.0
+            state = _HostState(asyncio.Semaphore(self.host_concurrency), interval)
+            self._hosts[host] = state
+        return state
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> Optional[httpx.Response]:
+        """
+        抓取URL（失败时按状态码重试）
+
+        Args:
+            url: 目标URL
+            headers: 请求头
+
+        Returns:
+            成功的响应（包括条件请求的304），最终失败返回None
+        """
+        if self._client is None:
+            raise RuntimeError("CrawlerEngine 需要在 async with 中使用")
+
+        host = self._host(url)
+
+        for attempt in range(self.max_retries):
+            wait_time = 2 ** attempt  # 指数退避
+
+            try:
+                # 先占用主机名额并等待礼貌间隔，再占用全局名额，等待中的请求不占全局并发
+                async with host.semaphore:
+                    await host.wait_turn()
+                    async with self._global:
+                        self._stats["requests"] += 1
+                        response = await self._client.get(url, headers=headers)
+
+                # 条件请求命中（内容未变化），直接返回
+                if response.status_code == 304:
+                    self._stats["not_modified"] += 1
+                    return response
+
+                response.raise_for_status()
+                self._stats["bytes"] += len(response.content)
+                return response
+
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                print(f"❌ HTTP错误 {status_code}: {url}")
+
+                if status_code in _NO_RETRY_STATUS:
+                    break
+
+                # 412 错误通常是反爬虫，可以重试但增加等待时间
+                if status_code == 412:
+                    wait_time = 3 * (attempt + 1)  # 3s, 6s, 9s
+                    if attempt == self.max_retries - 1:
+                        print(f"💡 建议: 该网站 ({url}) 可能需要浏览器访问或已加强反爬虫")
+
+            except httpx.TimeoutException:
+                print(f"⏱️  请求超时 (尝试 {attempt + 1}/{self.max_retries}): {url}")
+            except httpx.HTTPError as e:
+                print(f"❌ 抓取失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
+
+            if attempt < self.max_retries - 1:
+                self._stats["retries"] += 1
+                print(f"⏳ 等待 {wait_time}s 后重试: {url}")
+                await asyncio.sleep(wait_time)
+
+        self._stats["failed"] += 1
+        return None
+
+    def stats(self) -> dict:
+        """
+        获取统计信息
+
+        Returns:
+            {requests, retries, failed, not_modified, bytes, hosts, http2}
+        """
+        return {**self._stats, "hosts": len(self._hosts), "http2": self.http2}
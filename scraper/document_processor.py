@@ -0,0 +1,112 @@
+"""
+文档处理器
+HTML只解析一次：在同一棵文档树上依次完成主要内容提取、清洗、标题提取和章节解析
+"""
+from datetime import datetime
+from typing import Optional, Union
+
+from ..models import StructuredContent
+from .html_cleaner import HTMLCleaner
+from .content_parser import ContentParser
+from .html_backend import HTMLBackend, BeautifulSoupBackend, create_html_backend
+
+
+class DocumentProcessor:
+    """文档处理器（清洗 + 解析）"""
+
+    def __init__(
+        self,
+        cleaner: Optional[HTMLCleaner] = None,
+        parser: Optional[ContentParser] = None,
+        backend: Union[str, HTMLBackend, None] = None
+    ):
+        """
+        初始化文档处理器
+
+        Args:
+            cleaner: HTML清洗器（为None则新建）
+            parser: 内容解析器（为None则新建）
+            backend: HTML后端或其名称（bs4、lxml、selectolax），为None则读取 Config.HTML_BACKEND
+        """
+        self.cleaner = cleaner or HTMLCleaner()
+        self.parser = parser or ContentParser()
+
+        if not isinstance(backend, HTMLBackend):
+            backend = create_html_backend(backend, self.cleaner)
+        if isinstance(backend, BeautifulSoupBackend):
+            backend.parser = self.parser
+        self.backend = backend
+
+    def process(
+        self,
+        html: str,
+        url: str,
+        title: Optional[str] = None
+    ) -> tuple[str, StructuredContent]:
+        """
+        处理原始HTML
+
+        Args:
+            html: 原始HTML
+            url: 来源URL
+            title: 文档标题（如果为None则从正文提取）
+
+        Returns:
+            (纯文本, 结构化内容)
+        """
+        root = self.backend.load(html) if html else None
+        root = self.backend.clean(root) if root is not None else None
+        if root is None:
+            return "", self.parser.parse(html="", url=url, title=title)
+
+        # 一次遍历同时得到章节结构和纯文本
+        builder = self.parser.section_builder()
+        self.backend.walk(root, builder)
+        text = builder.text_content
+        sections = builder.finish() or self.parser.fallback_sections(text)
+
+        content = StructuredContent(
+            url=url,
+            title=title or self.backend.title(root),
+            sections=sections,
+            scraped_at=datetime.now()
+        )
+        return self.cleaner.normalize_text(text), content
+
+
+def main():
+    """测试文档处理器"""
+    sample_html = """
+    <html>
+    <head><title>测试页面</title><script>console.log('test');</script></head>
+    <body>
+        <nav>导航栏</nav>
+        <div class="content">
+            <h1>离职经济补偿指南</h1>
+            <h2>一、法律依据</h2>
+            <p>根据《劳动合同法》第46条规定，用人单位应当向劳动者支付经济补偿。</p>
+            <div class="social-share">分享</div>
+            <h2>二、计算方法</h2>
+            <p>补偿金 = 工作年限 × 月平均工资</p>
+        </div>
+        <footer>页脚</footer>
+    </body>
+    </html>
+    """
+
+    print("🧪 测试文档处理器")
+    print("=" * 60)
+
+    processor = DocumentProcessor()
+    text, content = processor.process(sample_html, "https://example.com/test")
+
+    print(f"标题: {content.title}")
+    print(f"章节数: {len(content.sections)}")
+    for section in content.sections:
+        print(f"  [Lv{section.level}] {section.title}: {section.content[:40]}")
+    print("\n纯文本:")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
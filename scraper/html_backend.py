@@ -0,0 +1,494 @@
+"""
+HTML后端
+清洗和解析用到的树操作（解析、查找主要内容、清洗、提取标题/段落/文本）的多种实现：
+BeautifulSoup（默认）、lxml（XPath，无需Python层的树对象）和 selectolax（需安装）。
+各后端遵循与 HTMLCleaner/ContentParser 相同的规则，对同一页面得到相同的章节结构
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Optional, Any, List
+
+from lxml import etree
+
+from ..config import Config
+from .html_cleaner import HTMLCleaner
+from .content_parser import ContentParser, SectionBuilder, STRING_CONTAINERS, walk_soup
+
+# 即使为空也保留的标签
+_KEEP_EMPTY = frozenset(['br', 'hr', 'img'])
+
+# 没有标题时使用的默认标题
+UNTITLED = "未命名文档"
+
+
+class HTMLBackend(ABC):
+    """HTML后端基类"""
+
+    name: str = ""
+
+    def __init__(self, cleaner: Optional[HTMLCleaner] = None):
+        """
+        初始化后端
+
+        Args:
+            cleaner: 提供清洗规则（不需要的标签、class、id和内容选择器）的清洗器
+        """
+        self.cleaner = cleaner or HTMLCleaner()
+
+    @abstractmethod
+    def load(self, html: str) -> Any:
+        """
+        解析HTML并定位主要内容
+
+        Args:
+            html: 原始HTML（非空）
+
+        Returns:
+            后端自己的文档对象（只包含主要内容，找不到时为整个文档），解析结果为空时返回None
+        """
+
+    @abstractmethod
+    def clean(self, root: Any) -> Any:
+        """
+        就地清洗文档
+
+        Args:
+            root: load 返回的文档对象
+
+        Returns:
+            清洗后的文档对象，内容被全部移除时返回None
+        """
+
+    @abstractmethod
+    def title(self, root: Any) -> str:
+        """提取标题（h1、title 或 og:title，都没有时返回默认标题）"""
+
+    @abstractmethod
+    def walk(self, root: Any, handler: SectionBuilder):
+        """
+        按文档顺序遍历一次文档，向构建器发送 start/text/end 事件
+
+        跳过注释以及 script/style 等标签的内容，每个文本节点只发送一次。
+
+        Args:
+            root: 清洗后的文档对象
+            handler: 章节构建器
+        """
+
+
+# ==================== BeautifulSoup ====================
+
+class BeautifulSoupBackend(HTMLBackend):
+    """BeautifulSoup后端（直接使用 HTMLCleaner/ContentParser 的实现）"""
+
+    name = "bs4"
+
+    def __init__(
+        self,
+        cleaner: Optional[HTMLCleaner] = None,
+        parser: Optional[ContentParser] = None
+    ):
+        super().__init__(cleaner)
+        self.parser = parser or ContentParser()
+
+    def load(self, html: str) -> Any:
+        return self.cleaner.main_content_soup(html)
+
+    def clean(self, root: Any) -> Any:
+        self.cleaner.clean_soup(root)
+        return root
+
+    def title(self, root: Any) -> str:
+        return self.parser._extract_title(root)
+
+    def walk(self, root: Any, handler: SectionBuilder):
+        walk_soup(root, handler)
+
+
+# ==================== lxml ====================
+
+# lxml 不接受带编码声明的Unicode字符串
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+# 主要内容选择器（HTMLCleaner.content_selectors 中用到的几种形式）
+_SELECTOR = re.compile(
+    r'^(?:(?P<tag>[a-z][a-z0-9]*)'
+    r'|\[(?P<attr>class|id)\*="(?P<substring>[^"]+)"\]'
+    r'|\.(?P<class_name>[\w-]+)'
+    r'|#(?P<id>[\w-]+))$'
+)
+
+# 元素内计入文本的文本节点（不含注释和 script/style 等标签中的文本）
+_TEXT_NODES = etree.XPath(
+    'descendant::text()[not(' + ' or '.join(
+        f'ancestor::{tag}' for tag in sorted(STRING_CONTAINERS)
+    ) + ')]',
+    smart_strings=False
+)
+
+
+def css_to_xpath(selector: str) -> str:
+    """
+    把简单的CSS选择器转换为XPath（从当前节点开始，包含当前节点）
+
+    Args:
+        selector: 标签名、[class*="x"]、[id*="x"]、.x 或 #x
+
+    Returns:
+        XPath表达式
+
+    Raises:
+        ValueError: 不支持的选择器
+    """
+    match = _SELECTOR.match(selector)
+    if not match:
+        raise ValueError(f"不支持的选择器: {selector}")
+
+    if match.group('tag'):
+        return f'descendant-or-self::{match.group("tag")}'
+    if match.group('attr'):
+        return f'descendant-or-self::*[contains(@{match.group("attr")}, "{match.group("substring")}")]'
+    if match.group('class_name'):
+        return (
+            'descendant-or-self::*[contains(concat(" ", normalize-space(@class), " "), '
+            f'" {match.group("class_name")} ")]'
+        )
+    return f'descendant-or-self::*[@id="{match.group("id")}"]'
+
+
+class LxmlBackend(HTMLBackend):
+    """
+    lxml后端
+
+    元素查找用编译好的XPath在C层完成。移除元素时留下一个空注释承接其后的文本，
+    使相邻文本保持为独立的文本节点（与 BeautifulSoup 移除元素后的结果一致）。
+    """
+
+    name = "lxml"
+
+    def __init__(self, cleaner: Optional[HTMLCleaner] = None):
+        super().__init__(cleaner)
+        self._selectors = [etree.XPath(css_to_xpath(s)) for s in self.cleaner.content_selectors]
+
+    def load(self, html: str) -> Any:
+        doc = etree.fromstring(_XML_DECLARATION.sub('', html, count=1), etree.HTMLParser())
+        if doc is None:
+            return None
+
+        main_content = self._find_main_content(doc)
+        return doc if main_content is None else main_content
+
+    def _find_main_content(self, doc) -> Optional[Any]:
+        # 策略1: 查找常见的内容容器
+        for selector in self._selectors:
+            elements = selector(doc)
+            if elements:
+                return max(elements, key=self._text_length)
+
+        # 策略2: 查找最长的div（跳过导航、侧边栏等）
+        unwanted = self.cleaner.unwanted_classes + self.cleaner.unwanted_ids
+        valid_divs = []
+        for div in doc.iter('div'):
+            div_class = ' '.join((div.get('class') or '').split()).lower()
+            div_id = (div.get('id') or '').lower()
+            if not any(name in div_class or name in div_id for name in unwanted):
+                valid_divs.append(div)
+        if valid_divs:
+            return max(valid_divs, key=self._text_length)
+
+        # 策略3: 使用body
+        return next(doc.iter('body'), None)
+
+    def _is_unwanted(self, element) -> bool:
+        return self.cleaner.is_unwanted(element.tag, element.get('class'), element.get('id'))
+
+    @staticmethod
+    def _drop(element):
+        """移除元素，其后的文本由占位注释承接"""
+        placeholder = etree.Comment()
+        placeholder.tail = element.tail
+        element.getparent().replace(element, placeholder)
+
+    def clean(self, root: Any) -> Any:
+        if root is None or self._is_unwanted(root):
+            return None
+
+        # 1. 一次遍历移除不需要的标签和带有特定class/id的元素（注释不计入文本，无需移除）
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            for child in list(element):
+                if not isinstance(child.tag, str):
+                    continue
+                if self._is_unwanted(child):
+                    self._drop(child)
+                else:
+                    stack.append(child)
+
+        # 2. 后序遍历移除空标签
+        stack = [(root, False, False)]
+        while stack:
+            element, children_done, in_container = stack.pop()
+            if not children_done:
+                stack.append((element, True, in_container))
+                child_in_container = in_container or element.tag in STRING_CONTAINERS
+                stack.extend(
+                    (child, False, child_in_container)
+                    for child in element if isinstance(child.tag, str)
+                )
+                continue
+
+            if element.tag in _KEEP_EMPTY:
+                continue
+            if any(isinstance(child.tag, str) for child in element):
+                continue
+            # script/style 等标签内部元素的文本不计入该元素自身的文本
+            if not in_container or element.tag in STRING_CONTAINERS:
+                text = (element.text or '') + ''.join(child.tail or '' for child in element)
+                if text.strip():
+                    continue
+
+            if element is root:
+                return None
+            self._drop(element)
+
+        return root
+
+    def title(self, root: Any) -> str:
+        if root is None:
+            return UNTITLED
+
+        for tag in ('h1', 'title'):
+            element = next(root.iter(tag), None)
+            if element is not None:
+                return self._joined_text(element)
+
+        for meta in root.iter('meta'):
+            if meta.get('property') == 'og:title':
+                return meta.get('content') or UNTITLED
+        return UNTITLED
+
+    def walk(self, root: Any, handler: SectionBuilder):
+        # lxml 中元素之后的文本是该元素的 tail，在元素结束后发送
+        stack = [(root, False)]
+        while stack:
+            element, exiting = stack.pop()
+            if exiting:
+                handler.end(element.tag)
+                if element.tail and element is not root:
+                    handler.text(element.tail)
+                continue
+
+            if not isinstance(element.tag, str) or element.tag in STRING_CONTAINERS:
+                # 注释（包括移除元素留下的占位注释）和 script/style 等标签只发送其后的文本
+                if element.tail:
+                    handler.text(element.tail)
+                continue
+
+            handler.start(element.tag)
+            if element.text:
+                handler.text(element.text)
+            stack.append((element, True))
+            stack.extend((child, False) for child in reversed(element))
+
+    @staticmethod
+    def _strings(element) -> List[str]:
+        strings = _TEXT_NODES(element)
+        # 元素自身是 script/style 等标签时，其中的文本计入自身
+        if element.tag in STRING_CONTAINERS and element.text:
+            strings.insert(0, element.text)
+        return strings
+
+    @classmethod
+    def _joined_text(cls, element) -> str:
+        return ''.join(s.strip() for s in cls._strings(element))
+
+    @classmethod
+    def _text_length(cls, element) -> int:
+        return sum(len(s) for s in cls._strings(element))
+
+
+# ==================== selectolax ====================
+
+class SelectolaxBackend(HTMLBackend):
+    """selectolax（lexbor）后端"""
+
+    name = "selectolax"
+
+    def __init__(self, cleaner: Optional[HTMLCleaner] = None):
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError:
+            raise ImportError("请先安装 selectolax: pip install selectolax")
+
+        super().__init__(cleaner)
+        self._parser_class = LexborHTMLParser
+
+    def load(self, html: str) -> Any:
+        tree = self._parser_class(html)
+        if tree.root is None:
+            return None
+
+        # 策略1: 查找常见的内容容器
+        for selector in self.cleaner.content_selectors:
+            elements = tree.css(selector)
+            if elements:
+                return max(elements, key=self._text_length)
+
+        # 策略2: 查找最长的div（跳过导航、侧边栏等）
+        unwanted = self.cleaner.unwanted_classes + self.cleaner.unwanted_ids
+        valid_divs = []
+        for div in tree.css('div'):
+            attributes = div.attributes
+            div_class = ' '.join((attributes.get('class') or '').split()).lower()
+            div_id = (attributes.get('id') or '').lower()
+            if not any(name in div_class or name in div_id for name in unwanted):
+                valid_divs.append(div)
+        if valid_divs:
+            return max(valid_divs, key=self._text_length)
+
+        # 策略3: 使用body
+        return tree.body or tree.root
+
+    def _is_unwanted(self, node) -> bool:
+        attributes = node.attributes
+        return self.cleaner.is_unwanted(node.tag, attributes.get('class'), attributes.get('id'))
+
+    def clean(self, root: Any) -> Any:
+        if root is None or self._is_unwanted(root):
+            return None
+
+        # 1. 一次遍历移除不需要的标签和带有特定class/id的元素（注释不计入文本，无需移除）
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for child in list(node.iter()):
+                if not child.is_element_node:
+                    continue
+                if self._is_unwanted(child):
+                    child.decompose()
+                else:
+                    stack.append(child)
+
+        # 2. 后序遍历移除空标签
+        stack = [(root, False, False)]
+        while stack:
+            node, children_done, in_container = stack.pop()
+            if not children_done:
+                stack.append((node, True, in_container))
+                child_in_container = in_container or node.tag in STRING_CONTAINERS
+                stack.extend(
+                    (child, False, child_in_container)
+                    for child in node.iter() if child.is_element_node
+                )
+                continue
+
+            if node.tag in _KEEP_EMPTY:
+                continue
+            children = list(node.iter(include_text=True))
+            if any(child.is_element_node for child in children):
+                continue
+            # script/style 等标签内部元素的文本不计入该元素自身的文本
+            if not in_container or node.tag in STRING_CONTAINERS:
+                text = ''.join(child.text_content for child in children if child.is_text_node)
+                if text.strip():
+                    continue
+
+            if node is root:
+                return None
+            node.decompose()
+
+        return root
+
+    def title(self, root: Any) -> str:
+        if root is None:
+            return UNTITLED
+
+        # css_first 从根节点本身开始匹配
+        for tag in ('h1', 'title'):
+            node = root.css_first(tag)
+            if node is not None:
+                return self._joined_text(node)
+
+        meta = root.css_first('meta[property="og:title"]')
+        if meta is not None:
+            return meta.attributes.get('content') or UNTITLED
+        return UNTITLED
+
+    def walk(self, root: Any, handler: SectionBuilder):
+        stack = [(root, False)]
+        while stack:
+            node, exiting = stack.pop()
+            if exiting:
+                handler.end(node.tag)
+            elif node.is_text_node:
+                handler.text(node.text_content)
+            elif node.is_element_node and node.tag not in STRING_CONTAINERS:
+                handler.start(node.tag)
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(list(node.iter(include_text=True))))
+
+    @staticmethod
+    def _strings(root) -> List[str]:
+        """按文档顺序收集计入文本的文本节点"""
+        strings = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.is_text_node:
+                strings.append(node.text_content)
+            elif node.is_element_node and (node is root or node.tag not in STRING_CONTAINERS):
+                stack.extend(reversed(list(node.iter(include_text=True))))
+        return strings
+
+    @classmethod
+    def _joined_text(cls, node) -> str:
+        return ''.join(s.strip() for s in cls._strings(node))
+
+    @classmethod
+    def _text_length(cls, node) -> int:
+        return sum(len(s) for s in cls._strings(node))
+
+
+# ==================== 工厂函数 ====================
+
+_BACKENDS = {
+    "bs4": BeautifulSoupBackend,
+    "lxml": LxmlBackend,
+    "selectolax": SelectolaxBackend,
+}
+
+
+def create_html_backend(
+    name: Optional[str] = None,
+    cleaner: Optional[HTMLCleaner] = None
+) -> HTMLBackend:
+    """
+    创建HTML后端
+
+    Args:
+        name: 后端名称（bs4、lxml、selectolax），为None则读取 Config.HTML_BACKEND
+        cleaner: 提供清洗规则的清洗器
+
+    Returns:
+        HTML后端
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    name = (name or Config.HTML_BACKEND).lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"未知的HTML后端: {name}（可选: {', '.join(_BACKENDS)}）")
+    return _BACKENDS[name](cleaner)
+
+
+def available_html_backends() -> List[str]:
+    """已安装依赖、可以使用的后端名称"""
+    available = []
+    for name, backend_class in _BACKENDS.items():
+        try:
+            backend_class()
+            available.append(name)
+        except ImportError:
+            continue
+    return available
@@ -2,7 +2,7 @@
 HTML清洗器
 使用 BeautifulSoup 清洗和提取HTML内容
 """
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup, Comment, Tag
 from typing import Optional
 import re
 
@@ -10,6 +10,9 @@ import re
 class HTMLCleaner:
     """HTML清洗器"""
 
+    # 清洗规则版本（修改清洗逻辑时递增，增量构建据此重新处理已有文档）
+    VERSION = 1
+
     def __init__(self):
         """初始化清洗器"""
         self.unwanted_tags = [
@@ -31,6 +34,60 @@ class HTMLCleaner:
             'comment', 'comments'
         ]
 
+        # 主要内容容器的选择器（按优先级排列）
+        self.content_selectors = [
+            'article',
+            '[class*="content"]',
+            '[class*="main"]',
+            '[class*="article"]',
+            '[id*="content"]',
+            '[id*="main"]',
+            '[id*="article"]',
+            'main',
+            '.content',
+            '#content',
+            '.main-content',
+            '#main-content'
+        ]
+
+        self.compile_rules()
+
+    def compile_rules(self):
+        """
+        预编译黑名单匹配规则（修改 unwanted_tags/classes/ids 后需重新调用）
+
+        所有class名合并成一个不区分大小写的正则（各名称之间为"或"），id名同理，
+        与逐个名称 re.compile(name, re.I) 匹配的结果相同，但每个元素只需匹配一次。
+        """
+        self._unwanted_tag_set = frozenset(self.unwanted_tags)
+        self._unwanted_class_pattern = _alternation(self.unwanted_classes)
+        self._unwanted_id_pattern = _alternation(self.unwanted_ids)
+
+    def is_unwanted(
+        self,
+        tag_name: str,
+        class_name: Optional[str],
+        element_id: Optional[str]
+    ) -> bool:
+        """
+        判断元素是否应当移除
+
+        Args:
+            tag_name: 标签名
+            class_name: class属性（多个class以空格分隔）
+            element_id: id属性
+
+        Returns:
+            标签在黑名单中，或class/id匹配黑名单时返回True
+        """
+        if tag_name in self._unwanted_tag_set:
+            return True
+        if class_name and self._unwanted_class_pattern and self._unwanted_class_pattern.search(class_name):
+            return True
+        return bool(
+            element_id and self._unwanted_id_pattern and self._unwanted_id_pattern.search(element_id)
+        )
+
     def clean(self, html: str) -> str:
         """
         清洗HTML
@@ -45,45 +102,63 @@ class HTMLCleaner:
             return ""
 
         soup = BeautifulSoup(html, 'lxml')
+        self.clean_soup(soup)
+        return str(soup)
 
-        # 1. 移除注释
-        for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-            comment.extract()
+    def clean_soup(self, soup: BeautifulSoup):
+        """
+        就地清洗已解析的文档树
 
-        # 2. 移除不需要的标签
-        for tag_name in self.unwanted_tags:
-            for tag in soup.find_all(tag_name):
-                tag.decompose()
+        Args:
+            soup: 文档树（会被修改）
+        """
+        # 1. 一次遍历移除注释、不需要的标签以及带有特定class/id的元素
+        stack = [soup]
+        while stack:
+            tag = stack.pop()
+            for child in list(tag.contents):
+                if isinstance(child, Comment):
+                    child.extract()
+                elif isinstance(child, Tag):
+                    if self._is_unwanted_tag(child):
+                        child.decompose()
+                    else:
+                        stack.append(child)
+
+        # 2. 移除空标签
+        self._remove_empty_tags(soup)
 
-        # 3. 移除带有特定class的元素
-        for class_name in self.unwanted_classes:
-            for tag in soup.find_all(class_=re.compile(class_name, re.I)):
-                tag.decompose()
+    def _is_unwanted_tag(self, tag: Tag) -> bool:
+        class_name = tag.get('class')
+        if class_name and not isinstance(class_name, str):
+            class_name = ' '.join(class_name)
+        return self.is_unwanted(tag.name, class_name, tag.get('id'))
 
-        # 4. 移除带有特定id的元素
-        for id_name in self.unwanted_ids:
-            for tag in soup.find_all(id=re.compile(id_name, re.I)):
-                tag.decompose()
+    def _remove_empty_tags(self, soup: BeautifulSoup):
+        """
+        移除空标签（没有文本也没有子标签的标签）
 
-        # 5. 移除空标签
-        self._remove_empty_tags(soup)
+        后序遍历：先处理子标签再判断父标签，子标签被移除后父标签可能随之变空，
+        一次遍历即可得到与反复扫描相同的结果，耗时与节点数成线性关系。
+        使用显式栈而不是递归，深层嵌套的页面不会超出递归深度。
+        """
+        stack = [(soup, False)]
+        while stack:
+            tag, children_done = stack.pop()
+            if not children_done:
+                stack.append((tag, True))
+                stack.extend((child, False) for child in tag.contents if isinstance(child, Tag))
+                continue
 
-        return str(soup)
+            # 跳过根节点和某些标签
+            if tag is soup or tag.name in ['br', 'hr', 'img']:
+                continue
 
-    def _remove_empty_tags(self, soup: BeautifulSoup):
-        """递归移除空标签"""
-        changed = True
-        while changed:
-            changed = False
-            for tag in soup.find_all():
-                # 跳过某些标签
-                if tag.name in ['br', 'hr', 'img']:
-                    continue
-
-                # 如果标签内容为空且没有子标签
-                if not tag.get_text(strip=True) and not tag.find_all():
-                    tag.decompose()
-                    changed = True
+            # 子标签已处理完毕：仍有子标签的保留，否则只需检查直接文本
+            if any(isinstance(child, Tag) for child in tag.contents):
+                continue
+            if not tag.get_text(strip=True):
+                tag.decompose()
 
     def extract_text(self, html: str) -> str:
         """
@@ -98,17 +173,36 @@ class HTMLCleaner:
         if not html:
             return ""
 
-        soup = BeautifulSoup(html, 'lxml')
+        return self.soup_text(BeautifulSoup(html, 'lxml'))
 
-        # 移除不需要的标签
-        for tag_name in self.unwanted_tags:
-            for tag in soup.find_all(tag_name):
+    def soup_text(self, soup: BeautifulSoup) -> str:
+        """
+        从已解析的文档树提取纯文本
+
+        Args:
+            soup: 文档树（会移除其中不需要的标签）
+
+        Returns:
+            纯文本内容
+        """
+        # 移除不需要的标签（一次查找所有标签名）
+        for tag in soup.find_all(self.unwanted_tags):
+            if not tag.decomposed:
                 tag.decompose()
 
-        # 获取文本
-        text = soup.get_text(separator='\n', strip=True)
+        return self.normalize_text(soup.get_text(separator='\n', strip=True))
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        清理提取出的文本中多余的空白
 
-        # 清理多余的空白
+        Args:
+            text: 以换行分隔的文本
+
+        Returns:
+            清理后的文本
+        """
         text = re.sub(r'\n\s*\n', '\n\n', text)  # 多个空行变成两个
         text = re.sub(r' +', ' ', text)  # 多个空格变成一个
 
@@ -127,28 +221,27 @@ class HTMLCleaner:
         if not html:
             return None
 
-        soup = BeautifulSoup(html, 'lxml')
+        main_content = self.find_main_content(BeautifulSoup(html, 'lxml'))
+        if main_content:
+            return str(main_content)
 
+        return None
+
+    def find_main_content(self, soup: BeautifulSoup) -> Optional[Tag]:
+        """
+        在已解析的文档树中查找主要内容元素
+
+        Args:
+            soup: 文档树
+
+        Returns:
+            主要内容元素，如果找不到返回None
+        """
         # 尝试多种策略找到主要内容
         main_content = None
 
         # 策略1: 查找常见的内容容器
-        content_selectors = [
-            'article',
-            '[class*="content"]',
-            '[class*="main"]',
-            '[class*="article"]',
-            '[id*="content"]',
-            '[id*="main"]',
-            '[id*="article"]',
-            'main',
-            '.content',
-            '#content',
-            '.main-content',
-            '#main-content'
-        ]
-
-        for selector in content_selectors:
+        for selector in self.content_selectors:
             try:
                 if selector.startswith('[') or selector.startswith('.') or selector.startswith('#'):
                     elements = soup.select(selector)
@@ -189,14 +282,31 @@ class HTMLCleaner:
         if not main_content:
             main_content = soup.find('body')
 
-        if main_content:
-            return str(main_content)
+        return main_content
 
-        return None
+    def main_content_soup(self, html: str) -> BeautifulSoup:
+        """
+        解析HTML并只保留主要内容，得到可继续就地处理的文档树
+
+        Args:
+            html: 原始HTML
+
+        Returns:
+            只包含主要内容元素的文档树（找不到时为整个文档）
+        """
+        soup = BeautifulSoup(html, 'lxml')
+        main_content = self.find_main_content(soup)
+        if main_content is None:
+            return soup
+
+        # 把主要内容移到新的文档树中，不必序列化后重新解析
+        main_soup = BeautifulSoup('', 'lxml')
+        main_soup.append(main_content.extract())
+        return main_soup
 
     def clean_and_extract(self, html: str) -> tuple[str, str]:
         """
-        清洗并提取内容
+        清洗并提取内容（HTML只解析一次）
 
         Args:
             html: 原始HTML
@@ -204,20 +314,25 @@ class HTMLCleaner:
         Returns:
             (清洗后的HTML, 纯文本)
         """
-        # 先提取主要内容
-        main_content = self.extract_main_content(html)
-        if not main_content:
-            main_content = html
-
-        # 清洗HTML
-        cleaned_html = self.clean(main_content)
+        if not html:
+            return "", ""
 
-        # 提取纯文本
-        text = self.extract_text(cleaned_html)
+        # 先提取主要内容，再在同一棵树上清洗和提取纯文本
+        soup = self.main_content_soup(html)
+        self.clean_soup(soup)
+        cleaned_html = str(soup)
+        text = self.soup_text(soup)
 
         return cleaned_html, text
 
 
+def _alternation(names: list[str]) -> Optional[re.Pattern]:
+    """把多个正则合并成一个不区分大小写的"或"正则（列表为空时返回None）"""
+    if not names:
+        return None
+    return re.compile('|'.join(f'(?:{name})' for name in names), re.I)
+
+
 def test_cleaner():
     """测试清洗器"""
     sample_html = """
@@ -0,0 +1,165 @@
+"""
+链接跟随抓取
+从种子URL出发，按抓取边界的优先级逐层抓取范围内的网页；
+网页通过 WebScraper 写入同一个缓存（构建知识库时直接使用），
+所有请求共用一个 CrawlerEngine（连接池、按主机的并发和间隔限制）
+"""
+import asyncio
+from typing import Optional, List, AsyncIterator, Iterable
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+from ..config import Config
+from .crawler_engine import CrawlerEngine
+from .crawl_frontier import CrawlFrontier, CrawlScope, FrontierItem
+from .web_scraper import WebScraper
+
+
+_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def extract_links(html: str, url: str) -> List[tuple[str, str]]:
+    """
+    提取网页中的链接
+
+    Args:
+        html: 网页HTML
+        url: 网页URL（解析相对链接用，页面有 <base> 时以其为准）
+
+    Returns:
+        [(绝对URL, 链接文本)]，URL未经规范化
+    """
+    try:
+        # 按字节解析，带编码声明的页面也能解析
+        doc = lxml_html.document_fromstring(html.encode("utf-8"), parser=_PARSER)
+    except (etree.ParserError, ValueError):
+        return []
+
+    base = doc.find(".//base[@href]")
+    base_url = urljoin(url, base.get("href")) if base is not None else url
+
+    return [
+        (urljoin(base_url, anchor.get("href")), anchor.text_content().strip())
+        for anchor in doc.iter("a")
+        if anchor.get("href")
+    ]
+
+
+class LinkCrawler:
+    """链接跟随抓取器"""
+
+    def __init__(
+        self,
+        scope: CrawlScope,
+        scraper: Optional[WebScraper] = None,
+        max_pages: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ):
+        """
+        初始化抓取器
+
+        Args:
+            scope: 抓取范围（域名/路径白名单和深度限制）
+            scraper: 网页抓取器（为None则新建，网页写入 Config.CACHE_DIR）
+            max_pages: 最多抓取的网页数（为None则读取Config）
+            concurrency: 同时进行的抓取数（为None则使用 Config.CRAWL_MAX_CONCURRENCY）
+        """
+        self.scope = scope
+        self.scraper = scraper or WebScraper()
+        self.max_pages = max_pages or Config.CRAWL_MAX_PAGES
+        self.concurrency = max(1, concurrency or Config.CRAWL_MAX_CONCURRENCY)
+        self.frontier: Optional[CrawlFrontier] = None
+        self.stats = {}
+
+    async def crawl_iter(
+        self,
+        seeds: Iterable[str],
+        use_cache: bool = True
+    ) -> AsyncIterator[tuple[str, str]]:
+        """
+        从种子URL开始抓取，按完成顺序逐个返回网页
+
+        Args:
+            seeds: 种子URL（不受抓取范围限制）
+            use_cache: 已缓存的网页是否直接使用（否则发送条件请求确认是否变化）
+
+        Yields:
+            (url, html)
+        """
+        frontier = CrawlFrontier(self.scope, capacity=max(self.max_pages * 100, 10_000))
+        self.frontier = frontier
+        for seed in seeds:
+            frontier.add(seed, depth=0, force=True)
+
+        self.stats = {"fetched": 0, "failed": 0, "links": 0}
+        scheduled = 0
+        in_flight: dict[asyncio.Task, FrontierItem] = {}
+
+        async with CrawlerEngine() as engine:
+            try:
+                while frontier or in_flight:
+                    # 按优先级补充在途任务
+                    while frontier and len(in_flight) < self.concurrency and scheduled < self.max_pages:
+                        item = frontier.pop()
+                        task = asyncio.create_task(self.scraper.fetch(item.url, use_cache, engine=engine))
+                        in_flight[task] = item
+                        scheduled += 1
+                    if not in_flight:
+                        break
+
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        item = in_flight.pop(task)
+                        try:
+                            html = task.result()
+                        except Exception as e:
+                            # 单个网页出错不中断整个抓取
+                            print(f"⚠️  抓取失败 {item.url}: {e}")
+                            html = None
+                        if html is None:
+                            self.stats["failed"] += 1
+                            continue
+
+                        self.stats["fetched"] += 1
+                        if item.depth < self.scope.max_depth:
+                            for href, text in extract_links(html, item.url):
+                                self.stats["links"] += 1
+                                frontier.add(href, item.depth + 1, anchor_text=text)
+                        yield item.url, html
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                # 等待取消完成后再关闭抓取引擎，避免任务仍在使用已关闭的连接
+                await asyncio.gather(*in_flight, return_exceptions=True)
+                self.stats.update(frontier.stats, pending=len(frontier), engine=engine.stats())
+
+    async def crawl(self, seeds: Iterable[str], use_cache: bool = True) -> List[str]:
+        """
+        从种子URL开始抓取
+
+        Args:
+            seeds: 种子URL
+            use_cache: 已缓存的网页是否直接使用
+
+        Returns:
+            抓取成功的URL（按完成顺序）
+        """
+        return [url async for url, _ in self.crawl_iter(seeds, use_cache)]
+
+
+async def main():
+    """测试函数：从配置的目标URL出发抓取一层链接"""
+    seeds = Config.TARGET_URLS
+    crawler = LinkCrawler(CrawlScope.for_seeds(seeds, max_depth=1), max_pages=20)
+    urls = await crawler.crawl(seeds)
+
+    print("\n📋 抓取结果:")
+    print("=" * 60)
+    for url in urls:
+        print(f"✅ {url}")
+    print(f"\n📊 统计: {crawler.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
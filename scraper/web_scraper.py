@@ -1,14 +1,14 @@
 """
 网页抓取器
-使用 httpx 异步抓取目标网页，支持缓存和重试
+使用 httpx 异步抓取目标网页，支持缓存和重试（请求由 CrawlerEngine 统一调度），
+重新抓取已缓存的网页时使用条件请求，内容未变化（304）时不重新下载
 """
 import asyncio
-import hashlib
-from pathlib import Path
-from typing import Optional, List
-from datetime import datetime
-import httpx
+from typing import Optional, List, AsyncIterator
 from ..config import Config
+from .crawler_engine import CrawlerEngine
+from .cache_index import CacheIndex, cache_key, content_hash
+from .cache_store import open_cache_store
 
 
 class WebScraper:
@@ -17,77 +17,97 @@ class WebScraper:
     def __init__(self):
         """初始化抓取器"""
         self.cache_dir = Config.CACHE_DIR
-        self.rate_limit = Config.RATE_LIMIT_PER_SECOND
+        self.index = CacheIndex(self.cache_dir)
+        self.store = open_cache_store(cache_dir=self.cache_dir, index=self.index)
         self.user_agent = (
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/120.0.0.0 Safari/537.36"
         )
-        self._last_request_time = 0
-
-    async def _wait_for_rate_limit(self):
-        """等待速率限制"""
-        current_time = asyncio.get_event_loop().time()
-        time_since_last = current_time - self._last_request_time
-        min_interval = 1.0 / self.rate_limit
-
-        if time_since_last < min_interval:
-            await asyncio.sleep(min_interval - time_since_last)
-
-        self._last_request_time = asyncio.get_event_loop().time()
-
-    def _get_cache_path(self, url: str) -> Path:
-        """获取缓存文件路径"""
-        # 使用 URL 的 MD5 作为文件名
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        return self.cache_dir / f"{url_hash}.html"
-
-    def _get_cache_metadata_path(self, url: str) -> Path:
-        """获取缓存元数据路径"""
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        return self.cache_dir / f"{url_hash}.meta"
+        self.last_stats: dict = {}  # 最近一次批量抓取的引擎统计
 
     def _load_from_cache(self, url: str) -> Optional[str]:
         """从缓存加载HTML"""
-        cache_path = self._get_cache_path(url)
-        if cache_path.exists():
-            try:
-                return cache_path.read_text(encoding='utf-8')
-            except Exception as e:
-                print(f"⚠️  读取缓存失败: {e}")
-                return None
-        return None
+        try:
+            return self.store.read(cache_key(url))
+        except Exception as e:
+            print(f"⚠️  读取缓存失败: {e}")
+            return None
 
-    def _save_to_cache(self, url: str, html: str):
-        """保存HTML到缓存"""
-        cache_path = self._get_cache_path(url)
-        meta_path = self._get_cache_metadata_path(url)
+    def _save_to_cache(self, url: str, html: str, etag: Optional[str] = None,
+                       last_modified: Optional[str] = None, status: int = 200):
+        """保存HTML到缓存，并在缓存索引中记录验证信息"""
+        key = cache_key(url)
 
         try:
-            # 保存 HTML 内容
-            cache_path.write_text(html, encoding='utf-8')
+            # 内容未变化时不重写（缓存版本不变，增量构建会直接跳过）
+            entry = self.index.get(url)
+            if not (self.store.exists(key) and entry and entry.content_hash == content_hash(html)):
+                self.store.write(key, html)
 
-            # 保存元数据
-            metadata = f"url={url}\ntimestamp={datetime.now().isoformat()}\n"
-            meta_path.write_text(metadata, encoding='utf-8')
+            self.index.record(url, html, status=status, etag=etag, last_modified=last_modified)
 
             print(f"✅ 已缓存: {url}")
         except Exception as e:
             print(f"⚠️  保存缓存失败: {e}")
 
+    def _build_headers(self, url: str) -> dict:
+        """根据不同网站生成请求头"""
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Upgrade-Insecure-Requests": "1",
+            "Cache-Control": "max-age=0",
+        }
+
+        # 为特定网站添加 Referer（模拟从百度搜索进入）
+        if "m12333.cn" in url or "bendibao.com" in url:
+            headers["Referer"] = "https://www.baidu.com/"
+            headers["Sec-Fetch-Dest"] = "document"
+            headers["Sec-Fetch-Mode"] = "navigate"
+            headers["Sec-Fetch-Site"] = "cross-site"
+        else:
+            headers["Sec-Fetch-Dest"] = "document"
+            headers["Sec-Fetch-Mode"] = "navigate"
+            headers["Sec-Fetch-Site"] = "none"
+
+        return headers
+
+    @staticmethod
+    def _decode(content: bytes) -> str:
+        """解码响应内容（尝试多种编码）"""
+        for encoding in ['utf-8', 'gb2312', 'gbk']:
+            try:
+                return content.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+
+        # 使用 chardet 自动检测（如果可用）
+        try:
+            import chardet
+            detected = chardet.detect(content)
+            return content.decode(detected['encoding'])
+        except Exception:
+            # 最后使用默认编码并忽略错误
+            return content.decode('utf-8', errors='ignore')
+
     async def fetch(
         self,
         url: str,
         use_cache: bool = True,
-        max_retries: int = 3
+        max_retries: int = 3,
+        engine: Optional[CrawlerEngine] = None
     ) -> Optional[str]:
         """
         抓取单个网页
 
         Args:
             url: 目标URL
-            use_cache: 是否使用缓存
-            max_retries: 最大重试次数
+            use_cache: 是否直接使用缓存（否则重新请求，已缓存的网页发送条件请求）
+            max_retries: 最大重试次数（传入 engine 时以 engine 的设置为准）
+            engine: 共享的抓取引擎（为None则为本次请求单独创建）
 
         Returns:
             HTML内容，失败返回None
@@ -99,103 +119,84 @@ class WebScraper:
                 print(f"📦 使用缓存: {url}")
                 return cached_html
 
+        if engine is None:
+            async with CrawlerEngine(max_retries=max_retries) as engine:
+                return await self.fetch(url, use_cache=False, engine=engine)
+
+        # 已缓存且有验证信息时发送条件请求
+        headers = self._build_headers(url)
+        entry = self.index.get(url)
+        if entry and self.store.exists(cache_key(url)):
+            headers.update(entry.validators)
+
         # 抓取网页
         print(f"🌐 抓取中: {url}")
+        response = await engine.get(url, headers=headers)
+        if response is None:
+            print(f"❌ 抓取最终失败: {url}")
+            return None
 
-        # 根据不同网站设置不同的请求头
-        headers = {
-            "User-Agent": self.user_agent,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Cache-Control": "max-age=0",
-        }
+        if response.status_code == 304:
+            cached_html = self._load_from_cache(url)
+            if cached_html is not None:
+                self.index.mark_not_modified(url)
+                print(f"♻️  未变化 (304): {url}")
+                return cached_html
 
-        # 为特定网站添加 Referer（模拟从百度搜索进入）
-        if "m12333.cn" in url or "bendibao.com" in url:
-            headers["Referer"] = "https://www.baidu.com/"
-            headers["Sec-Fetch-Dest"] = "document"
-            headers["Sec-Fetch-Mode"] = "navigate"
-            headers["Sec-Fetch-Site"] = "cross-site"
-        else:
-            headers["Sec-Fetch-Dest"] = "document"
-            headers["Sec-Fetch-Mode"] = "navigate"
-            headers["Sec-Fetch-Site"] = "none"
+            # 缓存在发出请求后被删除或切换了存储方式：304 没有正文，去掉验证信息重新抓取
+            print(f"⚠️  未变化 (304) 但缓存不可读，重新抓取: {url}")
+            response = await engine.get(url, headers=self._build_headers(url))
+            if response is None or response.status_code == 304:
+                print(f"❌ 抓取最终失败: {url}")
+                return None
 
-        for attempt in range(max_retries):
+        html = self._decode(response.content)
+
+        # 保存到缓存
+        self._save_to_cache(
+            url, html,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            status=response.status_code
+        )
+
+        print(f"✅ 抓取成功: {url} ({len(html)} 字符)")
+        return html
+
+    async def fetch_iter(
+        self,
+        urls: List[str],
+        use_cache: bool = True,
+        max_retries: int = 3
+    ) -> AsyncIterator[tuple[str, Optional[str]]]:
+        """
+        并发抓取多个网页，按完成顺序逐个返回
+
+        所有请求共用一个抓取引擎（连接池、按主机的并发和间隔限制），
+        不同主机的网络等待相互重叠。
+
+        Args:
+            urls: URL列表
+            use_cache: 是否使用缓存
+            max_retries: 最大重试次数
+
+        Yields:
+            (url, html_content)，失败时 html_content 为None
+        """
+        async with CrawlerEngine(max_retries=max_retries) as engine:
+            async def fetch_one(url: str) -> tuple[str, Optional[str]]:
+                return url, await self.fetch(url, use_cache, engine=engine)
+
+            tasks = [asyncio.create_task(fetch_one(url)) for url in dict.fromkeys(urls)]
             try:
-                # 等待速率限制
-                await self._wait_for_rate_limit()
-
-                async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                    response = await client.get(url, headers=headers)
-                    response.raise_for_status()
-
-                    # 尝试多种编码
-                    html = None
-                    for encoding in ['utf-8', 'gb2312', 'gbk']:
-                        try:
-                            html = response.content.decode(encoding)
-                            break
-                        except UnicodeDecodeError:
-                            continue
-
-                    if html is None:
-                        # 使用 chardet 自动检测（如果可用）
-                        try:
-                            import chardet
-                            detected = chardet.detect(response.content)
-                            html = response.content.decode(detected['encoding'])
-                        except:
-                            # 最后使用默认编码并忽略错误
-                            html = response.content.decode('utf-8', errors='ignore')
-
-                    # 保存到缓存
-                    self._save_to_cache(url, html)
-
-                    print(f"✅ 抓取成功: {url} ({len(html)} 字符)")
-                    return html
-
-            except httpx.HTTPStatusError as e:
-                status_code = e.response.status_code
-                print(f"❌ HTTP错误 {status_code}: {url}")
-
-                # 412 错误通常是反爬虫，可以重试但增加等待时间
-                if status_code == 412:
-                    if attempt < max_retries - 1:
-                        wait_time = 3 * (attempt + 1)  # 3s, 6s, 9s
-                        print(f"⏳ 检测到反爬虫 (412)，等待 {wait_time}s 后重试...")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"💡 建议: 该网站 ({url}) 可能需要浏览器访问或已加强反爬虫")
-                        return None
-
-                # 404, 403, 401 不重试
-                if status_code in [404, 403, 401]:
-                    return None
-
-                # 502, 503 等服务器错误可以重试
-                if status_code in [502, 503, 504]:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        print(f"⏳ 服务器错误 ({status_code})，等待 {wait_time}s 后重试...")
-                        await asyncio.sleep(wait_time)
-                        continue
-            except httpx.TimeoutException:
-                print(f"⏱️  请求超时 (尝试 {attempt + 1}/{max_retries}): {url}")
-            except Exception as e:
-                print(f"❌ 抓取失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # 指数退避
-                print(f"⏳ 等待 {wait_time}s 后重试...")
-                await asyncio.sleep(wait_time)
-
-        print(f"❌ 抓取最终失败: {url}")
-        return None
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # 等待取消完成后再关闭抓取引擎，避免任务仍在使用已关闭的连接
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self.last_stats = engine.stats()
 
     async def fetch_all(
         self,
@@ -212,18 +213,19 @@ class WebScraper:
             max_retries: 最大重试次数
 
         Returns:
-            字典 {url: html_content}
+            字典 {url: html_content}（顺序与 urls 一致）
         """
         print(f"\n🚀 开始批量抓取 {len(urls)} 个网页...")
         print("=" * 60)
 
-        tasks = [self.fetch(url, use_cache, max_retries) for url in urls]
-        results = await asyncio.gather(*tasks)
+        fetched = {}
+        async for url, html in self.fetch_iter(urls, use_cache, max_retries):
+            fetched[url] = html
 
-        result_dict = dict(zip(urls, results))
+        result_dict = {url: fetched.get(url) for url in urls}
 
         # 统计结果
-        success_count = sum(1 for html in results if html is not None)
+        success_count = sum(1 for html in result_dict.values() if html is not None)
         print("\n" + "=" * 60)
         print(f"📊 抓取完成: 成功 {success_count}/{len(urls)}")
 
@@ -4,20 +4,20 @@
 用于处理无法自动抓取的网页
 """
 import sys
-import hashlib
 from pathlib import Path
-from datetime import datetime
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root.parent))
 
 from legal_rights.config import Config
+from legal_rights.scraper.cache_index import CacheIndex, cache_key
+from legal_rights.scraper.cache_store import open_cache_store
 
 
 def calculate_md5(url: str) -> str:
     """计算URL的MD5哈希"""
-    return hashlib.md5(url.encode()).hexdigest()
+    return cache_key(url)
 
 
 def add_to_cache(url: str, html_file: Path):
@@ -32,25 +32,25 @@ def add_to_cache(url: str, html_file: Path):
         print(f"❌ 文件不存在: {html_file}")
         return False
 
-    # 计算缓存路径
+    # 计算缓存键
     url_hash = calculate_md5(url)
-    cache_path = Config.CACHE_DIR / f"{url_hash}.html"
-    meta_path = Config.CACHE_DIR / f"{url_hash}.meta"
 
     try:
         # 读取HTML内容
         html_content = html_file.read_text(encoding='utf-8')
 
-        # 保存到缓存
-        cache_path.write_text(html_content, encoding='utf-8')
+        # 保存到缓存（按 Config.CACHE_STORE 写入 .html 文件或压缩缓存包）
+        index = CacheIndex(Config.CACHE_DIR)
+        store = open_cache_store(cache_dir=Config.CACHE_DIR, index=index)
+        store.write(url_hash, html_content)
 
-        # 保存元数据
-        metadata = f"url={url}\ntimestamp={datetime.now().isoformat()}\nmanual=true\n"
-        meta_path.write_text(metadata, encoding='utf-8')
+        # 记录到缓存索引（状态0表示手动添加，没有验证信息，之后只会整页重新下载）
+        index.record(url, html_content, status=0)
+        index.close()
 
         print(f"✅ 已添加到缓存")
         print(f"   URL: {url}")
-        print(f"   缓存文件: {cache_path}")
+        print(f"   缓存位置: {store.locate(url_hash)}")
         print(f"   大小: {len(html_content):,} 字符")
 
         return True
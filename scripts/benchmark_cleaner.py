@@ -0,0 +1,129 @@
+"""
+HTML清洗性能基准
+在不同规模的合成法律页面上测量清洗耗时，验证空标签移除随节点数线性增长，
+并在小规模页面上与旧的反复扫描实现对比结果；
+另外测量清洗耗时随class/id黑名单长度的变化
+"""
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.scraper import HTMLCleaner
+
+
+def build_synthetic_html(articles: int, depth: int = 6) -> str:
+    """
+    生成合成法律页面
+
+    每一条法条包在多层嵌套的 div 中，并夹杂空的 span/div/p（裁判文书网页常见的排版残留），
+    其中一部分空标签只有在子标签被移除后才变空。
+
+    Args:
+        articles: 法条数量
+        depth: 每条法条的嵌套层数
+
+    Returns:
+        HTML文本
+    """
+    parts = ["<html><head><title>合成法律文本</title></head><body><div class=\"content\">"]
+    for i in range(articles):
+        if i % 50 == 0:
+            parts.append(f"<h2>第{i // 50 + 1}章 合成章节</h2>")
+        parts.append("<div>" * depth)
+        parts.append(
+            f"<p>第{i + 1}条 用人单位应当依法支付劳动者工资，"
+            f"不得克扣或者无故拖欠劳动者的工资。<span> </span></p>"
+        )
+        # 嵌套的空标签：内层移除后外层才变空
+        parts.append("<div><div><span></span><p>\n</p></div><div> </div></div>")
+        parts.append("<br/>")
+        parts.append("</div>" * depth)
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def legacy_remove_empty_tags(soup: BeautifulSoup):
+    """旧实现：反复扫描整棵树直到没有可移除的空标签（用于对比结果和耗时）"""
+    changed = True
+    while changed:
+        changed = False
+        for tag in soup.find_all():
+            if tag.name in ['br', 'hr', 'img']:
+                continue
+            if not tag.get_text(strip=True) and not tag.find_all():
+                tag.decompose()
+                changed = True
+
+
+def time_call(func, *args) -> float:
+    """执行一次并返回耗时（秒）"""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    """运行基准测试"""
+    print("🧪 HTML清洗性能基准")
+    print("=" * 80)
+
+    cleaner = HTMLCleaner()
+
+    # 1. 结果一致性（旧实现较慢，只在小规模页面上对比）
+    print("\n[步骤1] 与旧实现对比结果")
+    print("-" * 80)
+    html = build_synthetic_html(200)
+    new_soup = BeautifulSoup(html, 'lxml')
+    old_soup = BeautifulSoup(html, 'lxml')
+    new_time = time_call(cleaner._remove_empty_tags, new_soup)
+    old_time = time_call(legacy_remove_empty_tags, old_soup)
+    same = str(new_soup) == str(old_soup)
+    print(f"  {'✅' if same else '❌'} 结果{'一致' if same else '不一致'}")
+    print(f"     旧实现: {old_time * 1000:.1f} ms  新实现: {new_time * 1000:.1f} ms"
+          f"  加速: {old_time / max(new_time, 1e-9):.1f}x")
+
+    # 2. 规模扩展：每个节点的耗时应基本不变
+    print("\n[步骤2] 规模扩展")
+    print("-" * 80)
+    print(f"  {'法条数':>8} {'节点数':>10} {'HTML大小':>10} {'空标签移除':>12} {'完整清洗':>12} {'μs/节点':>10}")
+
+    for articles in [500, 1000, 2000, 4000, 8000]:
+        html = build_synthetic_html(articles)
+        soup = BeautifulSoup(html, 'lxml')
+        nodes = len(soup.find_all())
+
+        remove_time = time_call(cleaner._remove_empty_tags, soup)
+        clean_time = time_call(cleaner.clean, html)
+
+        print(f"  {articles:>8} {nodes:>10,} {len(html) / 1024:>8.0f}KB "
+              f"{remove_time * 1000:>10.1f}ms {clean_time * 1000:>10.1f}ms "
+              f"{remove_time / nodes * 1e6:>10.2f}")
+
+    # 3. 黑名单长度：所有规则合并为一个正则，一次遍历完成，耗时应基本不变
+    print("\n[步骤3] 黑名单长度")
+    print("-" * 80)
+    html = build_synthetic_html(1000)
+    print(f"  {'class/id规则数':>14} {'完整清洗':>12}")
+
+    for extra in [0, 50, 200, 800]:
+        cleaner = HTMLCleaner()
+        cleaner.unwanted_classes += [f'promo-{i}' for i in range(extra)]
+        cleaner.unwanted_ids += [f'widget-{i}' for i in range(extra)]
+        cleaner.compile_rules()
+
+        clean_time = time_call(cleaner.clean, html)
+        rules = len(cleaner.unwanted_classes) + len(cleaner.unwanted_ids)
+        print(f"  {rules:>14} {clean_time * 1000:>10.1f}ms")
+
+    print("\n" + "=" * 80)
+    print("✅ 基准测试完成")
+
+
+if __name__ == "__main__":
+    main()
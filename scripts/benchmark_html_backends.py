@@ -0,0 +1,132 @@
+"""
+HTML后端对比基准
+在缓存的页面（没有缓存时使用合成页面）上比较各HTML后端的处理耗时，
+并以 BeautifulSoup 后端为基准检查章节结构、标题和纯文本是否一致；
+另外用不同长度的整部法规测量章节解析是否随文本长度线性增长
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.config import Config
+from legal_rights.scraper import DocumentProcessor, available_html_backends
+from legal_rights.scraper.cache_store import open_cache_store
+from legal_rights.scripts.benchmark_cleaner import build_synthetic_html
+
+
+def load_corpus(limit: int) -> list[tuple[str, str]]:
+    """
+    加载测试页面
+
+    Args:
+        limit: 最多加载的页面数
+
+    Returns:
+        [(名称, HTML)]
+    """
+    store = open_cache_store()
+    keys = store.keys()[:limit]
+    if keys:
+        print(f"📂 使用缓存页面: {len(keys)} 个（{Config.CACHE_DIR}，{store.name}）")
+        return [(key, store.read(key)) for key in keys]
+
+    print("📂 没有缓存页面，使用合成页面")
+    return [(f"synthetic-{n}", build_synthetic_html(n)) for n in [50, 200, 500, 1000, 2000][:limit]]
+
+
+def build_statute_html(chars: int) -> str:
+    """
+    生成一部整篇法规（所有条文在同一章内、层层嵌套的 div 中）
+
+    Args:
+        chars: 正文的大致字符数
+
+    Returns:
+        HTML文本
+    """
+    article = "用人单位应当依法与劳动者订立书面劳动合同，并按照约定及时足额支付劳动报酬。"
+    count = max(1, chars // (len(article) + 8))
+    parts = ["<html><body><div class=\"content\"><h1>合成法规</h1><h2>第一章 总则</h2>"]
+    parts.append("<div><div>")
+    for i in range(count):
+        parts.append(f"<div><p>第{i + 1}条 {article}</p></div>")
+    parts.append("</div></div></div></body></html>")
+    return "".join(parts)
+
+
+def signature(result) -> tuple:
+    """用于比较的处理结果（纯文本、标题、章节结构）"""
+    text, content = result
+    return text, content.title, [section.model_dump() for section in content.sections]
+
+
+def main():
+    """运行对比基准"""
+    parser = argparse.ArgumentParser(description="比较HTML后端的速度和结果一致性")
+    parser.add_argument('--limit', type=int, default=200, help='最多测试的页面数')
+    parser.add_argument('--backends', type=str, default=None,
+                        help='要比较的后端（逗号分隔，默认所有已安装的后端）')
+    args = parser.parse_args()
+
+    print("🧪 HTML后端对比基准")
+    print("=" * 80)
+
+    backends = args.backends.split(",") if args.backends else available_html_backends()
+    if "bs4" not in backends:
+        backends.insert(0, "bs4")
+    print(f"后端: {', '.join(backends)}")
+
+    corpus = load_corpus(args.limit)
+    total_size = sum(len(html) for _, html in corpus)
+    print(f"页面总大小: {total_size / 1024 / 1024:.2f} MB")
+
+    # 1. 逐个后端处理全部页面
+    results = {}
+    timings = {}
+    for name in backends:
+        processor = DocumentProcessor(backend=name)
+        start = time.perf_counter()
+        results[name] = [signature(processor.process(html, url=key)) for key, html in corpus]
+        timings[name] = time.perf_counter() - start
+
+    # 2. 与 BeautifulSoup 后端比较
+    print("\n" + "-" * 80)
+    print(f"  {'后端':<12} {'耗时':>10} {'每页':>10} {'加速':>8} {'结果不一致':>10}")
+    baseline = timings["bs4"]
+    for name in backends:
+        mismatches = [
+            key for (key, _), expected, got in zip(corpus, results["bs4"], results[name])
+            if expected != got
+        ]
+        elapsed = timings[name]
+        print(f"  {name:<12} {elapsed:>9.2f}s {elapsed / len(corpus) * 1000:>8.1f}ms "
+              f"{baseline / max(elapsed, 1e-9):>7.1f}x {len(mismatches):>10}")
+        for key in mismatches[:5]:
+            print(f"     ⚠️  {key}")
+
+    # 3. 整部法规：每个文本节点只处理一次，耗时应与正文长度成正比
+    print("\n[长篇法规] 章节解析耗时")
+    print("-" * 80)
+    print(f"  {'正文字符数':>10} " + " ".join(f"{name:>12}" for name in backends))
+    processors = {name: DocumentProcessor(backend=name) for name in backends}
+    for chars in [50_000, 100_000, 200_000, 400_000]:
+        html = build_statute_html(chars)
+        row = []
+        for name in backends:
+            start = time.perf_counter()
+            _, content = processors[name].process(html, url="synthetic-statute")
+            row.append(time.perf_counter() - start)
+        length = sum(len(section.content) for section in content.sections[0].subsections)
+        print(f"  {length:>10,} " + " ".join(f"{t * 1000:>10.0f}ms" for t in row))
+
+    print("\n" + "=" * 80)
+    print("✅ 基准测试完成")
+
+
+if __name__ == "__main__":
+    main()
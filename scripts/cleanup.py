@@ -11,6 +11,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root.parent))
 
 from legal_rights.config import Config
+from legal_rights.scraper.cache_store import FileCacheStore, PackCacheStore, PACK_GLOB
 
 
 def print_header(title: str):
@@ -67,9 +68,38 @@ def show_status():
             print(f"\n{name}:")
             print(f"  状态: 目录不存在")
 
+    if Config.CACHE_DIR.exists():
+        show_cache_usage()
+
     print(f"\n总大小: {format_size(total_size)}")
 
 
+def show_cache_usage():
+    """显示网页缓存的存储方式和压缩效果"""
+    print(f"\n网页缓存（当前存储方式: {Config.CACHE_STORE}）:")
+
+    stores = [(".html 文件", FileCacheStore(Config.CACHE_DIR))]
+    if any(Config.CACHE_DIR.glob(PACK_GLOB)) or Config.CACHE_STORE == "pack":
+        stores.append(("压缩缓存包", PackCacheStore(Config.CACHE_DIR)))
+
+    for name, store in stores:
+        usage = store.usage()
+        if not usage["entries"]:
+            continue
+        ratio = usage["stored_bytes"] / usage["raw_bytes"] if usage["raw_bytes"] else 0
+        print(f"  {name}: {usage['entries']} 个网页")
+        print(f"    原始大小: {format_size(usage['raw_bytes'])}")
+        print(f"    占用空间: {format_size(usage['stored_bytes'])}（{ratio:.0%}）")
+        if usage["reclaimable_bytes"]:
+            print(f"    可回收: {format_size(usage['reclaimable_bytes'])}"
+                  f"（运行 python scripts/migrate_cache.py --compact）")
+        store.close()
+
+    html_count = len(stores[0][1].keys())
+    if html_count and Config.CACHE_STORE == "files":
+        print("  💡 迁移到压缩缓存包可减少磁盘占用: python scripts/migrate_cache.py")
+
+
 def clean_cache(confirm: bool = True):
     """清理缓存"""
     cache_dir = Config.CACHE_DIR
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+法规门户链接跟随抓取脚本
+从种子页面出发，跟随站内链接抓取法律法规网页，写入网页缓存
+"""
+import sys
+import asyncio
+from pathlib import Path
+from datetime import datetime
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.scraper import LinkCrawler, CrawlScope
+from legal_rights.config import Config
+
+
+async def crawl(args) -> bool:
+    """
+    执行抓取
+
+    Returns:
+        是否抓取到网页
+    """
+    seeds = args.seeds or Config.TARGET_URLS
+    scope = CrawlScope.for_seeds(seeds, allowed_paths=args.allow_path, max_depth=args.depth)
+    if args.allow_domain:
+        scope.allowed_domains = [d.lower().strip(".") for d in args.allow_domain]
+
+    print("🕸️  链接跟随抓取")
+    print("=" * 80)
+    print(f"种子页面: {len(seeds)} 个")
+    for seed in seeds:
+        print(f"  - {seed}")
+    print(f"允许的域名: {', '.join(scope.allowed_domains)}")
+    if scope.allowed_paths:
+        print(f"允许的路径: {', '.join(scope.allowed_paths)}")
+    print(f"最大深度: {scope.max_depth}，最多 {args.max_pages or Config.CRAWL_MAX_PAGES} 个网页")
+    print("=" * 80)
+
+    crawler = LinkCrawler(scope, max_pages=args.max_pages)
+    start_time = datetime.now()
+    urls = await crawler.crawl(seeds, use_cache=not args.refresh)
+    elapsed = (datetime.now() - start_time).total_seconds()
+
+    stats = crawler.stats
+    engine = stats.get("engine", {})
+    print("\n" + "=" * 80)
+    print("📊 抓取结果:")
+    print(f"  ✅ 成功: {stats['fetched']} 个网页")
+    print(f"  ❌ 失败: {stats['failed']} 个网页")
+    print(f"  🔗 发现链接: {stats['links']} 个（重复 {stats['duplicates']}，超出范围 {stats['out_of_scope']}）")
+    print(f"  ⏳ 未抓取: {stats['pending']} 个（达到网页数上限）" if stats['pending'] else "  ⏳ 未抓取: 0 个")
+    print(f"  ⏱️  耗时: {elapsed:.1f} 秒（请求 {engine.get('requests', 0)} 次，"
+          f"未变化 {engine.get('not_modified', 0)} 个，涉及 {engine.get('hosts', 0)} 个网站）")
+
+    print(f"\n📁 网页已保存到: {Config.CACHE_DIR}（存储方式: {Config.CACHE_STORE}）")
+    print("\n🎯 下一步: 使用已抓取的网页构建知识库")
+    print("   python -m legal_rights build-kb --skip-scrape")
+    return bool(urls)
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="从法规门户跟随链接抓取网页",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 从配置的目标URL出发，抓取两层链接
+  python scripts/crawl_laws.py
+
+  # 指定种子页面，只抓取 /npc/ 下的网页
+  python scripts/crawl_laws.py http://www.npc.gov.cn/npc/c30834/ --allow-path /npc/
+
+  # 抓取三层，最多500个网页，已缓存的网页也重新确认
+  python scripts/crawl_laws.py --depth 3 --max-pages 500 --refresh
+        """
+    )
+    parser.add_argument('seeds', nargs='*',
+                        help='种子URL（默认使用 Config.TARGET_URLS）')
+    parser.add_argument('--depth', type=int, default=Config.CRAWL_MAX_DEPTH or 2,
+                        help='最多跟随的链接层数（默认读取 CRAWL_MAX_DEPTH，未设置时为2）')
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help=f'最多抓取的网页数（默认 {Config.CRAWL_MAX_PAGES}）')
+    parser.add_argument('--allow-domain', action='append', default=[],
+                        help='允许的域名，包括子域名（可重复，默认为种子页面的域名）')
+    parser.add_argument('--allow-path', action='append', default=[],
+                        help='允许的路径前缀（可重复，默认不限制）')
+    parser.add_argument('--refresh', action='store_true',
+                        help='已缓存的网页也发送条件请求，确认是否有更新')
+    args = parser.parse_args()
+
+    if not asyncio.run(crawl(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n👋 已取消")
+        sys.exit(130)
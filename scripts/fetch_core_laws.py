@@ -13,6 +13,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root.parent))
 
 from legal_rights.scraper import WebScraper
+from legal_rights.scraper.cache_store import open_cache_store
 from legal_rights.config import Config
 
 
@@ -85,13 +86,19 @@ def print_law_info(name: str, info: dict):
     print(f"   URL: {info['url']}")
 
 
-async def fetch_laws(priority_filter: int = None, dry_run: bool = False, auto_confirm: bool = False):
+async def fetch_laws(
+    priority_filter: int = None,
+    dry_run: bool = False,
+    auto_confirm: bool = False,
+    regional: bool = False
+):
     """
     获取法律法规
 
     Args:
         priority_filter: 优先级过滤（1=高优先级, 2=中优先级, 3=低优先级）
         dry_run: 仅显示信息，不实际下载
+        regional: 同时抓取配置中的地方政策页面（Config.TARGET_URLS）
     """
     print_header("🏛️  核心法律法规自动获取工具")
 
@@ -115,6 +122,12 @@ async def fetch_laws(priority_filter: int = None, dry_run: bool = False, auto_co
     for name, info in filtered_laws.items():
         print_law_info(name, info)
 
+    regional_urls = Config.TARGET_URLS if regional else []
+    if regional_urls:
+        print(f"\n🗺️  地方政策页面: {len(regional_urls)} 个")
+        for url in regional_urls:
+            print(f"   {url}")
+
     if dry_run:
         print("\n💡 这是预览模式，未实际下载")
         print("   运行 python scripts/fetch_core_laws.py --download 开始下载")
@@ -122,7 +135,7 @@ async def fetch_laws(priority_filter: int = None, dry_run: bool = False, auto_co
 
     # 确认
     print("\n" + "=" * 80)
-    print(f"⚠️  即将下载 {len(filtered_laws)} 个法规文件")
+    print(f"⚠️  即将下载 {len(filtered_laws) + len(regional_urls)} 个网页")
     print("=" * 80)
 
     if not auto_confirm:
@@ -145,10 +158,12 @@ async def fetch_laws(priority_filter: int = None, dry_run: bool = False, auto_co
     print("=" * 80)
 
     scraper = WebScraper()
-    urls = [info['url'] for info in filtered_laws.values()]
+    urls = [info['url'] for info in filtered_laws.values()] + list(regional_urls)
 
-    # 批量下载
+    # 批量下载（所有网页共用一个抓取引擎，不同网站的请求并发进行）
+    started = datetime.now()
     results = await scraper.fetch_all(urls, use_cache=False)
+    elapsed = (datetime.now() - started).total_seconds()
 
     # 统计结果
     success_count = sum(1 for html in results.values() if html)
@@ -160,6 +175,11 @@ async def fetch_laws(priority_filter: int = None, dry_run: bool = False, auto_co
     print(f"\n✅ 成功: {success_count} 个")
     print(f"❌ 失败: {fail_count} 个")
 
+    stats = scraper.last_stats
+    print(f"⏱️  耗时: {elapsed:.1f}s（请求 {stats.get('requests', 0)} 次，"
+          f"重试 {stats.get('retries', 0)} 次，未变化 {stats.get('not_modified', 0)} 个，"
+          f"涉及 {stats.get('hosts', 0)} 个网站）")
+
     if fail_count > 0:
         print(f"\n⚠️  部分文件下载失败，可能原因:")
         print(f"   1. 网络连接问题")
@@ -210,13 +230,15 @@ def check_current_status():
     """检查当前知识库状态"""
     print_header("📊 当前知识库状态")
 
-    # 检查缓存文件
-    cache_files = list(Config.CACHE_DIR.glob("*.html"))
-    print(f"\n📁 缓存文件数: {len(cache_files)}")
+    # 检查缓存网页
+    store = open_cache_store()
+    cache_files = store.keys()
+    print(f"\n📁 缓存网页数: {len(cache_files)}（存储方式: {store.name}）")
 
     if cache_files:
-        print(f"   最新文件: {cache_files[-1].name}")
-        print(f"   最后更新: {datetime.fromtimestamp(cache_files[-1].stat().st_mtime)}")
+        usage = store.usage()
+        print(f"   原始大小: {usage['raw_bytes'] / 1024 / 1024:.2f} MB")
+        print(f"   占用空间: {usage['stored_bytes'] / 1024 / 1024:.2f} MB")
 
     # 检查知识库文件
     knowledge_files = list(Config.KNOWLEDGE_DIR.glob("*.md"))
@@ -265,6 +287,9 @@ def main():
   # 下载所有法规
   python scripts/fetch_core_laws.py --download --all
 
+  # 下载所有法规，同时抓取地方政策页面
+  python scripts/fetch_core_laws.py --download --all --regional
+
   # 检查当前状态
   python scripts/fetch_core_laws.py --status
 
@@ -281,6 +306,8 @@ def main():
                       help='按优先级过滤 (1=高, 2=中, 3=低)')
     parser.add_argument('--all', action='store_true',
                       help='下载所有法规（忽略优先级）')
+    parser.add_argument('--regional', action='store_true',
+                      help='同时抓取地方政策页面（Config.TARGET_URLS）')
     parser.add_argument('--status', action='store_true',
                       help='检查当前知识库状态')
     parser.add_argument('--manual', action='store_true',
@@ -301,10 +328,11 @@ def main():
         show_manual_download_guide()
     elif args.list:
         priority = None if args.all else (args.priority or 1)
-        asyncio.run(fetch_laws(priority_filter=priority, dry_run=True))
+        asyncio.run(fetch_laws(priority_filter=priority, dry_run=True, regional=args.regional))
     elif args.download:
         priority = None if args.all else (args.priority or 1)
-        asyncio.run(fetch_laws(priority_filter=priority, dry_run=False, auto_confirm=args.yes))
+        asyncio.run(fetch_laws(priority_filter=priority, dry_run=False,
+                               auto_confirm=args.yes, regional=args.regional))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+网页缓存迁移脚本
+把缓存目录中的 .html 文件迁移到压缩缓存包（或反向迁移），并整理缓存包中的可回收空间
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.config import Config
+from legal_rights.scraper.cache_index import CacheIndex
+from legal_rights.scraper.cache_store import FileCacheStore, PackCacheStore
+
+# 每批写入的网页数（同一批在一个事务中更新索引）
+BATCH_SIZE = 50
+
+
+def format_size(size: float) -> str:
+    """格式化大小"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.2f} {unit}"
+        size /= 1024
+    return f"{size:.2f} TB"
+
+
+def print_usage(title: str, usage: dict):
+    """打印空间占用"""
+    print(f"  {title}: {usage['entries']} 个网页，原始 {format_size(usage['raw_bytes'])}，"
+          f"占用 {format_size(usage['stored_bytes'])}")
+
+
+def migrate_to_pack(files: FileCacheStore, pack: PackCacheStore, keep: bool) -> int:
+    """
+    把 .html 文件迁移到压缩缓存包（写入后读回校验，一致才删除原文件）
+
+    Returns:
+        迁移的网页数
+    """
+    keys = files.keys()
+    migrated = 0
+    for start in range(0, len(keys), BATCH_SIZE):
+        batch = [(key, files.read(key)) for key in keys[start:start + BATCH_SIZE]]
+        pack.write_many(batch)
+
+        for key, html in batch:
+            if pack.read(key) != html:
+                print(f"  ❌ 校验失败，保留原文件: {key}")
+                continue
+            if not keep:
+                files.delete(key)
+            migrated += 1
+        print(f"  📦 {min(start + BATCH_SIZE, len(keys))}/{len(keys)}")
+    return migrated
+
+
+def migrate_to_files(pack: PackCacheStore, files: FileCacheStore, keep: bool) -> int:
+    """
+    把压缩缓存包中的网页导出为 .html 文件
+
+    Returns:
+        迁移的网页数
+    """
+    keys = pack.keys()
+    for key in keys:
+        files.write(key, pack.read(key))
+        if not keep:
+            pack.index.remove_pack_entry(key)
+
+    if not keep:
+        for path in pack.pack_files():
+            path.unlink()
+    return len(keys)
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="迁移网页缓存的存储方式",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 把 .html 文件迁移到压缩缓存包（迁移后在 .env 中设置 CACHE_STORE=pack）
+  python scripts/migrate_cache.py
+
+  # 使用 gzip 压缩，并保留原 .html 文件
+  python scripts/migrate_cache.py --compression gzip --keep
+
+  # 整理缓存包（去掉被覆盖的旧记录）
+  python scripts/migrate_cache.py --compact
+
+  # 导出回 .html 文件
+  python scripts/migrate_cache.py --to files
+        """
+    )
+    parser.add_argument('--to', choices=['pack', 'files'], default='pack',
+                        help='迁移到的存储方式（默认 pack）')
+    parser.add_argument('--compression', choices=['zstd', 'gzip'], default=None,
+                        help='压缩格式（默认读取 CACHE_COMPRESSION）')
+    parser.add_argument('--keep', action='store_true', help='保留迁移前的数据')
+    parser.add_argument('--compact', action='store_true', help='只整理缓存包，不迁移')
+    args = parser.parse_args()
+
+    print("🗜️  网页缓存迁移")
+    print("=" * 80)
+    print(f"缓存目录: {Config.CACHE_DIR}")
+
+    index = CacheIndex(Config.CACHE_DIR)
+    files = FileCacheStore(Config.CACHE_DIR)
+    pack = PackCacheStore(Config.CACHE_DIR, index=index, compression=args.compression)
+
+    print("\n迁移前:")
+    print_usage(".html 文件", files.usage())
+    print_usage("压缩缓存包", pack.usage())
+
+    if args.compact:
+        reclaimed = pack.compact()
+        print(f"\n✅ 整理完成，回收 {format_size(reclaimed)}")
+    elif args.to == 'pack':
+        print(f"\n📦 迁移到压缩缓存包（{pack.compression}）...")
+        count = migrate_to_pack(files, pack, args.keep)
+        if pack.usage()["reclaimable_bytes"]:
+            pack.compact()
+        print(f"\n✅ 已迁移 {count} 个网页")
+    else:
+        print("\n📄 导出为 .html 文件...")
+        count = migrate_to_files(pack, files, args.keep)
+        print(f"\n✅ 已导出 {count} 个网页")
+
+    print("\n迁移后:")
+    print_usage(".html 文件", files.usage())
+    print_usage("压缩缓存包", pack.usage())
+
+    if not args.compact and Config.CACHE_STORE != args.to:
+        print(f"\n💡 请在 .env 中设置 CACHE_STORE={args.to}")
+    index.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n👋 已取消")
+        sys.exit(130)
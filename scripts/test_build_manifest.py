@@ -0,0 +1,134 @@
+"""
+测试构建清单（增量构建的变化判断）
+检查新来源、未变化、只是缓存版本变化（重写相同内容、迁移到压缩缓存包、整理缓存包）、
+内容变化、构建设置变化、未完成的来源，以及保存/加载和删除来源（使用临时目录，不计算Embedding）
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.knowledge.build_pipeline import BuildManifest
+from legal_rights.scraper.cache_store import FileCacheStore, PackCacheStore
+
+
+SETTINGS = {"cleaner": 1, "parser": 1, "chunk_size": 500, "chunk_overlap": 50,
+            "embedding": "StubEmbedding:test", "dimension": 8}
+PAGE = "<html><body><h1>劳动合同法</h1><p>第四十七条 经济补偿按劳动者在本单位工作的年限……</p></body></html>"
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def test_file_store(tmp_dir: Path) -> bool:
+    print("\n[1] .html 文件缓存")
+    print("-" * 80)
+    store = FileCacheStore(tmp_dir / "files")
+    store.write("law", PAGE)
+    manifest = BuildManifest(tmp_dir / "manifest.json")
+
+    results = [check("新来源需要处理", not manifest.is_current("law", store, SETTINGS))]
+    manifest.record("law", store, "http://example.com/law", SETTINGS, ["law-0", "law-1"], complete=True)
+    results.append(check("记录后判定为未变化", manifest.is_current("law", store, SETTINGS)))
+
+    manifest.save()
+    reloaded = BuildManifest(tmp_dir / "manifest.json")
+    results.append(check("保存后重新加载仍为未变化", reloaded.exists()
+                         and reloaded.is_current("law", store, SETTINGS)))
+
+    # 内容不变、文件被重写：版本变化，按内容哈希判定并更新记录
+    store.write("law", PAGE)
+    stat = store.path("law").stat()
+    os.utime(store.path("law"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+    results.append(check("重写相同内容判定为未变化", reloaded.is_current("law", store, SETTINGS)))
+    results.append(check("同时更新记录的缓存版本",
+                         reloaded.sources["law"]["mtime_ns"] == store.signature("law")[1]))
+
+    changed = dict(SETTINGS, chunk_size=800)
+    results.append(check("构建设置变化需要重新处理", not reloaded.is_current("law", store, changed)))
+
+    store.write("law", PAGE.replace("四十七", "四十八"))
+    results.append(check("内容变化需要重新处理", not reloaded.is_current("law", store, SETTINGS)))
+
+    reloaded.record("law", store, "http://example.com/law", SETTINGS, ["law-0"], complete=False)
+    results.append(check("未完成的来源下次重新处理", not reloaded.is_current("law", store, SETTINGS)
+                         and reloaded.sources["law"]["hash"] == ""))
+    return all(results)
+
+
+def test_pack_store(tmp_dir: Path) -> bool:
+    print("\n[2] 迁移到压缩缓存包、整理缓存包")
+    print("-" * 80)
+    files = FileCacheStore(tmp_dir / "migrate")
+    files.write("law", PAGE)
+    files.write("other", PAGE + "<p>其他</p>")
+    manifest = BuildManifest(tmp_dir / "pack-manifest.json")
+    for key in ("law", "other"):
+        manifest.record(key, files, f"http://example.com/{key}", SETTINGS, [f"{key}-0"], complete=True)
+
+    pack = PackCacheStore(tmp_dir / "migrate", compression="gzip")
+    pack.write_many([("law", PAGE), ("other", PAGE + "<p>其他</p>")])
+    results = [check("迁移到压缩缓存包后判定为未变化", manifest.is_current("law", pack, SETTINGS))]
+
+    pack.write("other", PAGE + "<p>修改</p>")
+    results.append(check("包中重新写入不同内容需要重新处理", not manifest.is_current("other", pack, SETTINGS)))
+
+    pack.compact()
+    results.append(check("整理缓存包（偏移量变化）后判定为未变化", manifest.is_current("law", pack, SETTINGS)))
+    pack.close()
+    return all(results)
+
+
+def test_removed_sources(tmp_dir: Path) -> bool:
+    print("\n[3] 删除来源")
+    print("-" * 80)
+    store = FileCacheStore(tmp_dir / "removed")
+    manifest = BuildManifest(tmp_dir / "removed-manifest.json")
+    for key in ("a", "b", "c"):
+        store.write(key, f"{PAGE}<p>{key}</p>")
+        manifest.record(key, store, f"http://example.com/{key}", SETTINGS, [f"{key}-0", f"{key}-1"], complete=True)
+
+    # 与流水线相同：本次构建没有出现的来源视为已删除
+    seen = {"a", "c"}
+    deleted = [key for key in manifest.sources if key not in seen]
+    stale_ids = [chunk_id for key in deleted for chunk_id in manifest.remove(key)]
+    return all([
+        check("找出本次没有出现的来源", deleted == ["b"], str(deleted)),
+        check("返回其文档块ID", stale_ids == ["b-0", "b-1"], str(stale_ids)),
+        check("其余来源保留", sorted(manifest.sources) == ["a", "c"]),
+        check("删除不存在的来源返回空列表", manifest.remove("missing") == []),
+    ])
+
+
+def main():
+    """主函数"""
+    print("🧪 测试构建清单（临时目录）")
+    print("=" * 80)
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="manifest-test-"))
+    try:
+        results = [
+            test_file_store(tmp_dir),
+            test_pack_store(tmp_dir),
+            test_removed_sources(tmp_dir),
+        ]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+测试压缩缓存包
+检查写入/读取、覆盖后整理回收空间、关闭后重新打开、整理切换前中断时旧数据仍可读、
+整理后相同大小的重写仍会改变版本信息、旧版索引迁移，以及包文件丢失时的行为（使用临时目录）
+"""
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.scraper.cache_index import CacheIndex, INDEX_FILENAME, PACK_FILENAME
+from legal_rights.scraper.cache_store import PackCacheStore
+
+
+PAGE = "<html><body><h1>劳动合同法</h1><p>第四十七条 经济补偿按劳动者在本单位工作的年限……</p></body></html>"
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def page(n: int) -> str:
+    return PAGE.replace("四十七", f"第{n:03d}")
+
+
+def test_write_read(tmp_dir: Path) -> bool:
+    print("\n[1] 写入、读取和重新打开")
+    print("-" * 80)
+    store = PackCacheStore(tmp_dir / "basic", compression="gzip")
+    store.write_many([(f"k{n}", page(n)) for n in range(5)])
+    store.write("k2", page(200))
+
+    results = [
+        check("读取写入的内容", store.read("k0") == page(0) and store.read("k4") == page(4)),
+        check("重新写入后读取新内容", store.read("k2") == page(200)),
+        check("不存在的键返回None", store.read("missing") is None and not store.exists("missing")),
+        check("列出所有键", store.keys() == [f"k{n}" for n in range(5)], str(store.keys())),
+    ]
+    usage = store.usage()
+    results.append(check("被覆盖的旧记录计为可回收空间", usage["entries"] == 5 and usage["reclaimable_bytes"] > 0,
+                         str(usage)))
+    store.close()
+
+    reopened = PackCacheStore(tmp_dir / "basic", compression="gzip")
+    results.append(check("关闭后重新打开仍可读取", reopened.read("k2") == page(200)
+                         and reopened.keys() == [f"k{n}" for n in range(5)]))
+    reopened.close()
+    return all(results)
+
+
+def test_compact(tmp_dir: Path) -> bool:
+    print("\n[2] 整理缓存包")
+    print("-" * 80)
+    store = PackCacheStore(tmp_dir / "compact", compression="gzip")
+    store.write_many([(f"k{n}", page(n)) for n in range(5)])
+    store.write("k1", page(100))
+
+    reclaimed = store.compact()
+    files = [path.name for path in store.pack_files()]
+    results = [
+        check("回收被覆盖的空间", reclaimed > 0 and store.usage()["reclaimable_bytes"] == 0, f"{reclaimed} 字节"),
+        check("切换到新一代包文件并删除旧文件", files == ["pages.1.pack"], str(files)),
+        check("整理后内容不变", all(store.read(f"k{n}") == page(100 if n == 1 else n) for n in range(5))),
+        check("整理后新记录追加到新文件", store.path.name == "pages.1.pack"),
+    ]
+
+    store.close()
+
+    reopened = PackCacheStore(tmp_dir / "compact", compression="gzip")
+    results.append(check("重新打开后继续写入整理后的文件", reopened.path.name == "pages.1.pack"
+                         and reopened.read("k1") == page(100)))
+    reopened.close()
+
+    # 记录被删除后整理，新文件为空：重新缓存同样大小的新内容时偏移量与旧文件中的记录相同
+    collide = PackCacheStore(tmp_dir / "collide", compression="gzip")
+    collide.write("k0", page(0))
+    before = collide.signature("k0")
+    collide.index.remove_pack_entry("k0")
+    collide.compact()
+    collide.write("k0", page(999))
+    after = collide.signature("k0")
+    results.append(check("整理后相同大小、相同偏移量的重写仍改变版本信息",
+                         after[0] == before[0] and after != before, f"{before} → {after}"))
+    collide.close()
+    return all(results)
+
+
+def test_interrupted_compact(tmp_dir: Path) -> bool:
+    print("\n[3] 整理切换前中断")
+    print("-" * 80)
+    store = PackCacheStore(tmp_dir / "interrupted", compression="gzip")
+    store.write_many([(f"k{n}", page(n)) for n in range(3)])
+    store.write("k0", page(100))
+
+    swap = store.index.swap_pack_file
+
+    def crash(moved, file, lost=None):
+        raise KeyboardInterrupt
+
+    store.index.swap_pack_file = crash
+    try:
+        store.compact()
+    except KeyboardInterrupt:
+        pass
+    store.index.swap_pack_file = swap
+
+    files = [path.name for path in store.pack_files()]
+    results = [
+        check("旧文件和索引未改动", store.path.name == PACK_FILENAME
+              and all(store.read(f"k{n}") == page(100 if n == 0 else n) for n in range(3))),
+        check("只留下未被引用的新文件", files == ["pages.1.pack", PACK_FILENAME], str(files)),
+    ]
+
+    store.compact()
+    files = [path.name for path in store.pack_files()]
+    results.append(check("下次整理时删除未被引用的文件", files == ["pages.2.pack"], str(files)))
+    results.append(check("整理后内容不变", store.read("k0") == page(100)))
+    store.close()
+    return all(results)
+
+
+def test_missing_pack_file(tmp_dir: Path) -> bool:
+    print("\n[4] 包文件丢失")
+    print("-" * 80)
+    store = PackCacheStore(tmp_dir / "missing", compression="gzip")
+    store.write_many([("a", page(1)), ("b", page(2))])
+    store.path.unlink()
+
+    try:
+        store.read("a")
+        results = [check("读取时报错", False)]
+    except FileNotFoundError:
+        results = [check("读取时报错", True)]
+    results += [
+        check("没有包文件时整理不做任何事", store.compact() == 0),
+        check("可回收空间不为负数", store.usage()["reclaimable_bytes"] == 0, str(store.usage())),
+    ]
+
+    # 重新写入时包文件重新创建，b 的偏移量超出新文件末尾
+    store.write("a", page(10))
+    results.append(check("重新写入后可读取", store.read("a") == page(10)))
+    store.compact()
+    results += [
+        check("整理时删除无法读取的记录", store.keys() == ["a"] and store.read("b") is None, str(store.keys())),
+        check("其余记录整理后可读取", store.read("a") == page(10)
+              and [path.name for path in store.pack_files()] == ["pages.1.pack"]),
+    ]
+    store.close()
+    return all(results)
+
+
+def test_legacy_index(tmp_dir: Path) -> bool:
+    print("\n[5] 旧版索引迁移")
+    print("-" * 80)
+    cache_dir = tmp_dir / "legacy"
+    store = PackCacheStore(cache_dir, compression="gzip")
+    store.write_many([("a", page(1)), ("b", page(2))])
+    store.close()
+
+    # 还原为没有 file 列的旧版索引
+    db = sqlite3.connect(str(cache_dir / INDEX_FILENAME))
+    with db:
+        db.execute("ALTER TABLE pack DROP COLUMN file")
+        db.execute("DELETE FROM pack_state")
+    db.close()
+
+    index = CacheIndex(cache_dir)
+    reopened = PackCacheStore(cache_dir, index=index, compression="gzip")
+    results = [
+        check("旧版记录视为在 pages.pack 中", reopened.read("a") == page(1) and reopened.read("b") == page(2)),
+    ]
+    reopened.write("a", page(10))
+    reopened.compact()
+    results.append(check("迁移后可以整理", reopened.read("a") == page(10)
+                         and [path.name for path in reopened.pack_files()] == ["pages.1.pack"]))
+    reopened.close()
+    index.close()
+    return all(results)
+
+
+def main():
+    """主函数"""
+    print("🧪 测试压缩缓存包（临时目录）")
+    print("=" * 80)
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="pack-test-"))
+    try:
+        results = [
+            test_write_read(tmp_dir),
+            test_compact(tmp_dir),
+            test_interrupted_compact(tmp_dir),
+            test_missing_pack_file(tmp_dir),
+            test_legacy_index(tmp_dir),
+        ]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+测试经济补偿金计算器
+检查第四十七条补偿月数（满一年、六个月以上、不满六个月）、3倍社平工资封顶和12年上限、
+N / N+1 / 2N / 无 各情形金额、离职情形识别、有争议的情形不直接计算，
+以及未配置社平工资时不直接回答（纯本地计算，不调用LLM）
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.config import Config
+from legal_rights.agent.compensation_calculator import CompensationCalculator
+from legal_rights.agent.conversation_manager import ConversationManager
+from legal_rights.agent.legal_agent import LegalAgent
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def test_compensation_months() -> bool:
+    print("\n[1] 第四十七条补偿月数")
+    print("-" * 80)
+    cases = [
+        (0, 0.0),
+        (0.3, 0.5),  # 不满六个月，计半个月
+        (0.5, 1.0),  # 六个月以上不满一年，按一年
+        (3, 3.0),
+        (3.4, 3.5),
+        (3.5, 4.0),
+        (3.9, 4.0),
+        (20, 20.0),
+    ]
+    return all(
+        check(f"{years} 年 → N = {expected}", CompensationCalculator.compensation_months(years) == expected,
+              str(CompensationCalculator.compensation_months(years)))
+        for years, expected in cases
+    )
+
+
+def test_schemes() -> bool:
+    print("\n[2] N / N+1 / 2N / 无（不封顶）")
+    print("-" * 80)
+    calculator = CompensationCalculator()
+    calculator.average_monthly_wage = None
+
+    n = calculator.calculate(3, 8000, CompensationCalculator.SCHEME_N)
+    n_plus_1 = calculator.calculate(3.4, 8000, CompensationCalculator.SCHEME_N_PLUS_1)
+    two_n = calculator.calculate(3, 8000, CompensationCalculator.SCHEME_2N)
+    none = calculator.calculate(3, 8000, CompensationCalculator.SCHEME_NONE)
+
+    results = [
+        check("N = 3 × 8000", n.amount == 24000 and not n.capped, str(n.amount)),
+        check("N+1 = 3.5 × 8000 + 8000", n_plus_1.amount == 36000, str(n_plus_1.amount)),
+        check("2N = 2 × 3 × 8000（第八十七条）", two_n.amount == 48000
+              and any("第八十七条" in basis for basis in two_n.legal_basis), str(two_n.amount)),
+        check("严重违纪或主动辞职无补偿", none.amount == 0 and "第三十九条" in none.legal_basis[0]),
+        check("同时给出各情形金额", n.alternatives == {"N": 24000, "N+1": 32000, "2N": 48000},
+              str(n.alternatives)),
+    ]
+    try:
+        calculator.calculate(-1, 8000)
+        results.append(check("负数年限报错", False))
+    except ValueError:
+        results.append(check("负数年限报错", True))
+    return all(results)
+
+
+def test_cap() -> bool:
+    print("\n[3] 3倍社平工资封顶和12年上限")
+    print("-" * 80)
+    calculator = CompensationCalculator(average_monthly_wage=10000)
+
+    capped = calculator.calculate(15, 50000, CompensationCalculator.SCHEME_N)
+    capped_2n = calculator.calculate(15, 50000, CompensationCalculator.SCHEME_2N)
+    capped_n_plus_1 = calculator.calculate(15, 50000, CompensationCalculator.SCHEME_N_PLUS_1)
+    below = calculator.calculate(15, 30000, CompensationCalculator.SCHEME_N)
+
+    return all([
+        check("高于3倍时基数封顶为3倍社平工资", capped.capped and capped.wage_base == 30000, str(capped.wage_base)),
+        check("封顶时年限最多12年", capped.compensation_months == 12 and capped.amount == 360000,
+              str(capped.amount)),
+        check("2N 按封顶后的 N 加倍", capped_2n.amount == 720000, str(capped_2n.amount)),
+        check("代通知金按实际月工资，不封顶", capped_n_plus_1.amount == 410000, str(capped_n_plus_1.amount)),
+        check("等于3倍时不封顶、不限年限", not below.capped and below.amount == 450000, str(below.amount)),
+    ])
+
+
+def test_situation() -> bool:
+    print("\n[4] 离职情形识别")
+    print("-" * 80)
+    calculator = CompensationCalculator(average_monthly_wage=10000)
+    cases = [
+        ("公司违法辞退我", CompensationCalculator.SCHEME_2N),
+        ("公司没有提前通知就解除了合同", CompensationCalculator.SCHEME_N_PLUS_1),
+        ("和公司协商解除", CompensationCalculator.SCHEME_N),
+        ("我因个人原因辞职", CompensationCalculator.SCHEME_NONE),
+        ("能拿多少钱", None),
+    ]
+    results = [check(f"{text!r} → {expected}", calculator.detect_scheme(text) == expected,
+                     str(calculator.detect_scheme(text))) for text, expected in cases]
+
+    unknown = calculator.from_situation({"work_years": 2, "monthly_salary": 6000}, "能拿多少钱")
+    no_notice = calculator.from_situation({"work_years": 2, "monthly_salary": 6000, "notice_period": 0})
+    results += [
+        check("未说明情形时不确定标准，按 N 计算", unknown.scheme == "" and unknown.amount == 12000),
+        check("对话中提到未提前通知按 N+1", no_notice.scheme == "N+1" and no_notice.amount == 18000),
+        check("缺少月工资时不计算", calculator.from_situation({"work_years": 2}) is None),
+    ]
+    return all(results)
+
+
+def test_disputed() -> bool:
+    print("\n[5] 用人单位过错与有争议的情形")
+    print("-" * 80)
+    calculator = CompensationCalculator(average_monthly_wage=10000)
+    results = [
+        check("'被迫辞职' 按 N", calculator.detect_scheme("公司拖欠工资，我被迫辞职") == "N"),
+        check("'违法辞退' 优先于 '严重违反'", calculator.detect_scheme("公司以严重违反制度为由违法辞退我") == "2N"),
+    ]
+
+    disputed = [
+        "公司严重违反规定不交社保，我被迫辞职，工作3年月薪8000",
+        "公司说我严重违反规章制度把我开除了，我不服，工作3年月薪8000",
+        "公司认为我严重违纪，工作5年月薪1万，能拿多少",
+    ]
+    for question in disputed:
+        situation = ConversationManager().extract_user_situation(question)
+        result = calculator.from_situation(situation, question)
+        results.append(check(f"{question!r} 不直接计算", result is None and calculator.is_disputed(question),
+                             f"离职情形: {situation['termination_reason']}"))
+
+    # 争议记录在对话中，后续追问不再按"无补偿"计算
+    manager = ConversationManager()
+    manager.context.facts.update(manager.extractor.extract(disputed[1], turn=1))
+    follow_up = "那我能拿多少钱"
+    results.append(check("追问时仍视为有争议",
+                         calculator.from_situation(manager.extract_user_situation(follow_up), follow_up) is None))
+
+    undisputed = "我因个人原因辞职，工作3年月薪8000，有补偿吗"
+    result = calculator.from_situation(ConversationManager().extract_user_situation(undisputed), undisputed)
+    results.append(check("没有争议的主动辞职仍按无补偿", result is not None and result.scheme == "无"))
+    return all(results)
+
+
+def test_direct_answer_requires_wage() -> bool:
+    print("\n[6] 未配置社平工资时不直接回答")
+    print("-" * 80)
+    original = Config.CALCULATOR_MODE
+    Config.CALCULATOR_MODE = "direct"
+    try:
+        unconfigured = SimpleNamespace(calculator=CompensationCalculator())
+        configured = SimpleNamespace(calculator=CompensationCalculator(average_monthly_wage=10000))
+        result = unconfigured.calculator.calculate(10, 50000, CompensationCalculator.SCHEME_2N)
+        return all([
+            check("未配置时交给LLM解释", not LegalAgent._answers_directly(unconfigured)),
+            check("已配置时直接回答", LegalAgent._answers_directly(configured)),
+            check("计算步骤说明未检查封顶", not result.capped and any("未检查3倍封顶" in step for step in result.steps),
+                  f"{result.amount:.0f} 元"),
+        ])
+    finally:
+        Config.CALCULATOR_MODE = original
+
+
+def main():
+    """主函数"""
+    print("🧪 测试经济补偿金计算器")
+    print("=" * 80)
+
+    # 不受本地配置的社平工资影响
+    Config.LOCAL_AVERAGE_MONTHLY_WAGE = None
+
+    results = [
+        test_compensation_months(),
+        test_schemes(),
+        test_cap(),
+        test_situation(),
+        test_disputed(),
+        test_direct_answer_requires_wage(),
+    ]
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+测试链接跟随抓取
+在本地启动一个模拟法规门户的HTTP服务，检查URL规范化、布隆过滤器、
+深度/域名/路径限制、去重、优先级、并发抓取、写入缓存，以及条件请求返回304但缓存不可读时
+重新抓取（不访问外网）
+"""
+import asyncio
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.config import Config
+from legal_rights.scraper import WebScraper, LinkCrawler, CrawlScope
+from legal_rights.scraper.cache_index import cache_key
+from legal_rights.scraper.crawl_frontier import normalize_url, BloomFilter
+
+
+LAW_COUNT = 5
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    """模拟法规门户：首页 → 法规列表/新闻 → 法规全文 → 更深的附件页"""
+
+    requests = []  # (路径, 开始时间, 结束时间)
+    validators = []  # 每个请求的 If-None-Match
+    delay = 0.05
+    port = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        started = time.monotonic()
+        time.sleep(self.delay)
+        body = self.page(self.path)
+        PortalHandler.requests.append((self.path, started, time.monotonic()))
+        PortalHandler.validators.append(self.headers.get("If-None-Match"))
+
+        if self.path == "/etag.html":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @classmethod
+    def page(cls, path: str):
+        def html(title, links):
+            anchors = "".join(f'<a href="{href}">{text}</a>' for href, text in links)
+            return f"<html><head><title>{title}</title></head><body><h1>{title}</h1>{anchors}</body></html>"
+
+        if path == "/":
+            return html("首页", [
+                ("/news/1.html", "新闻一"),
+                ("/news/2.html", "新闻二"),
+                ("/laws/list.html", "法律法规"),
+                ("/laws/list.html#top", "法律法规（重复）"),
+                (f"http://localhost:{cls.port}/other.html", "其他网站"),
+                ("/files/a.pdf", "附件"),
+                ("mailto:admin@example.com", "邮箱"),
+                ("javascript:void(0)", "脚本"),
+            ])
+        if path == "/laws/list.html":
+            links = [(f"/laws/{i}.html", f"劳动合同法 第{i}部分") for i in range(1, LAW_COUNT + 1)]
+            links.append(("../laws/./1.html?utm_source=list", "重复链接"))
+            return html("法规列表", links)
+        if path.startswith("/laws/") and path[6:-5].isdigit():
+            i = path[6:-5]
+            return html(f"劳动合同法 第{i}部分", [(f"deep/{i}.html", "更深一层")])
+        if path in ("/news/1.html", "/news/2.html"):
+            return html("新闻", [("/", "首页")])
+        if path.startswith("/laws/deep/"):
+            return html("深层页面", [])
+        if path == "/etag.html":
+            return html("带ETag的法规页面", [])
+        return None
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def test_normalize() -> bool:
+    print("\n[1] URL规范化")
+    print("-" * 80)
+    cases = [
+        (("../b/./c.html?utm_source=x&a=1#top", "HTTP://WWW.Gov.CN:80/x/y.html"), "http://www.gov.cn/b/c.html?a=1"),
+        (("HTTPS://a.com:443",), "https://a.com/"),
+        (("http://a.com:8080/a/../b/",), "http://a.com:8080/b/"),
+        (("mailto:x@y.com",), None),
+        (("javascript:void(0)",), None),
+    ]
+    results = [check(f"{args[0]!r}", normalize_url(*args) == expected, str(normalize_url(*args)))
+               for args, expected in cases]
+    results.append(check("配置中的目标URL保持不变",
+                         all(normalize_url(url) == url for url in Config.TARGET_URLS)))
+    return all(results)
+
+
+def test_bloom_filter() -> bool:
+    print("\n[2] 布隆过滤器")
+    print("-" * 80)
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    added = sum(bloom.add(f"https://example.com/{i}") for i in range(10_000))
+    false_positives = sum(f"https://example.org/{i}" in bloom for i in range(50_000))
+    rate = false_positives / 50_000
+    return all([
+        check("加入的元素都能查到", all(f"https://example.com/{i}" in bloom for i in range(10_000))),
+        check("新元素几乎都判定为新", added >= 9_950, f"{added}/10000"),
+        check("误判率接近设定值", rate < 0.02, f"{rate:.2%}（设定 1%，占用 {len(bloom._bits) // 1024} KB）"),
+    ])
+
+
+async def test_crawl(base: str) -> bool:
+    print("\n[3] 链接跟随抓取（深度2，仅本站）")
+    print("-" * 80)
+    PortalHandler.requests.clear()
+    crawler = LinkCrawler(CrawlScope.for_seeds([base], max_depth=2), WebScraper(), max_pages=50)
+    urls = await crawler.crawl([base], use_cache=True)
+    paths = sorted(normalize_url(url)[len(base) - 1:] for url in urls)
+    requested = [path for path, _, _ in PortalHandler.requests]
+
+    expected = sorted(["/", "/news/1.html", "/news/2.html", "/laws/list.html"] +
+                      [f"/laws/{i}.html" for i in range(1, LAW_COUNT + 1)])
+    first_level = [p for p in requested if p in ("/news/1.html", "/news/2.html", "/laws/list.html")]
+    overlap = max_overlap(PortalHandler.requests)
+
+    print(f"  抓取: {len(urls)} 个网页  统计: {crawler.stats['queued']} 入队 / "
+          f"{crawler.stats['duplicates']} 重复 / {crawler.stats['out_of_scope']} 超出范围")
+    return all([
+        check("抓取到范围内的全部网页", paths == expected, str(paths)),
+        check("每个网页只请求一次", len(requested) == len(set(requested)), f"{len(requested)} 次请求"),
+        check("不跟随其他域名、附件和超过深度的链接",
+              not any(p.startswith(("/other", "/files", "/laws/deep")) for p in requested)),
+        check("同一层中法规链接优先", first_level[:1] == ["/laws/list.html"], str(first_level)),
+        check("请求并发进行（每个主机不超过并发上限）",
+              1 < overlap <= Config.CRAWL_HOST_CONCURRENCY, f"最大同时请求 {overlap}"),
+        check("网页写入缓存", all(crawler.scraper.store.exists(cache_key(url)) for url in urls)),
+        check("缓存索引记录来源URL", all(crawler.scraper.index.url_for(cache_key(url)) == url for url in urls)),
+    ])
+
+
+async def test_crawl_cached(base: str) -> bool:
+    print("\n[4] 再次抓取（使用缓存）")
+    print("-" * 80)
+    PortalHandler.requests.clear()
+    crawler = LinkCrawler(CrawlScope.for_seeds([base], max_depth=2), WebScraper(), max_pages=50)
+    urls = await crawler.crawl([base], use_cache=True)
+    return check("全部来自缓存，不发送请求", len(urls) == 4 + LAW_COUNT and not PortalHandler.requests,
+                 f"{len(urls)} 个网页，{len(PortalHandler.requests)} 次请求")
+
+
+async def test_path_allow_list(base: str) -> bool:
+    print("\n[5] 路径白名单和网页数上限")
+    print("-" * 80)
+    PortalHandler.requests.clear()
+    scope = CrawlScope.for_seeds([base], allowed_paths=["/laws/"], max_depth=2)
+    crawler = LinkCrawler(scope, WebScraper(), max_pages=4)
+    urls = await crawler.crawl([base], use_cache=False)
+    paths = [normalize_url(url)[len(base) - 1:] for url in urls]
+    return all([
+        check("只跟随 /laws/ 下的链接", all(p == "/" or p.startswith("/laws/") for p in paths), str(paths)),
+        check("不超过网页数上限", len(urls) == 4, f"{len(urls)} 个网页"),
+    ])
+
+
+async def test_not_modified_without_cache(base: str) -> bool:
+    print("\n[6] 304 但缓存不可读时重新抓取")
+    print("-" * 80)
+    url = base + "etag.html"
+    scraper = WebScraper()
+    first = await scraper.fetch(url, use_cache=False)
+
+    # 发出条件请求后缓存读取失败（如被删除或切换了存储方式）
+    read = scraper.store.read
+    scraper.store.read = lambda key: (_ for _ in ()).throw(OSError("缓存不可读"))
+    PortalHandler.validators.clear()
+    second = await scraper.fetch(url, use_cache=False)
+    scraper.store.read = read
+
+    return all([
+        check("首次抓取记录 ETag", first and scraper.index.get(url).etag == '"v1"'),
+        check("先发条件请求，再不带验证信息重新抓取", PortalHandler.validators == ['"v1"', None],
+              str(PortalHandler.validators)),
+        check("返回完整网页，不把空的304正文写入缓存", second == first and scraper.store.read(cache_key(url)) == first),
+    ])
+
+
+def max_overlap(requests) -> int:
+    """同一时刻最多有几个请求在处理"""
+    events = sorted([(start, 1) for _, start, _ in requests] + [(end, -1) for _, _, end in requests])
+    current = peak = 0
+    for _, change in events:
+        current += change
+        peak = max(peak, current)
+    return peak
+
+
+def main():
+    """主函数"""
+    print("🧪 测试链接跟随抓取（本地模拟服务）")
+    print("=" * 80)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PortalHandler)
+    PortalHandler.port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{PortalHandler.port}/"
+    print(f"模拟服务: {base}")
+
+    # 使用临时缓存目录，不影响真实缓存；关闭请求间隔加快测试
+    Config.CACHE_DIR = Path(tempfile.mkdtemp(prefix="crawler-test-"))
+    Config.CRAWL_HOST_RATE = 0
+    print(f"临时缓存: {Config.CACHE_DIR}")
+
+    results = [test_normalize(), test_bloom_filter()]
+    results.append(asyncio.run(test_crawl(base)))
+    results.append(asyncio.run(test_crawl_cached(base)))
+    results.append(asyncio.run(test_path_allow_list(base)))
+    results.append(asyncio.run(test_not_modified_without_cache(base)))
+    server.shutdown()
+    shutil.rmtree(Config.CACHE_DIR, ignore_errors=True)
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
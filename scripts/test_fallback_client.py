@@ -0,0 +1,268 @@
+"""
+测试LLM降级链客户端
+使用本地桩客户端检查熔断器状态转换、对冲请求、被放弃的对冲请求结果仍报告给熔断器，
+以及流式输出的逐片段超时、中途失败的报告和被放弃的流的关闭（不调用真实API）
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.agent.llm_factory import LLMClientBase
+from legal_rights.agent.fallback_client import FallbackLLMClient, CircuitBreaker, get_provider_health
+
+
+class StubClient(LLMClientBase):
+    """桩客户端：等待指定时间后返回固定回复或抛出异常（流式时在第 stall_at 个片段前等待或出错）"""
+
+    def __init__(self, reply: str, delay: float = 0.0, error: bool = False, stall_at: int = 0):
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.stall_at = stall_at
+        self.calls = 0
+        self.closed = False
+
+    def complete(self, prompt, system=None, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise ConnectionError(f"{self.reply} 不可用")
+        return self.reply
+
+    def complete_stream(self, prompt, system=None, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        try:
+            for i, chunk in enumerate(self.reply):
+                if i == self.stall_at:
+                    time.sleep(self.delay)
+                    if self.error:
+                        raise ConnectionError(f"{self.reply} 连接中断")
+                yield chunk
+        finally:
+            self.closed = True
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def open_breaker(name: str, cooldown: float = 0.0):
+    """让提供方处于熔断状态（冷却时间到后放行试探请求）"""
+    breaker = get_provider_health(name).breaker
+    breaker.cooldown = cooldown
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    return breaker
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """等待回调完成"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_circuit_breaker() -> bool:
+    print("\n[1] 熔断器状态转换")
+    print("-" * 80)
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1)
+    results = []
+
+    breaker.record_failure()
+    results.append(check("未达到阈值时不熔断", breaker.allow() and breaker.state == CircuitBreaker.CLOSED))
+    breaker.record_failure()
+    results.append(check("达到阈值后熔断", not breaker.allow() and breaker.state == CircuitBreaker.OPEN))
+
+    time.sleep(0.12)
+    results.append(check("冷却结束后只放行一个试探请求",
+                         breaker.allow() and not breaker.allow(), breaker.state))
+    breaker.record_failure()
+    results.append(check("试探失败重新熔断", breaker.state == CircuitBreaker.OPEN and not breaker.allow()))
+
+    time.sleep(0.12)
+    breaker.allow()
+    breaker.release_probe()
+    results.append(check("让出试探名额后可再次试探", breaker.allow(), breaker.state))
+    breaker.record_success()
+    results.append(check("试探成功后恢复", breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0))
+    return all(results)
+
+
+def test_hedge_probe_success() -> bool:
+    print("\n[2] 对冲请求胜出时，被放弃的试探请求成功")
+    print("-" * 80)
+    breaker = open_breaker("stub-probe-ok")
+    slow = StubClient("主回复", delay=0.3)
+    client = FallbackLLMClient(
+        [("stub-probe-ok", slow), ("stub-backup-1", StubClient("备用回复"))],
+        attempt_timeout=5, hedge=True, hedge_delay=0.05
+    )
+
+    reply = client.complete("问题")
+    results = [
+        check("返回最先成功的回复", reply == "备用回复", reply),
+        check("试探请求已发出", slow.calls == 1),
+    ]
+    recovered = wait_for(lambda: breaker.state == CircuitBreaker.CLOSED)
+    results.append(check("试探请求完成后熔断器恢复", recovered, breaker.state))
+    results.append(check("被放弃请求的延迟也被记录", len(get_provider_health("stub-probe-ok").latencies) == 1))
+    return all(results)
+
+
+def test_hedge_probe_failure() -> bool:
+    print("\n[3] 对冲请求胜出时，被放弃的试探请求失败")
+    print("-" * 80)
+    breaker = open_breaker("stub-probe-fail", cooldown=30)
+    breaker.opened_at -= 30
+    client = FallbackLLMClient(
+        [("stub-probe-fail", StubClient("主回复", delay=0.3, error=True)), ("stub-backup-2", StubClient("备用回复"))],
+        attempt_timeout=5, hedge=True, hedge_delay=0.05
+    )
+
+    reply = client.complete("问题")
+    reopened = wait_for(lambda: breaker.state == CircuitBreaker.OPEN)
+    return all([
+        check("返回备用回复", reply == "备用回复", reply),
+        check("试探失败后重新熔断（不停留在半开状态）", reopened, breaker.state),
+        check("冷却时间重新计算", not breaker.allow()),
+    ])
+
+
+def test_hedge_loser_failure() -> bool:
+    print("\n[4] 被放弃的对冲请求失败计入失败次数")
+    print("-" * 80)
+    health = get_provider_health("stub-loser")
+    client = FallbackLLMClient(
+        [("stub-loser", StubClient("主回复", delay=0.2, error=True)), ("stub-backup-3", StubClient("备用回复"))],
+        attempt_timeout=5, hedge=True, hedge_delay=0.05
+    )
+    client.complete("问题")
+    return check("失败次数加一", wait_for(lambda: health.breaker.failures == 1), f"{health.breaker.failures} 次")
+
+
+def test_fallback_on_error() -> bool:
+    print("\n[5] 失败立即切换，不启用对冲")
+    print("-" * 80)
+    backup = StubClient("备用回复")
+    client = FallbackLLMClient(
+        [("stub-broken", StubClient("主回复", error=True)), ("stub-backup-4", backup)],
+        attempt_timeout=5, hedge=False
+    )
+    started = time.monotonic()
+    reply = client.complete("问题")
+    return all([
+        check("返回备用回复", reply == "备用回复", reply),
+        check("无需等待超时", time.monotonic() - started < 1),
+        check("主提供方记录失败", get_provider_health("stub-broken").breaker.failures == 1),
+    ])
+
+
+def test_stream_success() -> bool:
+    print("\n[6] 流式输出完成后记录成功")
+    print("-" * 80)
+    health = get_provider_health("stub-stream-ok")
+    client = FallbackLLMClient([("stub-stream-ok", StubClient("劳动合同法"))], attempt_timeout=1)
+    text = "".join(client.complete_stream("问题"))
+    return all([
+        check("输出完整回复", text == "劳动合同法", text),
+        check("记录成功和延迟", health.breaker.failures == 0 and len(health.latencies) == 1),
+    ])
+
+
+def test_stream_first_chunk_timeout() -> bool:
+    print("\n[7] 首个片段超时切换提供方，关闭被放弃的流")
+    print("-" * 80)
+    slow = StubClient("主回复", delay=0.4)
+    client = FallbackLLMClient(
+        [("stub-stream-slow", slow), ("stub-stream-backup", StubClient("备用回复"))], attempt_timeout=0.15
+    )
+    text = "".join(client.complete_stream("问题"))
+    return all([
+        check("切换到备用提供方", text == "备用回复", text),
+        check("超时计入失败次数", get_provider_health("stub-stream-slow").breaker.failures == 1),
+        check("被放弃的流在当前片段返回后关闭", wait_for(lambda: slow.closed)),
+    ])
+
+
+def test_stream_stall() -> bool:
+    print("\n[8] 输出中途卡住或出错")
+    print("-" * 80)
+    stalled = StubClient("劳动合同法", delay=0.4, stall_at=2)
+    client = FallbackLLMClient([("stub-stream-stall", stalled)], attempt_timeout=0.15)
+    chunks = []
+    started = time.monotonic()
+    try:
+        for chunk in client.complete_stream("问题"):
+            chunks.append(chunk)
+        stall_error = None
+    except RuntimeError as e:
+        stall_error = e
+    elapsed = time.monotonic() - started
+
+    broken = StubClient("劳动合同法", error=True, stall_at=3)
+    client = FallbackLLMClient([("stub-stream-broken", broken)], attempt_timeout=1)
+    try:
+        "".join(client.complete_stream("问题"))
+        broken_error = None
+    except RuntimeError as e:
+        broken_error = e
+
+    return all([
+        check("卡住时按单次调用超时结束，不无限等待", stall_error is not None and elapsed < 0.35,
+              f"已输出 {''.join(chunks)!r}，{elapsed:.2f} 秒"),
+        check("卡住计入失败次数", get_provider_health("stub-stream-stall").breaker.failures == 1),
+        check("卡住的流随后关闭", wait_for(lambda: stalled.closed)),
+        check("中途出错时抛出异常并计入失败次数", broken_error is not None
+              and get_provider_health("stub-stream-broken").breaker.failures == 1, str(broken_error)),
+    ])
+
+
+def test_stream_abandoned_by_caller() -> bool:
+    print("\n[9] 调用方停止读取")
+    print("-" * 80)
+    stub = StubClient("劳动合同法")
+    client = FallbackLLMClient([("stub-stream-caller", stub)], attempt_timeout=1)
+    stream = client.complete_stream("问题")
+    next(stream)
+    stream.close()
+    return all([
+        check("关闭底层的流", stub.closed),
+        check("不计入失败", get_provider_health("stub-stream-caller").breaker.failures == 0),
+    ])
+
+
+def main():
+    """主函数"""
+    print("🧪 测试LLM降级链客户端（本地桩客户端）")
+    print("=" * 80)
+
+    results = [
+        test_circuit_breaker(),
+        test_hedge_probe_success(),
+        test_hedge_probe_failure(),
+        test_hedge_loser_failure(),
+        test_fallback_on_error(),
+        test_stream_success(),
+        test_stream_first_chunk_timeout(),
+        test_stream_stall(),
+        test_stream_abandoned_by_caller(),
+    ]
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
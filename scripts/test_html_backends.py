@@ -0,0 +1,146 @@
+"""
+测试HTML后端一致性
+在几种典型页面（层层嵌套的 div、注释、script/style、XML声明、<br> 换行、需要清洗的导航和页脚、
+没有主要内容容器、没有标题）上检查 lxml / selectolax 后端与 BeautifulSoup 后端得到相同的
+纯文本、标题和章节结构（不访问网络，未安装的后端跳过）
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.scraper import DocumentProcessor, available_html_backends
+from legal_rights.scripts.benchmark_html_backends import signature
+
+
+PAGES = {
+    "嵌套 div": """
+<html><head><title>劳动合同法</title></head><body>
+<div class="content"><h1>中华人民共和国劳动合同法</h1>
+<div><div><h2>第一章 总则</h2>
+<div><p>第一条 为了完善劳动合同制度，明确劳动合同双方当事人的权利和义务，制定本法。</p></div>
+<div><div><p>第二条 中华人民共和国境内的企业、个体经济组织与劳动者建立劳动关系，适用本法。</p></div></div>
+</div>
+<h2>第二章 劳动合同的订立</h2>
+<div>第七条 用人单位自用工之日起即与劳动者建立劳动关系。<span>用人单位应当建立职工名册备查。</span></div>
+</div></div></body></html>
+""",
+    "注释和 script/style": """
+<html><head><title>工资支付</title><style>p { color: red; }</style>
+<script>var tracker = "第一条 不应出现";</script></head><body>
+<div id="main"><h1>工资支付暂行规定</h1>
+<!-- 第九十九条 注释中的条文不应出现 -->
+<p>第五条 工资支付以法定货币支付。<!-- 行内注释 -->不得以实物及有价证券替代货币支付。</p>
+<script type="text/javascript">document.write("<p>第六条 脚本写入</p>");</script>
+<noscript>请启用JavaScript</noscript>
+<p>第六条 用人单位应将工资支付给劳动者本人。</p>
+</div></body></html>
+""",
+    "XML声明": """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><head><title>社会保险法</title></head><body>
+<div class="article"><h1>中华人民共和国社会保险法</h1>
+<h3>第一章 总则</h3>
+<p>第一条 为了规范社会保险关系，维护公民参加社会保险和享受社会保险待遇的合法权益，制定本法。</p>
+<p>第二条 国家建立基本养老保险、基本医疗保险、工伤保险、失业保险、生育保险等社会保险制度。</p>
+</div></body></html>
+""",
+    "<br> 换行": """
+<html><head><title>劳动法</title></head><body>
+<div class="TRS_Editor"><h1>中华人民共和国劳动法</h1>
+<p>第三十六条 国家实行劳动者每日工作时间不超过八小时的工时制度。<br>第三十七条 对实行计件工作的劳动者，
+用人单位应当合理确定其劳动定额。<br/>第三十八条 用人单位应当保证劳动者每周至少休息一日。</p>
+<div>第四十四条 有下列情形之一的，用人单位应当支付高于劳动者正常工作时间工资的工资报酬：<br />
+（一）安排劳动者延长工作时间的，支付不低于工资的百分之一百五十的工资报酬；<br>
+（二）休息日安排劳动者工作又不能安排补休的，支付不低于工资的百分之二百的工资报酬；</div>
+</div></body></html>
+""",
+    "导航和页脚": """
+<html><head><title>司法解释</title></head><body>
+<div class="nav"><a href="/">首页</a> &gt; <a href="/laws">法律法规</a></div>
+<div class="header">人力资源和社会保障部</div>
+<div class="content"><h1>关于审理劳动争议案件适用法律问题的解释（一）</h1>
+<div class="share">分享到：微信 微博</div>
+<p>第一条 劳动者与用人单位之间发生的下列纠纷，属于劳动争议，当事人不服劳动争议仲裁机构作出的裁决，
+依法提起诉讼的，人民法院应予受理。</p>
+<p>第二条 下列纠纷不属于劳动争议。</p>
+</div>
+<div class="footer">版权所有 © 2024</div>
+</body></html>
+""",
+    "没有主要内容容器": """
+<html><head><title>问答</title></head><body>
+<h1>试用期被辞退有补偿吗</h1>
+<p>用人单位在试用期解除劳动合同的，应当向劳动者说明理由。</p>
+<table><tr><td>情形</td><td>补偿</td></tr><tr><td>协商解除</td><td>N</td></tr></table>
+<ul><li>第三十九条 严重违反用人单位规章制度的</li><li>第四十条 不能胜任工作的</li></ul>
+</body></html>
+""",
+    "没有标题": """
+<html><body><div class="content">
+<p>第八十七条 用人单位违反本法规定解除或者终止劳动合同的，应当依照本法第四十七条规定的经济补偿标准的二倍向劳动者支付赔偿金。</p>
+<p>   </p><p>&nbsp;</p>
+</div></body></html>
+""",
+}
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def describe(expected: tuple, got: tuple) -> str:
+    """第一处不一致的说明"""
+    labels = ["纯文本", "标题", "章节结构"]
+    for label, a, b in zip(labels, expected, got):
+        if a != b:
+            return f"{label}: {str(a)[:80]!r} ≠ {str(b)[:80]!r}"
+    return ""
+
+
+def test_backend(name: str, baseline: dict) -> bool:
+    print(f"\n[{name}] 与 bs4 后端比较")
+    print("-" * 80)
+    processor = DocumentProcessor(backend=name)
+    results = []
+    for title, html in PAGES.items():
+        got = signature(processor.process(html, url=f"http://example.com/{title}"))
+        results.append(check(title, got == baseline[title], describe(baseline[title], got)))
+    return all(results)
+
+
+def main():
+    """主函数"""
+    print("🧪 测试HTML后端一致性")
+    print("=" * 80)
+
+    baseline_processor = DocumentProcessor(backend="bs4")
+    baseline = {
+        title: signature(baseline_processor.process(html, url=f"http://example.com/{title}"))
+        for title, html in PAGES.items()
+    }
+    texts = "".join(baseline[title][0] for title in PAGES)
+    results = [
+        check("bs4 后端提取到条文", all(baseline[title][0] for title in PAGES)),
+        check("不含注释、脚本和导航", not any(noise in texts for noise in ["第九十九条", "脚本写入", "不应出现", "首页", "版权所有"])),
+    ]
+
+    backends = [name for name in ("lxml", "selectolax") if name in available_html_backends()]
+    for name in ("lxml", "selectolax"):
+        if name not in backends:
+            print(f"\n⚠️  未安装 {name}，跳过")
+    results += [test_backend(name, baseline) for name in backends]
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+测试问题分类器
+检查 examples/test_cases.json 中的全部用例、"如何/怎么 + 办事动词"的维权流程问题、
+单独出现的疑问词不足以判定类型、多个类型同时命中时得分高者胜出，
+以及自定义词典合并（纯本地，不训练小模型、不调用LLM）
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.config import Config
+from legal_rights.models import QuestionType
+from legal_rights.agent.question_classifier import QuestionClassifier
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def check_cases(classifier: QuestionClassifier, cases: list) -> bool:
+    results = []
+    for question, expected in cases:
+        predicted = classifier.classify(question)
+        results.append(check(f"{question} → {expected.name}", predicted == expected, predicted.name))
+    return all(results)
+
+
+def test_example_cases(classifier: QuestionClassifier) -> bool:
+    print("\n[1] examples/test_cases.json")
+    print("-" * 80)
+    with open(Config.PROJECT_ROOT / "examples" / "test_cases.json", 'r', encoding='utf-8') as f:
+        cases = json.load(f)["test_cases"]
+    return check_cases(classifier, [(case["question"], QuestionType[case["expected_type"]]) for case in cases])
+
+
+def test_procedure_questions(classifier: QuestionClassifier) -> bool:
+    print("\n[2] 维权流程问题")
+    print("-" * 80)
+    return check_cases(classifier, [
+        ("如何维权", QuestionType.PROCEDURE),
+        ("公司拖欠工资如何要回", QuestionType.PROCEDURE),
+        ("被辞退如何处理", QuestionType.PROCEDURE),
+        ("工伤如何认定", QuestionType.PROCEDURE),
+        ("如何证明劳动关系", QuestionType.PROCEDURE),
+        ("如何办理失业金", QuestionType.PROCEDURE),
+        ("怎么申请劳动仲裁", QuestionType.PROCEDURE),
+        ("如何讨薪", QuestionType.PROCEDURE),
+        ("如何举报公司不交社保", QuestionType.PROCEDURE),
+        ("被违法辞退找谁", QuestionType.PROCEDURE),
+        ("公司不发工资去哪里投诉", QuestionType.PROCEDURE),
+    ])
+
+
+def test_question_words(classifier: QuestionClassifier) -> bool:
+    print("\n[3] 单独的疑问词和多类型命中")
+    print("-" * 80)
+    results = [
+        check("'如何' 单独出现低于最低得分",
+              classifier.scores("如何看待996").get(QuestionType.PROCEDURE, 0) < QuestionClassifier.MIN_SCORE),
+    ]
+    results.append(check_cases(classifier, [
+        ("如何看待996", QuestionType.GENERAL),
+        ("加班费如何计算", QuestionType.CALCULATION),
+        ("试用期如何规定", QuestionType.LEGAL_BASIS),
+        ("我的补偿怎么这么少", QuestionType.COMPENSATION),
+    ]))
+    return all(results)
+
+
+def test_custom_lexicon() -> bool:
+    print("\n[4] 自定义词典")
+    print("-" * 80)
+    original = (Config.CLASSIFIER_LEXICON_PATH, Config.CLASSIFIER_USE_MODEL)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", encoding="utf-8", delete=False) as f:
+        json.dump({"PROCEDURE": {"注册": 0.5}}, f, ensure_ascii=False)
+    try:
+        Config.CLASSIFIER_LEXICON_PATH = f.name
+        Config.CLASSIFIER_USE_MODEL = False
+        classifier = QuestionClassifier.from_config()
+        return all([
+            check("自定义关键词与疑问词组合生效", classifier.classify("如何注册公司？") == QuestionType.PROCEDURE),
+            check("保留默认词典", classifier.classify("公司不给补偿怎么办？") == QuestionType.PROCEDURE),
+            check("不修改默认词典", "注册" not in QuestionClassifier.DEFAULT_LEXICON[QuestionType.PROCEDURE]),
+        ])
+    finally:
+        Config.CLASSIFIER_LEXICON_PATH, Config.CLASSIFIER_USE_MODEL = original
+        Path(f.name).unlink(missing_ok=True)
+
+
+def main():
+    """主函数"""
+    print("🧪 测试问题分类器")
+    print("=" * 80)
+
+    classifier = QuestionClassifier()
+    results = [
+        test_example_cases(classifier),
+        test_procedure_questions(classifier),
+        test_question_words(classifier),
+        test_custom_lexicon(),
+    ]
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+测试LLM调用速率限制
+检查令牌桶的补充和等待时间、RPM/TPM双桶调度、按优先级排队，
+以及包装器按 输入 + max_tokens 预占TPM额度（使用本地桩客户端，不调用真实API）
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.agent.llm_factory import LLMClientBase
+from legal_rights.agent.rate_limiter import (
+    TokenBucket, ProviderScheduler, RateLimitedClient, estimate_tokens,
+    request_priority, current_priority, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+)
+
+
+class StubClient(LLMClientBase):
+    """桩客户端：直接返回固定回复"""
+
+    max_tokens = 100
+
+    def complete(self, prompt, system=None, temperature=0.7, max_tokens=None):
+        return "回复"
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def drain(bucket: TokenBucket):
+    """清空令牌桶"""
+    bucket.tokens = 0.0
+    bucket.updated_at = time.monotonic()
+
+
+def test_token_bucket() -> bool:
+    print("\n[1] 令牌桶补充和等待时间")
+    print("-" * 80)
+    bucket = TokenBucket(60)  # 每秒补充1个
+    now = bucket.updated_at
+    results = [check("初始为满桶", bucket.wait_time(60, now) == 0.0)]
+
+    bucket.take(60)
+    results.append(check("取空后等待 1 个令牌需 1 秒", abs(bucket.wait_time(1, now) - 1.0) < 1e-9,
+                         f"{bucket.wait_time(1, now):.3f} 秒"))
+    results.append(check("经过 2.5 秒补充 2.5 个", bucket.wait_time(2, now + 2.5) == 0.0
+                         and abs(bucket.tokens - 2.5) < 1e-9, f"{bucket.tokens:.2f} 个"))
+    results.append(check("不足时按缺口计算等待时间", abs(bucket.wait_time(4, now + 2.5) - 1.5) < 1e-9))
+    results.append(check("补充不超过容量", bucket.wait_time(1, now + 1000) == 0.0 and bucket.tokens == 60))
+
+    bucket.take(60)
+    results.append(check("超过容量的请求按满桶计算（不会永远等待）",
+                         abs(bucket.wait_time(500, now + 1000) - 60.0) < 1e-9))
+    return all(results)
+
+
+def test_scheduler_wait() -> bool:
+    print("\n[2] RPM/TPM 双桶调度")
+    print("-" * 80)
+    unlimited = ProviderScheduler("stub-unlimited")
+    results = [check("未配置限制时不等待", not unlimited.enabled and unlimited.acquire(10_000) == 0.0)]
+
+    scheduler = ProviderScheduler("stub-rpm", rpm=600, tpm=60_000)  # 每秒10个请求、1000个token
+    results.append(check("额度充足时立即放行", scheduler.acquire(100) < 0.05))
+
+    drain(scheduler.requests)
+    waited = scheduler.acquire(100)
+    results.append(check("RPM用尽时等待补充", 0.07 <= waited < 0.5, f"{waited:.3f} 秒"))
+
+    drain(scheduler.tokens)
+    waited = scheduler.acquire(200)
+    results.append(check("TPM用尽时按token数等待", 0.17 <= waited < 0.6, f"{waited:.3f} 秒"))
+    return all(results)
+
+
+def test_priority() -> bool:
+    print("\n[3] 按优先级排队")
+    print("-" * 80)
+    scheduler = ProviderScheduler("stub-priority", rpm=600)
+    drain(scheduler.requests)
+    order = []
+
+    def worker(label: str, priority: int):
+        scheduler.acquire(priority=priority)
+        order.append(label)
+
+    threads = [
+        threading.Thread(target=worker, args=("批量1", PRIORITY_BATCH)),
+        threading.Thread(target=worker, args=("批量2", PRIORITY_BATCH)),
+        threading.Thread(target=worker, args=("对话", PRIORITY_INTERACTIVE)),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    with request_priority(PRIORITY_BATCH):
+        in_context = current_priority()
+    return all([
+        check("交互式请求插到批量任务前面", order[:1] == ["对话"], " → ".join(order)),
+        check("同优先级先来先到", order[1:] == ["批量1", "批量2"], " → ".join(order)),
+        check("上下文中设置的优先级生效并在退出后恢复",
+              in_context == PRIORITY_BATCH and current_priority() == PRIORITY_INTERACTIVE),
+    ])
+
+
+def test_client_reservation() -> bool:
+    print("\n[4] 包装器预占TPM额度")
+    print("-" * 80)
+    client = RateLimitedClient(StubClient(), "stub-wrapped")
+    client.scheduler = ProviderScheduler("stub-wrapped", tpm=10_000)
+    prompt = "劳动合同到期不续签有补偿吗" * 3
+
+    reply = client.complete(prompt, system="你是劳动法律师")
+    expected = estimate_tokens("你是劳动法律师" + prompt) + StubClient.max_tokens
+    used = 10_000 - client.scheduler.tokens.tokens
+    return all([
+        check("透传回复", reply == "回复"),
+        check("按 输入 + max_tokens 预占", abs(used - expected) < 1, f"{used:.0f} / 预计 {expected}"),
+        check("其余属性透传给被包装的客户端", client.max_tokens == StubClient.max_tokens),
+    ])
+
+
+def main():
+    """主函数"""
+    print("🧪 测试LLM调用速率限制（本地桩客户端）")
+    print("=" * 80)
+
+    results = [
+        test_token_bucket(),
+        test_scheduler_wait(),
+        test_priority(),
+        test_client_reservation(),
+    ]
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
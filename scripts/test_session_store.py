@@ -0,0 +1,123 @@
+"""
+测试会话存储
+检查内存LRU容量、换出到 SQLite 和再次访问时加载、换出后恢复的对话内容（问题、回答、文档ID和相关度、
+用户情况、摘要），以及请求期间被换出的会话放回、删除和关闭后重新打开（使用临时数据库）
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.models import Answer, Document, QuestionType
+from legal_rights.agent.session_store import SessionStore
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def make_answer(question: str, doc_ids: list) -> Answer:
+    """构造带文档的回答"""
+    return Answer(
+        question=question,
+        answer_text=f"关于「{question}」的回答",
+        question_type=QuestionType.COMPENSATION,
+        relevant_docs=[Document(id=doc_id, content="条文", source_url="http://example.com") for doc_id in doc_ids],
+        confidence=0.8,
+        sources=["http://example.com"]
+    )
+
+
+def talk(store: SessionStore, session_id: str, question: str, doc_ids: list, scores: list):
+    """模拟一次请求：取出会话、添加一轮对话、放回"""
+    manager = store.get(session_id)
+    manager.add_turn(question, make_answer(question, doc_ids), doc_scores=scores)
+    store.put(session_id, manager)
+    return manager
+
+
+def test_lru_spill(db_path: Path) -> bool:
+    print("\n[1] LRU 换出和加载")
+    print("-" * 80)
+    store = SessionStore(capacity=2, db_path=db_path)
+    first = talk(store, "a", "我工作了3年，月薪8000元，被公司违法辞退", ["d1", "d2"], [0.9, 0.7])
+    talk(store, "b", "试用期可以随时辞退吗", ["d3"], [0.6])
+    results = [check("未超出容量时全部在内存中", store.stats() == {"hot": 2, "stored": 0}, str(store.stats()))]
+
+    talk(store, "c", "加班费怎么算", ["d4"], [0.5])
+    results.append(check("超出容量时换出最久未使用的会话", store.stats() == {"hot": 2, "stored": 1}
+                         and "a" not in store._hot, str(list(store._hot))))
+
+    loaded = store.get("a")
+    turn = loaded.context.turns[-1]
+    results += [
+        check("再次访问时从磁盘加载（新对象）", loaded is not first and "a" in store._hot),
+        check("加载后换出下一个最久未使用的会话", list(store._hot) == ["c", "a"], str(list(store._hot))),
+        check("恢复问题和回答", turn.question == first.context.turns[-1].question
+              and turn.answer.answer_text == first.context.turns[-1].answer.answer_text),
+        check("恢复文档ID和相关度（一一对应）", turn.doc_ids == ["d1", "d2"] and turn.doc_scores == [0.9, 0.7],
+              f"{turn.doc_ids} {turn.doc_scores}"),
+        check("恢复抽取的用户情况", loaded.extract_user_situation()["monthly_salary"] == 8000,
+              str(loaded.extract_user_situation())),
+        check("恢复对话轮数", loaded.context.turn_count == 1),
+    ]
+
+    talk(store, "a", "那能拿多少补偿", ["d5"], [0.8])
+    results.append(check("继续对话时上一轮折叠进摘要", bool(loaded.context.summary)
+                         and len(loaded.context.turns) == 2 and loaded.context.turn_count == 2))
+    store.close()
+    return all(results)
+
+
+def test_put_after_spill(db_path: Path) -> bool:
+    print("\n[2] 请求期间被换出的会话")
+    print("-" * 80)
+    store = SessionStore(capacity=1, db_path=db_path)
+    manager = store.get("x")
+    # 处理请求期间其他会话挤占了内存
+    store.get("y")
+    manager.add_turn("被辞退了怎么办", make_answer("被辞退了怎么办", ["d1"]), doc_scores=[0.5])
+    store.put("x", manager)
+
+    results = [check("放回时以内存中的最新状态为准", store.get("x") is manager
+                     and len(manager.context.turns) == 1)]
+    store.close()
+
+    reopened = SessionStore(capacity=1, db_path=db_path)
+    results.append(check("关闭时写入、重新打开后可加载",
+                         len(reopened.get("x").context.turns) == 1, str(reopened.stats())))
+    reopened.delete("x")
+    results.append(check("删除后重新访问为新会话", not reopened.get("x").context.turns))
+    reopened.close()
+    return all(results)
+
+
+def main():
+    """主函数"""
+    print("🧪 测试会话存储（临时数据库）")
+    print("=" * 80)
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="session-test-"))
+    try:
+        results = [
+            test_lru_spill(tmp_dir / "lru.db"),
+            test_put_after_spill(tmp_dir / "put.db"),
+        ]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
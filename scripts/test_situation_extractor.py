@@ -0,0 +1,127 @@
+"""
+测试用户情况抽取
+检查中文数字和万/千单位的解析、单段文本中各字段的抽取和出处、年份和次数不被误认为年限或工资，
+以及多轮对话中逐轮累积、后面的更正覆盖前面的值、出处记录轮次和 set_user_info 优先（纯本地，不调用LLM）
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root.parent))
+
+from legal_rights.models import Answer, QuestionType
+from legal_rights.agent.conversation_manager import ConversationManager
+from legal_rights.agent.situation_extractor import SituationExtractor, parse_number
+
+
+def check(name: str, ok: bool, detail: str = "") -> bool:
+    print(f"  {'✅' if ok else '❌'} {name}" + (f"  {detail}" if detail else ""))
+    return ok
+
+
+def make_answer(question: str) -> Answer:
+    return Answer(question=question, answer_text="回答", question_type=QuestionType.GENERAL,
+                  relevant_docs=[], confidence=0.5, sources=[])
+
+
+def test_parse_number() -> bool:
+    print("\n[1] 数字解析")
+    print("-" * 80)
+    cases = [
+        ("8000", 8000), ("1.5万", 15000), ("1万5", 15000), ("两万", 20000), ("3w", 30000),
+        ("8千", 8000), ("12k", 12000), ("五千五", 5500), ("八千五", 8500),
+        ("二十五", 25), ("十", 10), ("一百零五", 105), ("一万零五百", 10500),
+    ]
+    results = [check(f"{text!r} → {expected}", parse_number(text) == expected, str(parse_number(text)))
+               for text, expected in cases]
+    results.append(check("没有数字返回None", parse_number("若干") is None))
+    return all(results)
+
+
+def test_single_text() -> bool:
+    print("\n[2] 单段文本抽取和出处")
+    print("-" * 80)
+    extractor = SituationExtractor()
+    facts = extractor.extract("我在深圳工作了5年半，月薪1.5万，公司没有提前通知就违法辞退了我", turn=3)
+    values = {name: fact.value for name, fact in facts.items()}
+    results = [
+        check("抽取全部字段", values == {"work_years": 5.5, "monthly_salary": 15000, "termination_reason": "违法辞退",
+                                    "notice_period": 0, "city": "深圳"}, str(values)),
+        check("出处为原文片段", facts["work_years"].source == "5年半" and facts["monthly_salary"].source == "月薪1.5万",
+              f"{facts['work_years'].source} / {facts['monthly_salary'].source}"),
+        check("出处记录轮次", all(fact.turn == 3 for fact in facts.values())),
+        check("当前问题不记录轮次", extractor.extract("月薪8000")["monthly_salary"].turn is None),
+    ]
+
+    cases = [
+        ("工作了三年零六个月，工资大概是八千五", {"work_years": 3.5, "monthly_salary": 8500}),
+        ("入职18个月，工资3个月没发了，每月12k", {"work_years": 1.5, "monthly_salary": 12000}),
+        ("年薪24万，公司提前一个月通知", {"monthly_salary": 20000, "notice_period": 30}),
+        ("2023年入职", {}),
+    ]
+    for text, expected in cases:
+        got = {name: fact.value for name, fact in extractor.extract(text).items()
+               if name in ("work_years", "monthly_salary", "notice_period")}
+        results.append(check(f"{text!r}", got == expected, str(got)))
+    return all(results)
+
+
+def test_multi_turn() -> bool:
+    print("\n[3] 多轮对话：累积、更正和优先级")
+    print("-" * 80)
+    manager = ConversationManager()
+    turns = [
+        "我在上海工作了3年，被公司辞退了",
+        "月薪8千",
+        "更正一下，月薪是1万2，其实工作了4年",
+    ]
+    snapshots = []
+    for question in turns:
+        manager.add_turn(question, make_answer(question))
+        snapshots.append(manager.extract_user_situation())
+
+    salary = manager.get_fact("monthly_salary")
+    years = manager.get_fact("work_years")
+    city = manager.get_fact("city")
+    results = [
+        check("逐轮累积", snapshots[1]["work_years"] == 3 and snapshots[1]["monthly_salary"] == 8000
+              and snapshots[1]["city"] == "上海", str(snapshots[1])),
+        check("后面的更正覆盖前面的值", snapshots[2]["monthly_salary"] == 12000 and snapshots[2]["work_years"] == 4,
+              str(snapshots[2])),
+        check("更正后的出处和轮次", salary.source == "月薪是1万2" and salary.turn == 3 and years.turn == 3,
+              f"{salary.source}（第{salary.turn}轮）"),
+        check("未更正的字段保留原出处", city.value == "上海" and city.turn == 1),
+    ]
+
+    current = manager.extract_user_situation("如果月薪是1.5万呢")
+    results.append(check("当前问题优先于对话历史（不写入历史）", current["monthly_salary"] == 15000
+                         and manager.get_fact("monthly_salary").value == 12000))
+
+    manager.set_user_info("monthly_salary", 9000)
+    results.append(check("set_user_info 设置的值优先",
+                         manager.extract_user_situation("如果月薪是1.5万呢")["monthly_salary"] == 9000))
+    return all(results)
+
+
+def main():
+    """主函数"""
+    print("🧪 测试用户情况抽取")
+    print("=" * 80)
+
+    results = [
+        test_parse_number(),
+        test_single_text(),
+        test_multi_turn(),
+    ]
+
+    print("\n" + "=" * 80)
+    if all(results):
+        print("✅ 全部通过")
+    else:
+        print("❌ 有检查未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+HTTP 服务模式
+基于 asyncio 的本地HTTP服务，常驻预热的检索器、问答组件和LLM客户端池，
+每个请求只需承担检索和生成本身的开销
+"""
+import asyncio
+import json
+import queue
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, closing
+from typing import Optional
+
+from .models import Answer
+
+
+class LLMClientPool:
+    """LLM客户端池（预先创建，按需借出和归还）"""
+
+    def __init__(self, size: int = 4, llm_type: Optional[str] = None):
+        """
+        初始化客户端池
+
+        Args:
+            size: 客户端数量
+            llm_type: LLM类型（None 表示自动选择）
+        """
+        from .agent.llm_factory import create_llm_client
+
+        self.size = max(1, size)
+        self._clients = queue.Queue()
+        for _ in range(self.size):
+            self._clients.put(create_llm_client(llm_type))
+
+    @contextmanager
+    def acquire(self):
+        """借出一个客户端，使用完毕自动归还"""
+        client = self._clients.get()
+        try:
+            yield client
+        finally:
+            self._clients.put(client)
+
+
+class LegalAgentServer:
+    """法律问答HTTP服务"""
+
+    MAX_HEADER_SIZE = 64 * 1024
+    MAX_BODY_SIZE = 1024 * 1024
+    MAX_TOP_K = 50
+    MAX_SESSION_ID_LENGTH = 128
+
+    REASONS = {
+        200: "OK",
+        400: "Bad Request",
+        404: "Not Found",
+        405: "Method Not Allowed",
+        413: "Payload Too Large",
+        500: "Internal Server Error",
+    }
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        concurrency: int = 8,
+        pool_size: int = 4,
+        retriever=None,
+        client_pool: Optional[LLMClientPool] = None,
+        session_store=None,
+        agent=None
+    ):
+        """
+        初始化服务
+
+        Args:
+            host: 监听地址
+            port: 监听端口
+            concurrency: 最大并发处理的问答/检索请求数
+            pool_size: LLM客户端池大小
+            retriever: 知识检索器（如果为None则加载默认索引）
+            client_pool: LLM客户端池（如果为None则自动创建）
+            session_store: 会话存储（如果为None则使用默认的 SessionStore）
+            agent: 共享的Agent（如果为None则用检索器和池中的客户端创建）
+        """
+        from .knowledge import KnowledgeRetriever
+        from .agent import LegalAgent
+        from .agent.session_store import SessionStore
+
+        self.host = host
+        self.port = port
+        self.concurrency = max(1, concurrency)
+
+        # 预热：索引、Embedding客户端和LLM客户端只在启动时创建一次
+        self.retriever = retriever or KnowledgeRetriever(auto_load=True)
+        self.client_pool = client_pool or LLMClientPool(size=pool_size)
+
+        # 分类器、计算器和Prompt模板同样只创建一次，每个请求只替换LLM客户端和会话
+        if agent is None:
+            with self.client_pool.acquire() as client:
+                agent = LegalAgent(llm_client=client, retriever=self.retriever, verbose=False)
+        self.agent = agent
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        # 会话: 内存中保留活跃会话，不活跃的写入SQLite
+        self.sessions = session_store or SessionStore()
+        # 会话锁只在有请求持有时存在，避免随会话数增长
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    # ==================== 会话管理 ====================
+
+    @contextmanager
+    def _session(self, session_id: Optional[str]):
+        """借出会话的对话管理器，处理完毕后放回存储（无 session_id 时使用一次性管理器）"""
+        from .agent import ConversationManager
+
+        if not session_id:
+            yield ConversationManager()
+            return
+
+        manager = self.sessions.get(session_id)
+        try:
+            yield manager
+        finally:
+            self.sessions.put(session_id, manager)
+
+    def _session_lock(self, session_id: Optional[str]) -> asyncio.Lock:
+        """同一会话的请求串行执行，避免对话历史交错"""
+        if not session_id:
+            return asyncio.Lock()
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+
+    def _create_agent(self, llm_client, conversation_manager):
+        """为单个请求创建Agent（共享预热Agent的组件，复用池中的LLM客户端）"""
+        return self.agent.with_session(llm_client, conversation_manager)
+
+    # ==================== 请求处理（在线程池中执行） ====================
+
+    def _ask(self, question: str, session_id: Optional[str], top_k: Optional[int]) -> dict:
+        with self.client_pool.acquire() as client, self._session(session_id) as manager:
+            agent = self._create_agent(client, manager)
+            answer = agent.ask(question, use_context=bool(session_id), top_k=top_k)
+        return _answer_to_dict(answer, session_id)
+
+    def _ask_stream(
+        self,
+        question: str,
+        session_id: Optional[str],
+        top_k: Optional[int],
+        emit,
+        cancelled: Optional[threading.Event] = None
+    ):
+        with self.client_pool.acquire() as client, self._session(session_id) as manager:
+            agent = self._create_agent(client, manager)
+            # 客户端断开后停止生成：关闭生成器会同时关闭LLM流，未完成的这一轮不写入对话历史
+            with closing(agent.ask_stream(question, use_context=bool(session_id), top_k=top_k)) as pieces:
+                for piece in pieces:
+                    if cancelled is not None and cancelled.is_set():
+                        return
+                    if isinstance(piece, Answer):
+                        emit({"type": "answer", **_answer_to_dict(piece, session_id)})
+                    else:
+                        emit({"type": "token", "text": piece})
+
+    def _retrieve(self, query: str, top_k: Optional[int]) -> dict:
+        results = self.retriever.retrieve(query, top_k=top_k)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "id": doc.id,
+                    "content": doc.content,
+                    "section_title": doc.section_title,
+                    "source_url": doc.source_url,
+                    "score": score,
+                }
+                for doc, score in results
+            ],
+        }
+
+    # ==================== HTTP ====================
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个TCP连接（支持HTTP/1.1 keep-alive）"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                if path == "/ask/stream" and method == "POST":
+                    await self._handle_stream(writer, body)
+                    break
+
+                status, payload = await self._dispatch(method, path, body)
+                await self._send_json(writer, status, payload, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _HTTPError as e:
+            await self._send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """读取一个HTTP请求，连接关闭时返回None"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise _HTTPError(413, "请求头过大")
+
+        if len(head) > self.MAX_HEADER_SIZE:
+            raise _HTTPError(413, "请求头过大")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise _HTTPError(400, "无效的请求行")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise _HTTPError(400, "无效的 Content-Length")
+        if length > self.MAX_BODY_SIZE:
+            raise _HTTPError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+
+        path = target.split("?", 1)[0]
+        return method.upper(), path, headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        """路由普通（非流式）请求"""
+        if path == "/health":
+            from .agent.http_pool import pool_stats
+            return 200, {
+                "status": "ok",
+                "documents": len(self.retriever.indexer.documents),
+                "sessions": self.sessions.stats(),
+                "http_pool": pool_stats(),
+            }
+
+        if path not in ("/ask", "/retrieve", "/ask/stream"):
+            return 404, {"error": f"未知路径: {path}"}
+        if method != "POST":
+            return 405, {"error": "仅支持 POST"}
+
+        try:
+            data = _parse_json(body)
+            top_k = _optional_int(data, "top_k", 1, self.MAX_TOP_K)
+            loop = asyncio.get_running_loop()
+
+            if path == "/retrieve":
+                query = _require_text(data, "query")
+                async with self._semaphore:
+                    result = await loop.run_in_executor(self._executor, self._retrieve, query, top_k)
+                return 200, result
+
+            question = _require_text(data, "question")
+            session_id = _optional_text(data, "session_id", self.MAX_SESSION_ID_LENGTH)
+            async with self._session_lock(session_id), self._semaphore:
+                result = await loop.run_in_executor(
+                    self._executor, self._ask, question, session_id, top_k
+                )
+            return 200, result
+
+        except _HTTPError as e:
+            return e.status, {"error": e.message}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    async def _handle_stream(self, writer: asyncio.StreamWriter, body: bytes):
+        """流式问答：以 Server-Sent Events 逐段推送回答"""
+        try:
+            data = _parse_json(body)
+            question = _require_text(data, "question")
+            session_id = _optional_text(data, "session_id", self.MAX_SESSION_ID_LENGTH)
+            top_k = _optional_int(data, "top_k", 1, self.MAX_TOP_K)
+        except _HTTPError as e:
+            await self._send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def emit(event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        def produce():
+            try:
+                self._ask_stream(question, session_id, top_k, emit, cancelled)
+            except Exception as e:
+                emit({"type": "error", "error": str(e)})
+            finally:
+                emit(done)
+
+        async with self._session_lock(session_id), self._semaphore:
+            task = loop.run_in_executor(self._executor, produce)
+            try:
+                while True:
+                    event = await events.get()
+                    if event is done:
+                        break
+                    payload = json.dumps(event, ensure_ascii=False)
+                    writer.write(f"data: {payload}\n\n".encode("utf-8"))
+                    await writer.drain()
+            finally:
+                # 客户端断开时通知生成线程停止，等它结束后才释放会话锁和并发名额，
+                # 避免同一会话的下一个请求与仍在运行的生成线程同时修改对话历史
+                cancelled.set()
+                await task
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: dict,
+        keep_alive: bool = True
+    ):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {self.REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve_forever(self):
+        """启动服务并持续运行"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        server = await asyncio.start_server(
+            self.handle_connection,
+            self.host,
+            self.port,
+            limit=self.MAX_HEADER_SIZE
+        )
+
+        print(f"\n🚀 服务已启动: http://{self.host}:{self.port}")
+        print(f"   并发上限: {self.concurrency}，LLM客户端池: {self.client_pool.size}")
+        print("   接口: POST /ask, POST /ask/stream, POST /retrieve, GET /health")
+
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                self._executor.shutdown(wait=False)
+                self.sessions.close()
+
+
+class _HTTPError(Exception):
+    """带状态码的请求错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _parse_json(body: bytes) -> dict:
+    try:
+        data = json.loads(body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise _HTTPError(400, "请求体不是有效的JSON")
+    if not isinstance(data, dict):
+        raise _HTTPError(400, "请求体必须是JSON对象")
+    return data
+
+
+def _require_text(data: dict, key: str) -> str:
+    value = data.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise _HTTPError(400, f"缺少参数: {key}")
+    return value.strip()
+
+
+def _optional_int(data: dict, key: str, minimum: int, maximum: int) -> Optional[int]:
+    value = data.get(key)
+    if value is None:
+        return None
+    # bool 是 int 的子类，需要单独排除
+    if isinstance(value, bool) or not isinstance(value, int) or not minimum <= value <= maximum:
+        raise _HTTPError(400, f"参数 {key} 必须是 {minimum} 到 {maximum} 之间的整数")
+    return value
+
+
+def _optional_text(data: dict, key: str, max_length: int) -> Optional[str]:
+    value = data.get(key)
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str) or len(value) > max_length:
+        raise _HTTPError(400, f"参数 {key} 必须是不超过 {max_length} 个字符的字符串")
+    return value
+
+
+def _answer_to_dict(answer: Answer, session_id: Optional[str] = None) -> dict:
+    """答案对象转换为JSON响应（文档只返回引用信息）"""
+    return {
+        "session_id": session_id,
+        "question": answer.question,
+        "answer": answer.answer_text,
+        "question_type": answer.question_type.value,
+        "confidence": answer.confidence,
+        "sources": answer.sources,
+        "documents": [
+            {
+                "id": doc.id,
+                "section_title": doc.section_title,
+                "source_url": doc.source_url,
+            }
+            for doc in answer.relevant_docs
+        ],
+        "metadata": answer.metadata,
+    }
+
+
+def run_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    concurrency: int = 8,
+    pool_size: int = 4
+):
+    """创建并运行HTTP服务"""
+    server = LegalAgentServer(
+        host=host,
+        port=port,
+        concurrency=concurrency,
+        pool_size=pool_size
+    )
+    asyncio.run(server.serve_forever())
@@ -33,6 +33,10 @@ setup(
             "dashscope",
             "zhipuai",
         ],
+        # 更快的HTML解析后端（可选，HTML_BACKEND=selectolax）
+        "selectolax": ["selectolax>=1.0.0"],
+        # 压缩缓存包使用 zstd 压缩（可选，CACHE_STORE=pack）
+        "zstd": ["zstandard>=0.22.0"],
         # 开发工具
         "dev": [
             "pytest>=7.0.0",